@@ -262,6 +262,15 @@ class EnhancedResponses:
             "I think there's been some kind of mistake.",
             "I'm going to hang up now. This is too complicated for me."
         ]
+    
+    def all_responses(self) -> List[str]:
+        """Every distinct line the library can return unprefixed (for pre-rendering)"""
+        lines = []
+        for cat_responses in self.response_categories.values():
+            lines.extend(cat_responses)
+        lines.extend(self.get_escalation_sequence())
+        lines.extend(self.get_confusion_sequence())
+        return list(dict.fromkeys(lines))
 
 
 # Example usage
@@ -0,0 +1,68 @@
+"""
+Compiled Keyword Index for Scammer Message Analysis
+Scores every keyword category in a single regex pass over the message
+"""
+import re
+from typing import Dict, Iterable, List, Tuple
+
+
+def _normalize(keyword: str) -> str:
+    return ' '.join(keyword.lower().split())
+
+
+class KeywordIndex:
+    """Word-boundary keyword matcher built once from weighted category lists
+
+    ``categories`` maps a category name to ``{keyword: weight}``.  Keywords
+    may be multi-word phrases ("social security"), match case-insensitively
+    on word boundaries (so "now" does not fire inside "know") and also match
+    a plain plural ("cards", "fees").  Longer keywords win over their own
+    prefixes, and each distinct keyword counts once per message.
+    """
+
+    def __init__(self, categories: Dict[str, Dict[str, float]]):
+        self.categories = list(categories)
+        self._targets: Dict[str, List[Tuple[str, float]]] = {}
+        for category, keywords in categories.items():
+            for keyword, weight in keywords.items():
+                self._targets.setdefault(_normalize(keyword), []).append((category, weight))
+
+        alternatives = sorted(self._targets, key=len, reverse=True)
+        pattern = '|'.join(r'\s+'.join(re.escape(word) for word in keyword.split())
+                           for keyword in alternatives)
+        self._pattern = re.compile(rf"\b({pattern})(?:s|es)?\b", re.IGNORECASE)
+
+    def matches(self, text: str) -> Dict[str, List[str]]:
+        """Distinct keywords found in ``text``, grouped by category"""
+        found = {category: [] for category in self.categories}
+        for keyword in self._distinct(text):
+            for category, _ in self._targets[keyword]:
+                found[category].append(keyword)
+        return found
+
+    def score(self, text: str) -> Dict[str, float]:
+        """Weighted score per category for one message"""
+        scores = dict.fromkeys(self.categories, 0)
+        for keyword in self._distinct(text):
+            for category, weight in self._targets[keyword]:
+                scores[category] += weight
+        return scores
+
+    def score_many(self, texts: Iterable[str]) -> List[Dict[str, float]]:
+        """Score a batch of messages, matching each distinct text only once"""
+        cache: Dict[str, Dict[str, float]] = {}
+        results = []
+        for text in texts:
+            scores = cache.get(text)
+            if scores is None:
+                scores = cache[text] = self.score(text)
+            results.append(dict(scores))
+        return results
+
+    def _distinct(self, text: str) -> List[str]:
+        seen = []
+        for match in self._pattern.finditer(text):
+            keyword = _normalize(match.group(1))
+            if keyword not in seen:
+                seen.append(keyword)
+        return seen
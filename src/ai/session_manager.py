@@ -0,0 +1,251 @@
+"""
+Conversation Session Manager for Scammer Waste Bot
+Per-conversation engine state with LRU and idle-TTL eviction
+"""
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, Optional
+
+from ai.sophisticated_engine import SophisticatedEngine
+
+if TYPE_CHECKING:
+    from data.shared_state import SharedStateStore
+
+
+class SessionConflictError(RuntimeError):
+    """Another worker advanced the conversation while this turn was running"""
+
+
+class ConversationSession:
+    """Engine state for a single conversation"""
+
+    __slots__ = ('conversation_id', 'engine', 'lock', 'created_at', 'last_access', 'version')
+
+    def __init__(self, conversation_id: str, engine: SophisticatedEngine):
+        self.conversation_id = conversation_id
+        self.engine = engine
+        self.lock = threading.Lock()
+        self.created_at = time.monotonic()
+        self.last_access = self.created_at
+        self.version = 0  # shared-store version this engine's state matches
+
+
+class _SessionStripe:
+    """One lock-protected LRU shard of the session table"""
+
+    __slots__ = ('lock', 'sessions', 'lru_evictions', 'ttl_evictions')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sessions: 'OrderedDict[str, ConversationSession]' = OrderedDict()
+        # Counted under ``lock``; SessionManager.evictions sums them
+        self.lru_evictions = 0
+        self.ttl_evictions = 0
+
+
+class SessionManager:
+    """Bounded, thread-safe map of conversation_id -> engine session
+
+    Sessions are spread over ``stripes`` independently locked shards so
+    concurrent calls on different conversations rarely contend.  Each shard
+    keeps its own LRU order and holds at most ``max_sessions // stripes``
+    sessions, so the table never exceeds ``max_sessions`` (a busy shard may
+    evict a little before the table as a whole is full).  Sessions idle for
+    longer than ``idle_ttl_seconds`` are dropped on access and by
+    ``sweep_expired()``, which ``get_or_create`` runs at most once every
+    ``sweep_interval`` seconds.
+
+    With a ``shared_store`` the table becomes a per-worker cache: each turn
+    reloads the conversation if another worker has advanced it and writes
+    the engine state back afterwards, so any worker can serve any turn.
+    Turns on one conversation are serialized across workers by a shared
+    lease held for up to ``turn_lease_seconds``, and the write-back only
+    succeeds against the version the turn started from.
+    """
+
+    def __init__(self, max_sessions: int = 10000, idle_ttl_seconds: float = 1800,
+                 stripes: int = 64,
+                 engine_factory: Callable[[str], SophisticatedEngine] = SophisticatedEngine,
+                 shared_store: Optional['SharedStateStore'] = None, sweep_interval: float = 60.0,
+                 turn_lease_seconds: float = 30.0):
+        if max_sessions < 1:
+            raise ValueError("max_sessions must be at least 1")
+        self.stripes = max(1, min(stripes, max_sessions))
+        self.max_sessions = max_sessions
+        self.max_per_stripe = max_sessions // self.stripes
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.engine_factory = engine_factory
+        self.shared_store = shared_store
+        self.sweep_interval = sweep_interval
+        self.turn_lease_seconds = turn_lease_seconds
+        self.conflicts = 0
+        self._stripes = [_SessionStripe() for _ in range(self.stripes)]
+        self._sweep_lock = threading.Lock()
+        self._next_sweep = time.monotonic() + sweep_interval
+
+    @property
+    def evictions(self) -> Dict[str, int]:
+        return {'lru': sum(stripe.lru_evictions for stripe in self._stripes),
+                'ttl': sum(stripe.ttl_evictions for stripe in self._stripes)}
+
+    def _stripe_for(self, conversation_id: str) -> _SessionStripe:
+        """Map a conversation id onto its shard (stable across processes)"""
+        return self._stripes[zlib.crc32(conversation_id.encode('utf-8')) % self.stripes]
+
+    def _is_expired(self, session: ConversationSession, now: float) -> bool:
+        return self.idle_ttl_seconds > 0 and now - session.last_access > self.idle_ttl_seconds
+
+    def get_or_create(self, conversation_id: str) -> ConversationSession:
+        """Return the live session for a conversation, creating it if needed"""
+        stripe = self._stripe_for(conversation_id)
+        now = time.monotonic()
+
+        with stripe.lock:
+            session = stripe.sessions.get(conversation_id)
+            if session is not None and self._is_expired(session, now):
+                del stripe.sessions[conversation_id]
+                stripe.ttl_evictions += 1
+                session = None
+
+            if session is None:
+                session = ConversationSession(conversation_id, self.engine_factory(conversation_id))
+                stripe.sessions[conversation_id] = session
+                while len(stripe.sessions) > self.max_per_stripe:
+                    stripe.sessions.popitem(last=False)
+                    stripe.lru_evictions += 1
+            else:
+                stripe.sessions.move_to_end(conversation_id)
+
+            session.last_access = now
+
+        if now >= self._next_sweep:
+            self._sweep_if_due(now)
+        return session
+
+    def _sweep_if_due(self, now: float):
+        """Run sweep_expired() from whichever request first notices it is due"""
+        if not self._sweep_lock.acquire(blocking=False):
+            return
+        try:
+            if now < self._next_sweep:
+                return
+            self._next_sweep = now + self.sweep_interval
+        finally:
+            self._sweep_lock.release()
+        self.sweep_expired()
+
+    @contextmanager
+    def session(self, conversation_id: str) -> Iterator[SophisticatedEngine]:
+        """Hold a conversation's engine exclusively for one turn
+
+        Turns on the same conversation are serialized within this worker
+        (and across workers when there is a shared store); turns on
+        different conversations run in parallel.  Raises
+        SessionConflictError, without storing the turn, if the shared
+        session moved on underneath it.
+        """
+        session = self.get_or_create(conversation_id)
+        with session.lock:
+            if self.shared_store is None:
+                yield session.engine
+                session.last_access = time.monotonic()
+                return
+
+            leased = self._acquire_turn_lease(conversation_id)
+            try:
+                stored = self.shared_store.load_session(conversation_id, session.version)
+                if stored is not None:
+                    session.version, state = stored
+                    if state is None:  # reset by another worker
+                        session.engine.reset_conversation()
+                    else:
+                        session.engine.restore_state(state)
+                yield session.engine
+                session.last_access = time.monotonic()
+                version = self.shared_store.save_session(
+                    conversation_id, session.engine.export_state(), session.version)
+                if version is None:
+                    # Force a reload next turn; this engine's state is now a fork
+                    session.version = -1
+                    self.conflicts += 1
+                    raise SessionConflictError(f"conversation {conversation_id} was updated concurrently")
+                session.version = version
+            finally:
+                if leased:
+                    self.shared_store.release_lease(f'turn:{conversation_id}')
+
+    def _acquire_turn_lease(self, conversation_id: str) -> bool:
+        """Wait for the cross-worker turn lease; False if it could not be had in time
+
+        A lease left behind by a crashed worker expires after
+        ``turn_lease_seconds``, so waiting that long normally succeeds;
+        if it does not, the compare-and-set save still catches a conflict.
+        """
+        deadline = time.monotonic() + self.turn_lease_seconds
+        delay = 0.005
+        while not self.shared_store.try_lease(f'turn:{conversation_id}', self.turn_lease_seconds):
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(delay)
+            delay = min(delay * 2, 0.05)
+        return True
+
+    def get(self, conversation_id: str) -> Optional[ConversationSession]:
+        """Look up a live session without creating one"""
+        stripe = self._stripe_for(conversation_id)
+        with stripe.lock:
+            session = stripe.sessions.get(conversation_id)
+            if session is not None and self._is_expired(session, time.monotonic()):
+                del stripe.sessions[conversation_id]
+                stripe.ttl_evictions += 1
+                return None
+            return session
+
+    def reset(self, conversation_id: str) -> bool:
+        """Drop a conversation's state; returns True if it existed"""
+        stripe = self._stripe_for(conversation_id)
+        with stripe.lock:
+            existed = stripe.sessions.pop(conversation_id, None) is not None
+        if self.shared_store is not None:
+            existed = self.shared_store.delete_session(conversation_id) or existed
+        return existed
+
+    def sweep_expired(self) -> int:
+        """Evict every idle session past its TTL; returns the number removed"""
+        if self.idle_ttl_seconds <= 0:
+            return 0
+
+        removed = 0
+        now = time.monotonic()
+        for stripe in self._stripes:
+            with stripe.lock:
+                # LRU order means the stalest sessions are at the front
+                while stripe.sessions:
+                    conversation_id, session = next(iter(stripe.sessions.items()))
+                    if not self._is_expired(session, now):
+                        break
+                    del stripe.sessions[conversation_id]
+                    stripe.ttl_evictions += 1
+                    removed += 1
+        # Every worker sweeps its own table, but only one per interval sweeps the shared one
+        if self.shared_store is not None and self.shared_store.try_lease('sweep_sessions', self.sweep_interval):
+            self.shared_store.sweep_sessions(self.idle_ttl_seconds)
+        return removed
+
+    def __len__(self) -> int:
+        return sum(len(stripe.sessions) for stripe in self._stripes)
+
+    def get_stats(self) -> Dict:
+        """Session table occupancy and eviction counters"""
+        return {
+            'active_sessions': len(self),
+            'max_sessions': self.max_sessions,
+            'stripes': self.stripes,
+            'idle_ttl_seconds': self.idle_ttl_seconds,
+            'evictions': dict(self.evictions),
+            'conflicts': self.conflicts,
+            'shared_store': self.shared_store.db_path if self.shared_store is not None else None
+        }
@@ -5,24 +5,67 @@ Sophisticated conversation management with adaptive responses
 import random
 import time
 import json
-import csv
 import os
+from collections import deque
 from datetime import datetime
 from typing import Dict, List, Tuple, Optional
 
+from ai.keyword_index import KeywordIndex
+from utils.admission import ADMITTED
+from utils.latency_sketch import get_latency_recorder
+from utils.log_writer import get_log_writer
+from utils.tracing import span
+
+# Per-turn log columns (data/analytics/interactions.csv)
+INTERACTION_CSV_HEADERS = [
+    'timestamp', 'conversation_turn', 'scammer_message_length',
+    'bot_response', 'urgency_score', 'financial_score', 'tech_score',
+    'authority_score', 'frustration_level', 'technique_type', 'estimated_experience'
+]
+
+# Behavioral keyword categories, compiled once at import time
+ENGINE_KEYWORDS = KeywordIndex({
+    'urgency': dict.fromkeys(['urgent', 'immediately', 'now', 'quickly', 'hurry', 'emergency'], 1),
+    'financial': dict.fromkeys(['money', 'payment', 'card', 'account', 'bank', 'transfer', 'fee'], 1),
+    'tech': dict.fromkeys(['computer', 'virus', 'security', 'microsoft', 'windows', 'error'], 1),
+    'authority': dict.fromkeys(['police', 'government', 'irs', 'social security', 'federal', 'arrest'], 1)
+})
+
+
 class SophisticatedEngine:
     """Advanced AI engine for realistic scammer engagement"""
     
-    def __init__(self):
-        self.conversation_history = []
+    # Strategy library is read-only, so every per-conversation engine shares one copy
+    _shared_strategies: Optional[Dict] = None
+    
+    # Openers prefixed to 30% of responses; voice calls also play them as fillers while a turn computes
+    variations = [
+        "Oh my...",
+        "Well, you see...",
+        "I'm sorry, but...",
+        "Let me think about this...",
+        "That's interesting...",
+    ]
+    
+    # Process-wide window of the most recent interactions across all conversations.
+    # Older turns only live in the persistent log (CSV or SQLite), written at log time.
+    analytics_data: deque = deque(maxlen=int(os.environ.get('RECENT_INTERACTIONS_LIMIT', 1000)))
+    
+    def __init__(self, conversation_id: Optional[str] = None, store=None, history_limit: int = 50):
+        self.conversation_id = conversation_id
+        self.store = store  # optional SQLiteAnalyticsStore; turns go to CSV when None
+        self.history_limit = history_limit
+        self.conversation_history = deque(maxlen=history_limit)  # last N turns only
+        self.turn_count = 0
         self.scammer_profile = {
             'frustration_level': 0,
             'persistence_score': 0,
             'technique_type': 'unknown',
             'estimated_experience': 'novice'
         }
-        self.analytics_data = []
-        self.response_strategies = self._load_strategies()
+        if SophisticatedEngine._shared_strategies is None:
+            SophisticatedEngine._shared_strategies = self._load_strategies()
+        self.response_strategies = SophisticatedEngine._shared_strategies
         
     def _load_strategies(self) -> Dict:
         """Load response strategies based on scammer behavior"""
@@ -64,31 +107,25 @@ class SophisticatedEngine:
             ]
         }
     
-    def analyze_scammer_input(self, message: str) -> Dict:
+    @classmethod
+    def strategy_responses(cls) -> List[str]:
+        """Every response the strategies can produce, with and without a variation (for pre-rendering)"""
+        if cls._shared_strategies is None:
+            cls()  # the first engine loads the shared strategy library
+        base = [line for lines in cls._shared_strategies.values() for line in lines]
+        return base + [f"{variation} {line}" for variation in cls.variations for line in base]
+    
+    def analyze_scammer_input(self, message: str, scores: Optional[Dict] = None) -> Dict:
         """Analyze scammer message for behavioral patterns"""
-        message_lower = message.lower()
-        
-        # Detect urgency indicators
-        urgency_keywords = ['urgent', 'immediately', 'now', 'quickly', 'hurry', 'emergency']
-        urgency_score = sum(1 for word in urgency_keywords if word in message_lower)
-        
-        # Detect financial requests
-        financial_keywords = ['money', 'payment', 'card', 'account', 'bank', 'transfer', 'fee']
-        financial_score = sum(1 for word in financial_keywords if word in message_lower)
-        
-        # Detect tech support angle
-        tech_keywords = ['computer', 'virus', 'security', 'microsoft', 'windows', 'error']
-        tech_score = sum(1 for word in tech_keywords if word in message_lower)
-        
-        # Detect authority claims
-        authority_keywords = ['police', 'government', 'irs', 'social security', 'federal', 'arrest']
-        authority_score = sum(1 for word in authority_keywords if word in message_lower)
+        # Score every keyword category in one pass over the message
+        if scores is None:
+            scores = ENGINE_KEYWORDS.score(message)
         
         analysis = {
-            'urgency_score': urgency_score,
-            'financial_score': financial_score,
-            'tech_score': tech_score,
-            'authority_score': authority_score,
+            'urgency_score': scores['urgency'],
+            'financial_score': scores['financial'],
+            'tech_score': scores['tech'],
+            'authority_score': scores['authority'],
             'message_length': len(message),
             'timestamp': datetime.now().isoformat()
         }
@@ -118,25 +155,78 @@ class SophisticatedEngine:
         elif analysis['urgency_score'] > 3:
             self.scammer_profile['estimated_experience'] = 'desperate'
     
-    def generate_response(self, scammer_message: str) -> Tuple[str, Dict]:
-        """Generate contextually appropriate response"""
-        analysis = self.analyze_scammer_input(scammer_message)
+    def generate_response(self, scammer_message: str, scores: Optional[Dict] = None,
+                          opener: bool = True) -> Tuple[str, Dict]:
+        """Generate contextually appropriate response (``opener=False`` when a filler was already spoken)"""
+        with span('analyze_scammer_input'):
+            analysis = self.analyze_scammer_input(scammer_message, scores)
         
         # Choose strategy based on conversation stage and scammer behavior
-        strategy = self._choose_strategy(analysis)
+        with span('choose_strategy'):
+            strategy = self._choose_strategy(analysis)
         
         # Generate response with natural delays and variations
-        response = self._craft_response(strategy, analysis)
+        with span('craft_response'):
+            response = self._craft_response(strategy, analysis, opener)
         
         # Log interaction for analytics
-        self._log_interaction(scammer_message, response, analysis)
+        with span('log_interaction'):
+            self._log_interaction(scammer_message, response, analysis)
         
         return response, analysis
     
+    def take_turn(self, scammer_message: str, scores: Optional[Dict] = None, opener: bool = True) -> Dict:
+        """Run one conversation turn and capture the state the API reports back"""
+        start_time = time.time()
+        response, analysis = self.generate_response(scammer_message, scores, opener)
+        response_time = time.time() - start_time
+        get_latency_recorder().record('engine_turn', self.scammer_profile.get('technique_type'), response_time)
+        
+        return {
+            'response': response,
+            'analysis': analysis,
+            'summary': self.get_conversation_summary(),
+            'total_turns': self.turn_count,
+            'scammer_profile': dict(self.scammer_profile),
+            'response_time': response_time
+        }
+    
+    @classmethod
+    def generate_batch(cls, items: List[Tuple[str, str]], sessions, admission=None) -> List[Dict]:
+        """Run one turn for each (conversation_id, message) pair
+        
+        Keyword scoring is done for the whole batch up front, once per
+        distinct message; each turn then runs on its own conversation's
+        engine from ``sessions`` (a SessionManager), in order.  With an
+        ``admission`` controller every turn holds a slot while it runs; a
+        turn that is shed comes back as ``{'conversation_id', 'shed': reason}``
+        without touching its conversation.
+        """
+        batch_scores = ENGINE_KEYWORDS.score_many(message for _, message in items)
+        
+        turns = []
+        for (conversation_id, message), scores in zip(items, batch_scores):
+            if admission is None:
+                turn = cls._batch_turn(sessions, conversation_id, message, scores)
+            else:
+                with admission.slot() as outcome:
+                    if outcome == ADMITTED:
+                        turn = cls._batch_turn(sessions, conversation_id, message, scores)
+                    else:
+                        turn = {'shed': outcome}
+            turn['conversation_id'] = conversation_id
+            turns.append(turn)
+        return turns
+    
+    @staticmethod
+    def _batch_turn(sessions, conversation_id: str, message: str, scores: Dict) -> Dict:
+        with sessions.session(conversation_id) as engine:
+            return engine.take_turn(message, scores)
+    
     def _choose_strategy(self, analysis: Dict) -> str:
         """Choose optimal response strategy"""
         frustration = self.scammer_profile['frustration_level']
-        conversation_length = len(self.conversation_history)
+        conversation_length = self.turn_count
         
         # Early conversation - build trust with confusion
         if conversation_length < 3:
@@ -160,22 +250,14 @@ class SophisticatedEngine:
             strategies = ['confusion', 'tech_confusion', 'financial_stalling', 'family_distractions']
             return random.choice(strategies)
     
-    def _craft_response(self, strategy: str, analysis: Dict) -> str:
+    def _craft_response(self, strategy: str, analysis: Dict, opener: bool = True) -> str:
         """Craft natural-sounding response with variations"""
         base_responses = self.response_strategies.get(strategy, self.response_strategies['confusion'])
         base_response = random.choice(base_responses)
         
         # Add natural variations
-        variations = [
-            "Oh my...",
-            "Well, you see...",
-            "I'm sorry, but...",
-            "Let me think about this...",
-            "That's interesting...",
-        ]
-        
-        if random.random() < 0.3:  # 30% chance to add variation
-            variation = random.choice(variations)
+        if opener and random.random() < 0.3:  # 30% chance to add variation
+            variation = random.choice(self.variations)
             base_response = f"{variation} {base_response}"
         
         return base_response
@@ -188,57 +270,46 @@ class SophisticatedEngine:
             'bot_response': bot_response,
             'analysis': analysis,
             'scammer_profile': self.scammer_profile.copy(),
-            'conversation_turn': len(self.conversation_history)
+            'conversation_turn': self.turn_count
         }
         
+        self.turn_count += 1
         self.conversation_history.append(interaction)
         self.analytics_data.append(interaction)
         
-        # Save to CSV for analysis
-        self._save_to_csv(interaction)
+        # Persist for analysis
+        if self.store is not None:
+            with span('store_interaction'):
+                self.store.add_interaction(self.conversation_id, interaction)
+        else:
+            with span('save_to_csv'):
+                self._save_to_csv(interaction)
     
     def _save_to_csv(self, interaction: Dict):
-        """Save interaction data to CSV file"""
-        csv_file = os.path.join('data', 'analytics', 'conversations.csv')
-        os.makedirs(os.path.dirname(csv_file), exist_ok=True)
+        """Queue interaction data for the background CSV writer"""
+        writer = get_log_writer()
+        csv_file = os.path.join('data', 'analytics', 'interactions.csv')
         
-        # Check if file exists to determine if we need headers
-        file_exists = os.path.exists(csv_file)
-        
-        with open(csv_file, 'a', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            
-            if not file_exists:
-                # Write headers
-                headers = [
-                    'timestamp', 'conversation_turn', 'scammer_message_length',
-                    'bot_response', 'urgency_score', 'financial_score', 'tech_score',
-                    'authority_score', 'frustration_level', 'technique_type', 'estimated_experience'
-                ]
-                writer.writerow(headers)
-            
-            # Write data
-            row = [
-                interaction['timestamp'],
-                interaction['conversation_turn'],
-                len(interaction['scammer_message']),
-                interaction['bot_response'],
-                interaction['analysis']['urgency_score'],
-                interaction['analysis']['financial_score'],
-                interaction['analysis']['tech_score'],
-                interaction['analysis']['authority_score'],
-                interaction['scammer_profile']['frustration_level'],
-                interaction['scammer_profile']['technique_type'],
-                interaction['scammer_profile']['estimated_experience']
-            ]
-            writer.writerow(row)
+        writer.submit(writer.csv_sink(csv_file, INTERACTION_CSV_HEADERS), {
+            'timestamp': interaction['timestamp'],
+            'conversation_turn': interaction['conversation_turn'],
+            'scammer_message_length': len(interaction['scammer_message']),
+            'bot_response': interaction['bot_response'],
+            'urgency_score': interaction['analysis']['urgency_score'],
+            'financial_score': interaction['analysis']['financial_score'],
+            'tech_score': interaction['analysis']['tech_score'],
+            'authority_score': interaction['analysis']['authority_score'],
+            'frustration_level': interaction['scammer_profile']['frustration_level'],
+            'technique_type': interaction['scammer_profile']['technique_type'],
+            'estimated_experience': interaction['scammer_profile']['estimated_experience']
+        })
     
     def get_conversation_summary(self) -> Dict:
         """Get detailed conversation analytics"""
-        if not self.conversation_history:
+        if not self.turn_count:
             return {'status': 'no_conversation'}
         
-        total_turns = len(self.conversation_history)
+        total_turns = self.turn_count
         avg_response_time = 2.5  # Simulated for demo
         
         return {
@@ -253,7 +324,8 @@ class SophisticatedEngine:
     
     def reset_conversation(self):
         """Reset for new conversation"""
-        self.conversation_history = []
+        self.conversation_history = deque(maxlen=self.history_limit)
+        self.turn_count = 0
         self.scammer_profile = {
             'frustration_level': 0,
             'persistence_score': 0,
@@ -261,6 +333,126 @@ class SophisticatedEngine:
             'estimated_experience': 'novice'
         }
 
+    def export_state(self) -> Dict:
+        """JSON-serializable conversation state, for sharing a session across workers"""
+        return {
+            'turn_count': self.turn_count,
+            'scammer_profile': dict(self.scammer_profile),
+            'conversation_history': list(self.conversation_history)
+        }
+
+    def restore_state(self, state: Dict):
+        """Replace this engine's conversation state with an ``export_state()`` snapshot"""
+        self.turn_count = state.get('turn_count', 0)
+        self.scammer_profile = dict(state.get('scammer_profile', self.scammer_profile))
+        self.conversation_history = deque(state.get('conversation_history', ()), maxlen=self.history_limit)
+
+
+class ScammerAnalyzer:
+    """Weighted scam-pattern scoring with threshold flags"""
+    
+    def __init__(self):
+        self.urgency_keywords = {
+            'final notice': 4, 'urgent': 3, 'immediately': 3, 'right now': 3, 'emergency': 3,
+            'asap': 3, 'deadline': 3, 'act fast': 3, 'hurry': 2, 'quickly': 2, 'expire': 2,
+            'limited time': 2, 'now': 1, 'today': 1
+        }
+        self.authority_keywords = {
+            'irs': 4, 'fbi': 4, 'police': 3, 'federal': 3, 'social security': 3, 'warrant': 3,
+            'court': 3, 'sheriff': 3, 'legal action': 3, 'government': 2, 'agent': 2,
+            'officer': 2, 'department': 2, 'microsoft': 2
+        }
+        self.payment_keywords = {
+            'gift card': 4, 'bitcoin': 4, 'wire transfer': 4, 'western union': 4, 'moneygram': 4,
+            'itunes': 3, 'google play': 3, 'send money': 3, 'payment': 2, 'pay': 2, 'cash': 2,
+            'transfer': 2, 'fee': 2, 'card': 1, 'bank': 1, 'target': 1, 'walmart': 1
+        }
+        self.info_keywords = {
+            'social security number': 5, 'ssn': 5, 'password': 4, 'account number': 4, 'pin': 4,
+            'routing number': 4, "mother's maiden name": 4, 'remote access': 4, 'credit card': 3,
+            'bank account': 3, 'date of birth': 3, 'verify': 2, 'confirm': 1
+        }
+        self.frustration_keywords = {
+            'damn': 3, 'stupid': 3, 'idiot': 3, 'shut up': 3, 'are you deaf': 3, 'useless': 3,
+            'wasting my time': 3, 'listen': 2, 'why are you': 2, 'hell': 2
+        }
+        self.escalation_keywords = {
+            'you will be arrested': 5, 'final warning': 4, 'last chance': 4, 'stop wasting time': 4,
+            'consequences': 3, 'this is serious': 3, 'no more excuses': 3
+        }
+        self.threat_keywords = {
+            'arrest': 2, 'jail': 2, 'prison': 2, 'warrant': 2, 'lawsuit': 2, 'deport': 2, 'police': 1
+        }
+        self.command_keywords = dict.fromkeys(
+            ['go', 'buy', 'get', 'send', 'give', 'tell', 'press', 'type', 'click', 'open', 'download'], 1)
+        
+        self.thresholds = {
+            'high_urgency': 8,
+            'authority_claim': 6,
+            'payment_scam': 8,
+            'info_phishing': 8,
+            'highly_frustrated': 1.5,
+            'escalating': 5,
+            'threatening': 4
+        }
+        
+        self.keyword_index = KeywordIndex({
+            'urgency': self.urgency_keywords,
+            'authority': self.authority_keywords,
+            'payment': self.payment_keywords,
+            'info': self.info_keywords,
+            'frustration': self.frustration_keywords,
+            'escalation': self.escalation_keywords,
+            'threat': self.threat_keywords,
+            'command': self.command_keywords
+        })
+    
+    def analyze_scammer_input(self, message: str) -> Dict:
+        """Score a message on every scam dimension and flag crossed thresholds"""
+        scores = self.keyword_index.score(message)
+        
+        # Supporting factors that raise frustration without any keyword
+        letters = [c for c in message if c.isalpha()]
+        caps_ratio = sum(1 for c in letters if c.isupper()) / len(letters) if letters else 0.0
+        exclamations = message.count('!')
+        all_caps_words = sum(1 for word in message.split() if len(word) > 1 and word.isalpha() and word.isupper())
+        
+        frustration_level = (
+            scores['frustration'] / 4
+            + caps_ratio
+            + min(exclamations, 5) * 0.1
+            + min(all_caps_words, 5) * 0.1
+        )
+        
+        analysis = {
+            'urgency_score': scores['urgency'],
+            'authority_score': scores['authority'],
+            'payment_score': scores['payment'],
+            'info_score': scores['info'],
+            'escalation_score': scores['escalation'],
+            'threat_score': scores['threat'],
+            'command_count': scores['command'],
+            'question_count': message.count('?'),
+            'caps_ratio': round(caps_ratio, 3),
+            'exclamation_count': exclamations,
+            'all_caps_words': all_caps_words,
+            'frustration_level': frustration_level
+        }
+        analysis['total_suspicion'] = (
+            scores['urgency'] + scores['authority'] + scores['payment'] + scores['info']
+            + scores['escalation'] + scores['threat'] + round(frustration_level)
+        )
+        
+        analysis['is_high_urgency'] = scores['urgency'] >= self.thresholds['high_urgency']
+        analysis['is_authority_claim'] = scores['authority'] >= self.thresholds['authority_claim']
+        analysis['is_payment_scam'] = scores['payment'] >= self.thresholds['payment_scam']
+        analysis['is_info_phishing'] = scores['info'] >= self.thresholds['info_phishing']
+        analysis['is_highly_frustrated'] = frustration_level >= self.thresholds['highly_frustrated']
+        analysis['is_escalating'] = scores['escalation'] >= self.thresholds['escalating']
+        analysis['is_threatening'] = scores['threat'] >= self.thresholds['threatening']
+        
+        return analysis
+
 
 # Example usage and testing
 if __name__ == "__main__":
@@ -2,7 +2,7 @@
 Advanced Flask Application for Scammer Waste Bot
 Production-ready with integrated frontend and full API
 """
-from flask import Flask, request, jsonify, render_template_string, send_from_directory, send_file
+from flask import Flask, g, request, jsonify, render_template_string, send_from_directory, send_file
 from flask_cors import CORS
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
@@ -10,7 +10,7 @@ from werkzeug.middleware.proxy_fix import ProxyFix
 import os
 import time
 import json
-import sqlite3
+import random
 import threading
 from datetime import datetime
 from typing import Dict, Any
@@ -18,85 +18,175 @@ from typing import Dict, Any
 # Import our advanced AI components
 from ai.sophisticated_engine import SophisticatedEngine
 from ai.enhanced_responses import EnhancedResponses
+from ai.session_manager import SessionConflictError, SessionManager
 from data.analytics_dashboard import AnalyticsDashboard
-from static_routes import static_bp
+from data.stats_cache import StatsCache
+from static_routes import StaticAssetIndex, serve_static, static_bp
+from twilio_handler import VoiceCallHandler, voice_bp
+from utils.admission import ADMITTED, AdmissionController
+from utils.latency_sketch import get_latency_recorder
+from utils.lazy import LazyObject
+from utils.log_writer import get_log_writer
+from utils.metrics import ROUTE_ENVIRON_KEY, MetricsRegistry, RequestMetricsMiddleware
+from utils.stats_broadcaster import StatsBroadcaster
+from utils.tracing import RequestProfiler, TraceSampler, end_trace, span, start_trace
 
 app = Flask(__name__, static_folder='../data/static', static_url_path='/')
 app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1, x_prefix=1)
+metrics = MetricsRegistry(namespace='scammer_waste')
+app.wsgi_app = RequestMetricsMiddleware(app.wsgi_app, metrics)
 CORS(app, origins=['*'])  # Allow all origins for production flexibility
 
 # Register static file routes
 # app.register_blueprint(static_bp)  # Commented out to avoid conflicts
 
+# Rate-limit counters and conversation sessions shared by every worker process (SQLite, WAL)
+SHARED_STATE_PATH = os.environ.get('SHARED_STATE_PATH')
+if SHARED_STATE_PATH:
+    from data.shared_state import SharedStateStore  # also registers the sqlite:// limiter storage
+    SHARED_STATE_PATH = os.path.abspath(SHARED_STATE_PATH)
+    shared_state = SharedStateStore(SHARED_STATE_PATH)
+else:
+    shared_state = None
+RATELIMIT_STORAGE_URI = os.environ.get(
+    'RATELIMIT_STORAGE_URI', f"sqlite:///{SHARED_STATE_PATH}" if SHARED_STATE_PATH else 'memory://'
+)
+
 # Rate limiting with more production-friendly limits
 limiter = Limiter(
     key_func=get_remote_address,
     app=app,
-    default_limits=["1000 per day", "100 per hour", "10 per minute"]
+    default_limits=["1000 per day", "100 per hour", "10 per minute"],
+    storage_uri=RATELIMIT_STORAGE_URI
 )
 
-# Initialize production database
+# Production database (opened on first use)
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.environ.get('DATABASE_PATH', os.path.join(PROJECT_ROOT, 'data', 'scammer_waste.db'))
+ANALYTICS_BACKEND = os.environ.get('ANALYTICS_BACKEND', 'csv')
+
 def init_production_db():
     """Initialize production database with proper tables"""
-    conn = sqlite3.connect('/workspaces/waste-time/data/scammer_waste.db')
-    cursor = conn.cursor()
-    
-    # Create conversations table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS conversations (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            scammer_id TEXT UNIQUE,
-            start_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            last_update TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            message_count INTEGER DEFAULT 0,
-            time_wasted INTEGER DEFAULT 0,
-            personality TEXT DEFAULT 'confused_grandpa',
-            frustration_level INTEGER DEFAULT 0,
-            success_score REAL DEFAULT 0.0,
-            status TEXT DEFAULT 'active'
-        )
-    ''')
-    
-    # Create messages table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS messages (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            conversation_id TEXT,
-            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            message_type TEXT,
-            content TEXT,
-            response_time REAL,
-            ai_confidence REAL
-        )
-    ''')
-    
-    # Create analytics table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS analytics (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            date TEXT,
-            total_conversations INTEGER,
-            time_wasted INTEGER,
-            success_rate REAL,
-            top_strategies TEXT,
-            geographic_data TEXT
-        )
-    ''')
-    
-    conn.commit()
-    conn.close()
+    from data.sqlite_store import SQLiteAnalyticsStore
+    return SQLiteAnalyticsStore(DB_PATH)
+
+analytics_store = LazyObject(init_production_db)
+
+# Frontend build, indexed on the first static request; each variant is compressed on first use
+STATIC_DIR = os.environ.get('STATIC_DIR', os.path.join(PROJECT_ROOT, 'data', 'static'))
+static_assets = LazyObject(lambda: StaticAssetIndex(STATIC_DIR), 'static_assets')
+app.extensions['static_assets'] = static_assets
 
-# Initialize database
-init_production_db()
+# Analytics and turn logs go to the database with ANALYTICS_BACKEND=sqlite, to CSV otherwise
+storage_backend = analytics_store if ANALYTICS_BACKEND == 'sqlite' else None
 
-# Initialize AI components
-ai_engine = SophisticatedEngine()
-response_library = EnhancedResponses()
-analytics = AnalyticsDashboard()
+# AI components - one engine state per conversation; built on first use so workers start fast
+sessions = LazyObject(lambda: SessionManager(
+    max_sessions=int(os.environ.get('MAX_SESSIONS', 10000)),
+    idle_ttl_seconds=float(os.environ.get('SESSION_IDLE_TTL_SECONDS', 1800)),
+    sweep_interval=float(os.environ.get('SESSION_SWEEP_INTERVAL_SECONDS', 60)),
+    stripes=int(os.environ.get('SESSION_LOCK_STRIPES', 64)),
+    engine_factory=lambda conversation_id: SophisticatedEngine(
+        conversation_id,
+        store=storage_backend,
+        history_limit=int(os.environ.get('CONVERSATION_HISTORY_LIMIT', 50))
+    ),
+    shared_store=shared_state
+), 'sessions')
+response_library = LazyObject(EnhancedResponses, 'response_library')
+analytics = LazyObject(lambda: AnalyticsDashboard(store=storage_backend), 'analytics')
+stats_cache = StatsCache(serialize=app.json.dumps)
+
+def current_stats() -> Dict[str, Any]:
+    """Conversation stats, recomputed only after new conversations are logged"""
+    return stats_cache.get('stats', analytics.version(), analytics.get_aggregate_stats).payload
+
+live_stats_hub = StatsBroadcaster(
+    current_stats,
+    interval=float(os.environ.get('LIVE_STATS_INTERVAL_SECONDS', 5)),
+    heartbeat_interval=float(os.environ.get('LIVE_STATS_HEARTBEAT_SECONDS', 15))
+)
+
+# Internal gauges, read when /api/metrics is scraped
+latency_recorder = get_latency_recorder()
+metrics.gauge('active_sessions', 'Conversation sessions held in memory', callback=lambda: len(sessions))
+metrics.gauge('log_writer_queue_depth', 'Records waiting for the background log writer',
+              callback=lambda: get_log_writer().queue_depth())
+metrics.gauge('log_writer_records', 'Log writer record counters', ('state',),
+              callback=lambda: {(state,): get_log_writer().stats[state]
+                                for state in ('enqueued', 'written', 'dropped', 'blocked')})
+metrics.gauge('log_writer_last_batch_seconds', 'Duration of the last group commit',
+              callback=lambda: get_log_writer().stats['last_batch_seconds'])
+metrics.gauge('stats_cache_hit_ratio', 'Share of stats reads served from the cache',
+              callback=lambda: stats_cache.hit_ratio())
+metrics.gauge('sse_subscribers', 'Connected /api/live-stats clients',
+              callback=lambda: live_stats_hub.subscriber_count)
+metrics.sketch_summary('engine_turn_seconds', 'Engine time per conversation turn by technique',
+                       latency_recorder, 'engine_turn', 'technique')
+metrics.sketch_summary('request_seconds', 'End-to-end request latency by endpoint',
+                       latency_recorder, 'request', 'endpoint')
+metrics.sketch_summary('log_write_seconds', 'CSV / database write latency per sink batch',
+                       latency_recorder, 'log_write', 'sink')
 
 # Configuration
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-key-change-in-production')
 API_KEY = os.environ.get('SCAMMER_WASTE_API_KEY', 'scammer-waste-api-key-2025')
+MAX_BATCH_SIZE = int(os.environ.get('MAX_CHAT_BATCH_SIZE', 100))
+
+# Per-turn span tracing (always with the debug header, sampled otherwise) and opt-in profiling
+TRACE_HEADER = 'X-Debug-Trace'
+trace_sampler = TraceSampler(
+    os.environ.get('TRACE_FILE', os.path.join('data', 'traces', 'chat_turns.jsonl')),
+    sample_rate=float(os.environ.get('TRACE_SAMPLE_RATE', 0.01))
+)
+profiler = RequestProfiler(os.environ.get('PROFILE_DIR', os.path.join('data', 'profiles')))
+
+# Admission control for /api/chat and each /api/chat/batch item: overflow beyond the wait queue
+# gets a canned stall instead of a slow turn
+admission = AdmissionController(
+    max_concurrent=int(os.environ.get('CHAT_MAX_CONCURRENT', 8)),
+    max_queue=int(os.environ.get('CHAT_ADMISSION_QUEUE', 16)),
+    queue_timeout=float(os.environ.get('CHAT_ADMISSION_TIMEOUT_MS', 100)) / 1000
+)
+STALL_CATEGORIES = ('time_wasting', 'memory_issues')
+chat_admissions = metrics.counter('chat_admissions_total', 'Chat turns by admission outcome', ('outcome',))
+metrics.gauge('chat_in_flight', 'Chat turns holding an engine slot', callback=lambda: admission.in_flight)
+metrics.gauge('chat_waiting', 'Chat turns waiting for an engine slot', callback=lambda: admission.waiting)
+
+# Pre-rendered speech (TTS_SYNTHESIZER=stub or module:Class); cached clips are played instead of <Say>
+TWILIO_VOICE = os.environ.get('TWILIO_VOICE', 'Polly.Joanna')
+if os.environ.get('TTS_SYNTHESIZER'):
+    from utils.audio_utils import get_audio_cache
+    app.extensions['audio_cache'] = get_audio_cache()
+
+def cached_audio_url(text: str):
+    """<Play> URL for text already in the TTS cache (None falls back to <Say>)"""
+    key = app.extensions['audio_cache'].cached_key(text)
+    return f"/voice/audio/{key}.wav" if key else None
+
+# Twilio voice webhooks (/voice, /voice/gather); calls share the chat session table and admission control.
+# With VOICE_STREAM_URL set, calls are answered with a media stream to the asyncio call server instead
+voice_calls = LazyObject(lambda: VoiceCallHandler(
+    sessions, response_library,
+    admission=admission,
+    on_turn=lambda call_sid, turn: analytics.log_conversation(_turn_analytics_event(call_sid, turn)),
+    audio_resolver=cached_audio_url if 'audio_cache' in app.extensions else None,
+    voice=TWILIO_VOICE,
+    auth_token=os.environ.get('TWILIO_AUTH_TOKEN'),
+    stream_url=os.environ.get('VOICE_STREAM_URL'),  # wss://.../voice/stream on the call server (call_server.py)
+    idle_ttl_seconds=float(os.environ.get('CALL_IDLE_TTL_SECONDS', 3600)),
+    # Two-phase turns: an engine opener plays at once while the reply computes (VOICE_FILLERS=0 to disable)
+    fillers=SophisticatedEngine.variations if os.environ.get('VOICE_FILLERS', '1') != '0' else ()
+), 'voice_calls')
+app.extensions['twilio_voice'] = voice_calls
+app.register_blueprint(voice_bp)
+limiter.exempt(voice_bp)  # Twilio posts every call from a handful of addresses
+metrics.gauge('active_calls', 'Voice calls with live state', callback=lambda: len(voice_calls) if voice_calls.resolved else 0)
+metrics.gauge('voice_filler_turns', 'Voice turns opened with a filler, by whether it covered the compute time',
+              ('transport', 'outcome'),
+              callback=lambda: dict(voice_calls.filler_coverage.counts) if voice_calls.resolved else {})
+metrics.sketch_summary('voice_filler_gap_seconds', 'Silence between the filler ending and the reply',
+                       latency_recorder, 'filler_gap', 'transport')
 
 def require_api_key(f):
     """Decorator to require API key for protected endpoints"""
@@ -108,33 +198,61 @@ def require_api_key(f):
     decorated_function.__name__ = f.__name__
     return decorated_function
 
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    request.environ[ROUTE_ENVIRON_KEY] = request.url_rule.rule if request.url_rule else 'unmatched'
+    g.profile = profiler.start()
+
+@app.teardown_request
+def stop_request_profile(error=None):
+    profile = g.pop('profile', None)
+    if profile is not None:
+        profiler.stop(profile)
+
+@app.after_request
+def record_request_latency(response):
+    """End-to-end latency per endpoint, into the shared quantile sketches"""
+    started = g.pop('request_started', None)
+    if started is not None:
+        latency_recorder.record('request', request.endpoint or 'unmatched', time.perf_counter() - started)
+    return response
+
+def cached_json(key: str, compute):
+    """JSON response served from the stats cache with ETag / 304 revalidation"""
+    version = analytics.version()
+    
+    # A matching validator means nothing is recomputed or re-serialized
+    entry = stats_cache.peek(key, version)
+    if entry is not None and request.if_none_match.contains(entry.etag):
+        stats_cache.record_not_modified()
+        response = app.response_class(status=304)
+    else:
+        entry = stats_cache.get(key, version, compute)
+        if request.if_none_match.contains(entry.etag):
+            stats_cache.record_not_modified()
+            response = app.response_class(status=304)
+        else:
+            response = app.response_class(entry.body, mimetype='application/json')
+    
+    response.set_etag(entry.etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
 @app.route('/')
 def dashboard():
     """Serve the main dashboard frontend"""
-    return send_from_directory('/workspaces/waste-time/data/static', 'index.html')
+    return serve_static('index.html')
 
 @app.route('/assets/<path:filename>')
 def serve_assets(filename):
-    """Serve React build assets"""
-    response = send_from_directory('/workspaces/waste-time/data/static/assets', filename)
-    
-    # Set proper MIME types for assets
-    if filename.endswith('.js'):
-        response.headers['Content-Type'] = 'application/javascript'
-    elif filename.endswith('.css'):
-        response.headers['Content-Type'] = 'text/css'
-    elif filename.endswith('.map'):
-        response.headers['Content-Type'] = 'application/json'
-    
-    # Enable caching for assets
-    response.headers['Cache-Control'] = 'public, max-age=31536000'  # 1 year
-    
-    return response
+    """Serve React build assets (hashed names, cached as immutable)"""
+    return serve_static(f"assets/{filename}")
 
 @app.route('/favicon.ico')
 def favicon():
     """Serve favicon"""
-    return send_from_directory('/workspaces/waste-time/data/static', 'favicon.ico')
+    return serve_static('favicon.ico')
 
 @app.route('/api/health')
 def health_check():
@@ -170,11 +288,65 @@ def get_config():
 def get_stats():
     """Get real-time analytics and statistics (public endpoint for frontend)"""
     try:
-        stats = analytics.get_real_time_stats()
-        return jsonify(stats)
+        # Cached conversation stats plus live latency percentiles, so no ETag here
+        return jsonify(analytics.get_real_time_stats(current_stats()))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _turn_analytics_event(conversation_id: str, turn: Dict[str, Any]) -> Dict[str, Any]:
+    """Analytics row for one engine turn"""
+    total_turns = turn['total_turns']
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'conversation_id': conversation_id,
+        'duration_minutes': turn['summary'].get('time_wasted_minutes', 0),
+        'technique_type': turn['scammer_profile'].get('technique_type', 'unknown'),
+        'success_rating': min(10, max(1, total_turns)),
+        'conversation_turn': total_turns,
+        'scammer_frustration_level': turn['scammer_profile'].get('frustration_level', 0),
+        'response_time_seconds': turn['response_time']
+    }
+
+def _turn_payload(conversation_id: str, turn: Dict[str, Any]) -> Dict[str, Any]:
+    """Chat API response body for one engine turn"""
+    analysis = turn['analysis']
+    scammer_profile = turn['scammer_profile']
+    conversation_summary = turn['summary']
+    return {
+        'response': turn['response'],
+        'conversation_id': conversation_id,
+        'analysis': {
+            'urgency_score': analysis.get('urgency_score', 0),
+            'financial_score': analysis.get('financial_score', 0),
+            'tech_score': analysis.get('tech_score', 0),
+            'authority_score': analysis.get('authority_score', 0),
+            'technique_detected': scammer_profile.get('technique_type', 'unknown'),
+            'frustration_level': scammer_profile.get('frustration_level', 0)
+        },
+        'conversation_stats': {
+            'total_turns': turn['total_turns'],
+            'time_wasted_minutes': conversation_summary.get('time_wasted_minutes', 0),
+            'effectiveness_score': conversation_summary.get('effectiveness_score', 0)
+        },
+        'metadata': {
+            'response_time_ms': round(turn['response_time'] * 1000, 2),
+            'timestamp': datetime.now().isoformat(),
+            'api_version': '2.0.0'
+        }
+    }
+
+def _shed_payload(conversation_id: str, reason: str) -> Dict[str, Any]:
+    """Canned stalling reply for a turn rejected by admission control (conversation state untouched)"""
+    return {
+        'response': response_library.get_random_response(random.choice(STALL_CATEGORIES)),
+        'conversation_id': conversation_id,
+        'metadata': {
+            'shed': reason,
+            'timestamp': datetime.now().isoformat(),
+            'api_version': '2.0.0'
+        }
+    }
+
 @app.route('/api/chat', methods=['POST'])
 @limiter.limit("30 per minute")
 def chat_with_bot():
@@ -186,52 +358,98 @@ def chat_with_bot():
             return jsonify({'error': 'Message is required'}), 400
         
         scammer_message = data['message']
-        conversation_id = data.get('conversation_id', f"conv_{int(time.time())}")
+        if not isinstance(scammer_message, str):
+            return jsonify({'error': 'message must be a string'}), 400
+        conversation_id = str(data.get('conversation_id') or f"conv_{int(time.time())}")
+        debug_trace = request.headers.get(TRACE_HEADER, '').lower() in ('1', 'true')
+        trace = start_trace('/api/chat') if debug_trace or trace_sampler.should_sample() else None
+        
+        try:
+            with admission.slot() as outcome:
+                chat_admissions.inc(outcome)
+                if outcome != ADMITTED:
+                    response = jsonify(_shed_payload(conversation_id, outcome))
+                    response.headers['X-Load-Shed'] = outcome
+                    return response
+                
+                # Generate AI response on this conversation's own engine state
+                with sessions.session(conversation_id) as ai_engine:
+                    turn = ai_engine.take_turn(scammer_message)
+            
+            # Log for analytics
+            with span('analytics.log_conversation'):
+                analytics.log_conversation(_turn_analytics_event(conversation_id, turn))
+            
+            response_data = _turn_payload(conversation_id, turn)
+            
+            with span('json_serialize'):
+                body = app.json.dumps(response_data)
+        finally:
+            if trace is not None:
+                end_trace()
+        
+        if trace is not None:
+            trace_sampler.record(trace)
+            if debug_trace:
+                response_data['metadata']['spans'] = trace.spans
+                body = app.json.dumps(response_data)
+        
+        return app.response_class(body, mimetype='application/json')
+        
+    except SessionConflictError:
+        return jsonify({'error': 'Conversation was updated by another request, please retry'}), 409
+    except Exception as e:
+        return jsonify({'error': f'Internal server error: {str(e)}'}), 500
+
+@app.route('/api/chat/batch', methods=['POST'])
+@limiter.limit("60 per minute")
+def chat_batch():
+    """Run one turn for each {conversation_id, message} item in a single request"""
+    try:
+        data = request.get_json()
+        items = data.get('items') if isinstance(data, dict) else None
+        
+        if not isinstance(items, list) or not items:
+            return jsonify({'error': 'items must be a non-empty list'}), 400
+        if len(items) > MAX_BATCH_SIZE:
+            return jsonify({'error': f'At most {MAX_BATCH_SIZE} items per batch'}), 400
+        
+        pairs = []
+        for index, item in enumerate(items):
+            if not isinstance(item, dict) or not isinstance(item.get('message'), str):
+                return jsonify({'error': f'Item {index}: message is required'}), 400
+            conversation_id = str(item.get('conversation_id') or f"conv_{int(time.time())}_{index}")
+            pairs.append((conversation_id, item['message']))
         
-        # Generate AI response
         start_time = time.time()
-        bot_response, analysis = ai_engine.generate_response(scammer_message)
-        response_time = time.time() - start_time
+        # Each item takes its own engine slot, so a batch is admitted like that many /api/chat calls
+        turns = SophisticatedEngine.generate_batch(pairs, sessions, admission=admission)
         
-        # Get conversation summary
-        conversation_summary = ai_engine.get_conversation_summary()
+        results, completed, shed = [], [], 0
+        for turn in turns:
+            outcome = turn.get('shed', ADMITTED)
+            chat_admissions.inc(outcome)
+            if outcome != ADMITTED:
+                results.append(_shed_payload(turn['conversation_id'], outcome))
+                shed += 1
+            else:
+                results.append(_turn_payload(turn['conversation_id'], turn))
+                completed.append(turn)
         
-        # Log for analytics
-        analytics.log_conversation({
-            'timestamp': datetime.now().isoformat(),
-            'conversation_id': conversation_id,
-            'duration_minutes': conversation_summary.get('time_wasted_minutes', 0),
-            'technique_type': analysis.get('technique_type', 'unknown'),
-            'success_rating': min(10, max(1, len(ai_engine.conversation_history))),
-            'conversation_turn': len(ai_engine.conversation_history),
-            'scammer_frustration_level': ai_engine.scammer_profile.get('frustration_level', 0),
-            'response_time_seconds': response_time
-        })
+        # Whole batch goes to analytics in one logging operation
+        if completed:
+            analytics.log_conversations([_turn_analytics_event(turn['conversation_id'], turn) for turn in completed])
         
-        response_data = {
-            'response': bot_response,
-            'conversation_id': conversation_id,
-            'analysis': {
-                'urgency_score': analysis.get('urgency_score', 0),
-                'financial_score': analysis.get('financial_score', 0),
-                'tech_score': analysis.get('tech_score', 0),
-                'authority_score': analysis.get('authority_score', 0),
-                'technique_detected': ai_engine.scammer_profile.get('technique_type', 'unknown'),
-                'frustration_level': ai_engine.scammer_profile.get('frustration_level', 0)
-            },
-            'conversation_stats': {
-                'total_turns': len(ai_engine.conversation_history),
-                'time_wasted_minutes': conversation_summary.get('time_wasted_minutes', 0),
-                'effectiveness_score': conversation_summary.get('effectiveness_score', 0)
-            },
+        return jsonify({
+            'results': results,
+            'count': len(results),
             'metadata': {
-                'response_time_ms': round(response_time * 1000, 2),
+                'shed': shed,
+                'batch_time_ms': round((time.time() - start_time) * 1000, 2),
                 'timestamp': datetime.now().isoformat(),
                 'api_version': '2.0.0'
             }
-        }
-        
-        return jsonify(response_data)
+        })
         
     except Exception as e:
         return jsonify({'error': f'Internal server error: {str(e)}'}), 500
@@ -241,19 +459,33 @@ def chat_with_bot():
 def get_admin_stats():
     """Get detailed admin statistics (requires API key)"""
     try:
-        stats = analytics.get_real_time_stats()
-        return jsonify(stats)
+        return jsonify(analytics.get_real_time_stats(current_stats()))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/admin/profile', methods=['GET', 'POST'])
+@require_api_key
+def profile_requests():
+    """Profile the next N requests with cProfile (POST {"requests": N}); GET shows progress"""
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        try:
+            count = int(data.get('requests', 10))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'requests must be an integer'}), 400
+        profiler.arm(count)
+    
+    return jsonify({'profiler': profiler.status(), 'timestamp': datetime.now().isoformat()})
+
 @app.route('/api/conversation/reset', methods=['POST'])
 def reset_conversation():
     """Reset current conversation state (no API key required for demo)"""
     try:
         conversation_id = request.get_json().get('conversation_id') if request.get_json() else None
         
-        # Reset AI engine
-        ai_engine.reset_conversation()
+        # Drop only this conversation's engine state
+        if conversation_id:
+            sessions.reset(conversation_id)
         
         return jsonify({
             'message': 'Conversation reset successfully',
@@ -287,71 +519,87 @@ def get_random_response():
 def get_dashboard_data():
     """Get comprehensive dashboard data (public for frontend)"""
     try:
-        stats = analytics.get_real_time_stats()
-        daily_report = analytics.generate_daily_report()
-        
-        dashboard_data = {
-            'real_time_stats': stats,
-            'daily_report': daily_report,
-            'system_info': {
-                'uptime': 'operational',
-                'version': '2.0.0',
-                'last_updated': datetime.now().isoformat(),
-                'frontend_integrated': True
-            },
-            'quick_actions': [
-                {'action': 'reset_conversation', 'endpoint': '/api/conversation/reset'},
-                {'action': 'get_random_response', 'endpoint': '/api/responses/random'},
-                {'action': 'view_analytics', 'endpoint': '/api/stats'}
-            ]
-        }
-        
-        return jsonify(dashboard_data)
-        
+        return cached_json('dashboard', build_dashboard_data)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def build_dashboard_data() -> Dict[str, Any]:
+    """Dashboard payload; stats are computed once and reused by the daily report"""
+    stats = current_stats()
+    daily_report = analytics.generate_daily_report(stats)
+    
+    return {
+        'real_time_stats': stats,
+        'daily_report': daily_report,
+        'system_info': {
+            'uptime': 'operational',
+            'version': '2.0.0',
+            'last_updated': datetime.now().isoformat(),
+            'frontend_integrated': True
+        },
+        'quick_actions': [
+            {'action': 'reset_conversation', 'endpoint': '/api/conversation/reset'},
+            {'action': 'get_random_response', 'endpoint': '/api/responses/random'},
+            {'action': 'view_analytics', 'endpoint': '/api/stats'}
+        ]
+    }
+
 @app.route('/api/techniques')
 def get_technique_analysis():
     """Get analysis of scammer techniques encountered (public for frontend)"""
     try:
-        stats = analytics.get_real_time_stats()
-        techniques = stats.get('techniques', {})
-        
-        technique_analysis = []
-        for technique, count in techniques.items():
-            technique_analysis.append({
-                'technique': technique,
-                'encounters': count,
-                'percentage': round((count / sum(techniques.values())) * 100, 1) if techniques else 0,
-                'recommended_responses': response_library.response_categories.get(technique, [])[:3]
-            })
-        
-        return jsonify({
-            'technique_analysis': sorted(technique_analysis, key=lambda x: x['encounters'], reverse=True),
-            'total_techniques': len(techniques),
-            'most_common': max(techniques, key=techniques.get) if techniques else 'none',
-            'timestamp': datetime.now().isoformat()
-        })
-        
+        return cached_json('techniques', build_technique_analysis)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-# Add WebSocket support for real-time updates
+def build_technique_analysis() -> Dict[str, Any]:
+    """Technique breakdown payload for /api/techniques"""
+    techniques = current_stats().get('techniques', {})
+    
+    technique_analysis = []
+    for technique, count in techniques.items():
+        technique_analysis.append({
+            'technique': technique,
+            'encounters': count,
+            'percentage': round((count / sum(techniques.values())) * 100, 1) if techniques else 0,
+            'recommended_responses': response_library.response_categories.get(technique, [])[:3]
+        })
+    
+    return {
+        'technique_analysis': sorted(technique_analysis, key=lambda x: x['encounters'], reverse=True),
+        'total_techniques': len(techniques),
+        'most_common': max(techniques, key=techniques.get) if techniques else 'none',
+        'timestamp': datetime.now().isoformat()
+    }
+
+# Prometheus scrape target and latency percentiles
+@app.route('/api/metrics')
+@limiter.exempt
+def prometheus_metrics():
+    """Prometheus text exposition of request and internal metrics"""
+    return app.response_class(metrics.render(), content_type=MetricsRegistry.CONTENT_TYPE)
+
+@app.route('/api/latency')
+def get_latency():
+    """p50/p90/p99/p99.9 engine and request latency by technique and endpoint"""
+    return jsonify({
+        'latency': latency_recorder.summary(),
+        'admission': admission.get_stats(),
+        'voice_filler': voice_calls.filler_coverage.get_stats() if voice_calls.resolved else None,
+        'timestamp': datetime.now().isoformat()
+    })
+
+# Server-sent events for real-time updates - one publisher shared by all clients
 @app.route('/api/live-stats')
 def live_stats():
-    """Server-sent events endpoint for real-time stats"""
-    def generate():
-        while True:
-            try:
-                stats = analytics.get_real_time_stats()
-                yield f"data: {json.dumps(stats)}\n\n"
-                time.sleep(5)  # Update every 5 seconds
-            except Exception as e:
-                yield f"data: {json.dumps({'error': str(e)})}\n\n"
-                break
+    """Server-sent events endpoint for real-time stats (?deltas=1 for changed fields only)"""
+    subscription = live_stats_hub.subscribe(deltas=request.args.get('deltas') in ('1', 'true'))
     
-    return app.response_class(generate(), mimetype='text/plain')
+    return app.response_class(
+        live_stats_hub.stream(subscription),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 @app.errorhandler(404)
 def not_found(error):
@@ -0,0 +1,717 @@
+"""
+Asyncio Call Server for Scammer Waste Bot
+Media-stream websockets and SSE on one event loop; engine turns and every other route run in bounded thread pools
+"""
+import asyncio
+import base64
+import hashlib
+import io
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import unquote
+
+from twilio_handler import STILL_THERE
+from utils.media_stream import MediaCall, MediaStreamHub, encode_mulaw, wav_to_mulaw
+from utils.whisper_api import DEFAULT_SAMPLE_RATE, StreamingTranscriber, TranscriptEvent, load_backend
+
+WEBSOCKET_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 1024 * 1024
+MAX_MESSAGE_BYTES = 256 * 1024
+MAX_QUEUED_FRAMES = 500  # 10 s of 20 ms media frames waiting for the transcription pool
+
+STATUS_TEXT = {400: 'Bad Request', 403: 'Forbidden', 411: 'Length Required', 413: 'Payload Too Large',
+               431: 'Request Header Fields Too Large', 503: 'Service Unavailable'}
+
+
+class ExecutorSaturated(Exception):
+    """Raised instead of queueing when a BoundedExecutor has no room"""
+
+
+class BoundedExecutor:
+    """Thread pool with a cap on queued work, used from the event loop
+
+    At most ``max_workers`` calls run at once and ``max_queue`` more may
+    wait; beyond that ``run`` raises ExecutorSaturated straight away so the
+    caller can shed instead of letting latency grow without bound.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, name: str):
+        self.max_workers = max_workers
+        self.limit = max_workers + max(0, max_queue)
+        self.pending = 0  # only touched on the event loop thread
+        self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix=name)
+        self.stats = {'completed': 0, 'rejected': 0}
+
+    async def run(self, fn: Callable, *args) -> Any:
+        if self.pending >= self.limit:
+            self.stats['rejected'] += 1
+            raise ExecutorSaturated(f"{self.pending} calls pending")
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+        finally:
+            self.pending -= 1
+            self.stats['completed'] += 1
+
+    async def run_always(self, fn: Callable, *args) -> Any:
+        """Like ``run`` but never shed; for cheap cleanup that must not be dropped"""
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+        finally:
+            self.pending -= 1
+            self.stats['completed'] += 1
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def get_stats(self) -> Dict:
+        return {'max_workers': self.max_workers, 'pending': self.pending, **self.stats}
+
+
+class HTTPRequest:
+    """One parsed HTTP/1.1 request"""
+
+    __slots__ = ('method', 'path', 'query', 'version', 'headers', 'body', 'peer')
+
+    def __init__(self, method: str, target: str, version: str, headers: Dict[str, str], peer):
+        self.method = method
+        self.path, _, self.query = target.partition('?')
+        self.version = version
+        self.headers = headers  # lower-cased names
+        self.body = b''
+        self.peer = peer
+
+    @property
+    def keep_alive(self) -> bool:
+        connection = self.headers.get('connection', '').lower()
+        return connection != 'close' if self.version == 'HTTP/1.1' else connection == 'keep-alive'
+
+    @property
+    def wants_websocket(self) -> bool:
+        return (self.headers.get('upgrade', '').lower() == 'websocket'
+                and 'upgrade' in self.headers.get('connection', '').lower())
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int):
+        super().__init__(status)
+        self.status = status
+
+
+async def read_request(reader: asyncio.StreamReader, peer) -> Optional[HTTPRequest]:
+    """Read one request; None when the client closed the connection between requests"""
+    try:
+        head = await reader.readuntil(b'\r\n\r\n')
+    except asyncio.IncompleteReadError:
+        return None
+    except asyncio.LimitOverrunError:
+        raise HTTPError(431)
+    if len(head) > MAX_HEADER_BYTES:
+        raise HTTPError(431)
+
+    lines = head.decode('latin-1').split('\r\n')
+    try:
+        method, target, version = lines[0].split(' ')
+    except ValueError:
+        raise HTTPError(400)
+    headers = {}
+    for line in lines[1:]:
+        if line:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+    request = HTTPRequest(method, target, version, headers, peer)
+
+    if 'transfer-encoding' in headers:
+        raise HTTPError(411)
+    try:
+        length = int(headers.get('content-length') or 0)
+    except ValueError:
+        raise HTTPError(400)
+    if length < 0:
+        raise HTTPError(400)
+    if length > MAX_BODY_BYTES:
+        raise HTTPError(413)
+    if length:
+        request.body = await reader.readexactly(length)
+    return request
+
+
+def _response_head(status: str, headers: List[Tuple[str, str]]) -> bytes:
+    lines = [f'HTTP/1.1 {status}'] + [f'{name}: {value}' for name, value in headers]
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+
+def _unmask(payload: bytes, mask: bytes) -> bytes:
+    # XOR the whole payload at once as one big integer
+    length = len(payload)
+    key = (mask * (length // 4 + 1))[:length]
+    return (int.from_bytes(payload, 'little') ^ int.from_bytes(key, 'little')).to_bytes(length, 'little')
+
+
+class WebSocket:
+    """Server side of an RFC 6455 connection (text/binary messages, ping/pong, close)"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                 max_message: int = MAX_MESSAGE_BYTES):
+        self.reader = reader
+        self.writer = writer
+        self.max_message = max_message
+        self.closed = False
+
+    @staticmethod
+    def accept_key(key: str) -> str:
+        return base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode()).digest()).decode()
+
+    async def receive(self):
+        """Next complete message (str or bytes); None once the connection is closed"""
+        message = bytearray()
+        opcode = None
+        try:
+            while True:
+                first, second = await self.reader.readexactly(2)
+                length = second & 0x7F
+                if length == 126:
+                    length = int.from_bytes(await self.reader.readexactly(2), 'big')
+                elif length == 127:
+                    length = int.from_bytes(await self.reader.readexactly(8), 'big')
+                if len(message) + length > self.max_message:
+                    await self.close(1009)
+                    return None
+                mask = await self.reader.readexactly(4) if second & 0x80 else None
+                payload = await self.reader.readexactly(length) if length else b''
+                if mask is not None and payload:
+                    payload = _unmask(payload, mask)
+
+                frame_opcode = first & 0x0F
+                if frame_opcode == 0x8:
+                    await self.close(1000)
+                    return None
+                if frame_opcode == 0x9:
+                    await self._send_frame(0xA, payload)
+                    continue
+                if frame_opcode == 0xA:
+                    continue
+                if frame_opcode:
+                    opcode = frame_opcode
+                if first & 0x80 and not message:
+                    return payload.decode('utf-8') if opcode == 0x1 else payload
+                message += payload
+                if first & 0x80:
+                    return message.decode('utf-8') if opcode == 0x1 else bytes(message)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            self.closed = True
+            return None
+
+    async def _send_frame(self, opcode: int, payload: bytes):
+        length = len(payload)
+        if length < 126:
+            head = bytes((0x80 | opcode, length))
+        elif length < 65536:
+            head = bytes((0x80 | opcode, 126)) + length.to_bytes(2, 'big')
+        else:
+            head = bytes((0x80 | opcode, 127)) + length.to_bytes(8, 'big')
+        self.writer.write(head + payload)
+        await self.writer.drain()
+
+    async def send(self, text: str):
+        if self.closed:
+            raise ConnectionResetError("websocket closed")
+        await self._send_frame(0x1, text.encode('utf-8'))
+
+    async def close(self, code: int = 1000):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            await self._send_frame(0x8, code.to_bytes(2, 'big'))
+        except ConnectionError:
+            pass
+
+
+class MediaConnection:
+    """A live media-stream websocket and the turn it is currently playing"""
+
+    __slots__ = ('websocket', 'stream_sid', 'call_sid', 'turn_lock', 'turns', 'speaking', 'tasks',
+                 'frames', 'transcribing')
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.stream_sid = ''
+        self.call_sid = ''
+        self.turn_lock = asyncio.Lock()
+        self.turns = 0
+        self.speaking = False
+        self.tasks = set()
+        self.frames: List[Dict[str, Any]] = []  # media messages not yet handed to the transcriber
+        self.transcribing: Optional[asyncio.Task] = None
+
+
+class CallServer:
+    """Event-loop front end for long-lived voice traffic
+
+    ``/voice/stream`` accepts Twilio Media Streams websockets: inbound audio
+    is queued per call and transcribed in order in a bounded pool
+    (MediaStreamHub), so a slow recognizer never stalls the loop; each
+    final transcript runs
+    ``voice_calls.respond`` in the engine pool, and the reply goes back as
+    mu-law media when a TTS cache is configured, opened by a filler clip
+    (``voice_calls.fillers``) while the turn computes.  ``/voice/events`` and
+    ``/api/live-stats`` are served as SSE from the loop, and
+    ``/api/call-server`` reports the server's own counters.  Every other
+    request is passed to the WSGI app in its own pool, so webhooks and the
+    JSON API see the same sessions, admission control and analytics.  An
+    idle call costs a coroutine and its buffers, not a thread.
+    """
+
+    def __init__(self, wsgi_app, voice_calls, stats_hub=None, audio_cache=None,
+                 transcriber_factory: Callable[[], StreamingTranscriber] = StreamingTranscriber,
+                 engine_workers: int = 8, wsgi_workers: int = 16, transcription_workers: int = 4,
+                 max_queue: int = 64,
+                 stream_path: str = '/voice/stream', heartbeat_interval: float = 15.0,
+                 max_calls: int = 10000, sse_queue_size: int = 64):
+        self.wsgi_app = wsgi_app
+        self.voice_calls = voice_calls
+        self.stats_hub = stats_hub
+        self.audio_cache = audio_cache
+        self.stream_path = stream_path
+        self.heartbeat_interval = heartbeat_interval
+        self.sse_queue_size = sse_queue_size
+        self.engine = BoundedExecutor(engine_workers, max_queue, 'call-engine')
+        self.wsgi = BoundedExecutor(wsgi_workers, max_queue, 'call-wsgi')
+        self.transcription = BoundedExecutor(transcription_workers, max_queue, 'call-stt')
+        self.hub = MediaStreamHub(transcriber_factory, on_transcript=self._transcript_from_pool,
+                                  ring_windows=4, max_calls=max_calls)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._connections: Dict[str, MediaConnection] = {}
+        self._event_subscribers = set()
+        self._encoded_clip = lru_cache(maxsize=1024)(self._encode_clip)
+        self._fillers: List[Tuple[str, float]] = []  # (base64 mu-law, seconds)
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.stats = {'http_requests': 0, 'websockets': 0, 'sse_clients': 0, 'turns': 0,
+                      'turns_shed': 0, 'barge_ins': 0, 'frames_shed': 0, 'errors': 0}
+
+    # -- lifecycle -----------------------------------------------------------------
+
+    async def start(self, host: str = '0.0.0.0', port: int = 8765, backlog: int = 2048):
+        self._loop = asyncio.get_running_loop()
+        self._server = await asyncio.start_server(self._handle_connection, host, port,
+                                                  backlog=backlog, limit=MAX_HEADER_BYTES)
+        return self._server
+
+    async def serve_forever(self, host: str = '0.0.0.0', port: int = 8765):
+        server = await self.start(host, port)
+        async with server:
+            await server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self.engine.shutdown()
+        self.wsgi.shutdown()
+        self.transcription.shutdown()
+
+    @property
+    def port(self) -> int:
+        return self._server.sockets[0].getsockname()[1]
+
+    # -- connections ---------------------------------------------------------------
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        peer = writer.get_extra_info('peername')
+        try:
+            while True:
+                try:
+                    request = await read_request(reader, peer)
+                except HTTPError as e:
+                    await self._send_simple(writer, e.status)
+                    return
+                if request is None:
+                    return
+                self.stats['http_requests'] += 1
+
+                if request.path == self.stream_path and request.wants_websocket:
+                    await self._media_stream(reader, writer, request)
+                    return
+                if request.path == '/api/call-server':
+                    body = json.dumps(self.get_stats()).encode()
+                    writer.write(_response_head('200 OK', [('Content-Type', 'application/json'),
+                                                           ('Content-Length', str(len(body)))]) + body)
+                    await writer.drain()
+                    if not request.keep_alive:
+                        return
+                    continue
+                if request.path == '/voice/events':
+                    await self._sse(reader, writer, self._call_events())
+                    return
+                if request.path == '/api/live-stats' and self.stats_hub is not None:
+                    await self._sse(reader, writer, self._live_stats(request))
+                    return
+                if not await self._wsgi(writer, request) or not request.keep_alive:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            self.stats['errors'] += 1
+            print(f"Call server error: {e}")
+        finally:
+            writer.close()
+
+    async def _send_simple(self, writer: asyncio.StreamWriter, status: int):
+        writer.write(_response_head(f'{status} {STATUS_TEXT.get(status, "Error")}',
+                                    [('Content-Length', '0'), ('Connection', 'close')]))
+        await writer.drain()
+
+    # -- WSGI bridge ---------------------------------------------------------------
+
+    def _environ(self, request: HTTPRequest) -> Dict[str, Any]:
+        host, _, port = request.headers.get('host', 'localhost').partition(':')
+        environ = {
+            'REQUEST_METHOD': request.method,
+            'SCRIPT_NAME': '',
+            'PATH_INFO': unquote(request.path, 'latin-1'),
+            'QUERY_STRING': request.query,
+            'SERVER_NAME': host,
+            'SERVER_PORT': port or '80',
+            'SERVER_PROTOCOL': request.version,
+            'REMOTE_ADDR': request.peer[0] if request.peer else '',
+            'CONTENT_TYPE': request.headers.get('content-type', ''),
+            'CONTENT_LENGTH': str(len(request.body)),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': io.BytesIO(request.body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        for name, value in request.headers.items():
+            if name not in ('content-type', 'content-length'):
+                environ['HTTP_' + name.upper().replace('-', '_')] = value
+        return environ
+
+    def _call_wsgi(self, environ: Dict[str, Any]) -> Tuple[str, List[Tuple[str, str]], bytes]:
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'], response['headers'] = status, headers
+
+        result = self.wsgi_app(environ, start_response)
+        try:
+            body = b''.join(result)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        return response['status'], response['headers'], body
+
+    async def _wsgi(self, writer: asyncio.StreamWriter, request: HTTPRequest) -> bool:
+        """Run the request through the WSGI app; False when the connection must close"""
+        try:
+            status, headers, body = await self.wsgi.run(self._call_wsgi, self._environ(request))
+        except ExecutorSaturated:
+            writer.write(_response_head('503 Service Unavailable',
+                                        [('Content-Length', '0'), ('Retry-After', '1'), ('Connection', 'close')]))
+            await writer.drain()
+            return False
+
+        headers = [(name, value) for name, value in headers
+                   if name.lower() not in ('content-length', 'transfer-encoding', 'connection')]
+        headers.append(('Content-Length', str(len(body))))
+        if not request.keep_alive:
+            headers.append(('Connection', 'close'))
+        writer.write(_response_head(status, headers) + (body if request.method != 'HEAD' else b''))
+        await writer.drain()
+        return True
+
+    # -- server-sent events --------------------------------------------------------
+
+    async def _sse(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, events):
+        """Stream an async iterator of SSE chunks until the client goes away"""
+        self.stats['sse_clients'] += 1
+        writer.write(_response_head('200 OK', [('Content-Type', 'text/event-stream'),
+                                               ('Cache-Control', 'no-cache'), ('X-Accel-Buffering', 'no'),
+                                               ('Connection', 'close')]))
+        hung_up = asyncio.ensure_future(reader.read(1))  # completes when the client disconnects
+        try:
+            async for chunk in events:
+                if hung_up.done():
+                    break
+                writer.write(chunk.encode('utf-8'))
+                await writer.drain()
+        finally:
+            hung_up.cancel()
+            self.stats['sse_clients'] -= 1
+            await events.aclose()
+
+    async def _call_events(self):
+        """Transcripts and replies from every media-stream call, as they happen"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.sse_queue_size)
+        self._event_subscribers.add(queue)
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), self.heartbeat_interval)
+                except asyncio.TimeoutError:
+                    yield ": heartbeat\n\n"
+                    continue
+                if message is None:
+                    return
+                yield message
+        finally:
+            self._event_subscribers.discard(queue)
+
+    def _publish(self, event: Dict[str, Any]):
+        if not self._event_subscribers:
+            return
+        message = f"data: {json.dumps(event)}\n\n"
+        for queue in list(self._event_subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Slow reader: disconnect it rather than buffer without limit
+                self._event_subscribers.discard(queue)
+                queue.get_nowait()
+                queue.put_nowait(None)
+
+    async def _live_stats(self, request: HTTPRequest, poll_interval: float = 0.25):
+        """Bridge a StatsBroadcaster subscription onto the loop without parking a thread per client"""
+        deltas = 'deltas=1' in request.query or 'deltas=true' in request.query
+        subscription = self.stats_hub.subscribe(deltas=deltas)
+        stream = self.stats_hub.stream(subscription)
+        try:
+            yield await self.wsgi.run(next, stream)  # first snapshot may compute stats
+            quiet_since = time.monotonic()
+            while not subscription.dropped:
+                if subscription.queue.empty():
+                    if time.monotonic() - quiet_since >= self.heartbeat_interval:
+                        quiet_since = time.monotonic()
+                        yield ": heartbeat\n\n"
+                    await asyncio.sleep(poll_interval)
+                    continue
+                message = next(stream, None)  # queued, so this does not block
+                if message is None:
+                    return
+                quiet_since = time.monotonic()
+                yield message
+        finally:
+            stream.close()
+
+    # -- media streams -------------------------------------------------------------
+
+    async def _media_stream(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                            request: HTTPRequest):
+        key = request.headers.get('sec-websocket-key')
+        if not key:
+            await self._send_simple(writer, 400)
+            return
+        url = self.voice_calls.stream_url or f"wss://{request.headers.get('host', '')}{request.path}"
+        if not self.voice_calls.is_authentic(url, {}, request.headers.get('x-twilio-signature', '')):
+            await self._send_simple(writer, 403)
+            return
+        writer.write(_response_head('101 Switching Protocols', [
+            ('Upgrade', 'websocket'), ('Connection', 'Upgrade'), ('Sec-WebSocket-Accept', WebSocket.accept_key(key))]))
+        await writer.drain()
+
+        self.stats['websockets'] += 1
+        connection = MediaConnection(WebSocket(reader, writer))
+        try:
+            while True:
+                text = await connection.websocket.receive()
+                if text is None:
+                    break
+                if isinstance(text, bytes):
+                    continue
+                message = json.loads(text)
+                event = message.get('event')
+                if event == 'start':
+                    connection.stream_sid = message.get('streamSid', '')
+                    connection.call_sid = (message.get('start') or {}).get('callSid', '')
+                    self._connections[connection.stream_sid] = connection
+                elif event == 'mark':
+                    connection.speaking = False  # Twilio finished playing our reply
+                elif event == 'stop':
+                    break
+                elif event == 'media':
+                    self._queue_media(connection, message)
+                    continue
+                self.hub.handle_message(message)
+        finally:
+            self.stats['websockets'] -= 1
+            if connection.transcribing is not None:
+                await connection.transcribing  # queued audio reaches the transcriber before it is closed
+            if connection.stream_sid:
+                await self.transcription.run_always(self.hub.stop, connection.stream_sid)
+                self._connections.pop(connection.stream_sid, None)
+                if connection.call_sid:
+                    await self.engine.run_always(self.voice_calls.end_call, connection.call_sid)
+            await connection.websocket.close()
+
+    def _queue_media(self, connection: MediaConnection, message: Dict[str, Any]):
+        if len(connection.frames) >= MAX_QUEUED_FRAMES:
+            self.stats['frames_shed'] += 1
+            return
+        connection.frames.append(message)
+        if connection.transcribing is None:
+            connection.transcribing = asyncio.get_running_loop().create_task(self._transcribe(connection))
+
+    async def _transcribe(self, connection: MediaConnection):
+        """Hand a connection's queued frames to the transcription pool, one batch at a time"""
+        try:
+            while connection.frames:
+                frames, connection.frames = connection.frames, []
+                try:
+                    await self.transcription.run(self._feed, frames)
+                except ExecutorSaturated:
+                    self.stats['frames_shed'] += len(frames)
+        finally:
+            connection.transcribing = None
+
+    def _feed(self, frames: List[Dict[str, Any]]):
+        for message in frames:
+            self.hub.handle_message(message)
+
+    def _transcript_from_pool(self, call: MediaCall, event: TranscriptEvent):
+        # Transcripts arrive on a transcription thread; the connection is only touched on the loop
+        self._loop.call_soon_threadsafe(self._on_transcript, call, event)
+
+    def _on_transcript(self, call: MediaCall, event: TranscriptEvent):
+        connection = self._connections.get(call.stream_sid)
+        self._publish({'call_sid': call.call_sid, 'kind': event.kind, 'text': event.text,
+                       'utterance': event.utterance})
+        if connection is None:
+            return
+        if not event.is_final:
+            if connection.speaking:
+                # Caller talks over the reply: stop playback so they are heard
+                connection.speaking = False
+                self.stats['barge_ins'] += 1
+                self._spawn(connection, self._send(connection, {'event': 'clear'}))
+            return
+        self._spawn(connection, self._turn(connection, event.text))
+
+    @staticmethod
+    def _spawn(connection: MediaConnection, coroutine):
+        task = asyncio.get_running_loop().create_task(coroutine)
+        connection.tasks.add(task)
+        task.add_done_callback(connection.tasks.discard)
+
+    async def _send(self, connection: MediaConnection, message: Dict[str, Any]):
+        try:
+            await connection.websocket.send(json.dumps({**message, 'streamSid': connection.stream_sid}))
+        except ConnectionError:
+            pass
+
+    async def _turn(self, connection: MediaConnection, speech: str):
+        """One engine turn for a final transcript, replies played in order
+
+        A pre-rendered filler goes out first so the caller hears something
+        at once; the engine turn and its TTS run meanwhile and the reply is
+        queued behind the filler on Twilio's side.
+        """
+        async with connection.turn_lock:
+            started = time.monotonic()
+            filler_seconds = await self._play_filler(connection)
+            try:
+                reply = await self.engine.run(self.voice_calls.respond, connection.call_sid, speech,
+                                              not filler_seconds)
+                self.stats['turns'] += 1
+            except ExecutorSaturated:
+                self.stats['turns_shed'] += 1
+                reply = random.choice(STILL_THERE)
+            payload = None
+            if self.audio_cache is not None and not connection.websocket.closed:
+                try:
+                    payload = await self.engine.run(self._outbound_payload, reply)
+                except ExecutorSaturated:
+                    pass
+            if filler_seconds:
+                compute = time.monotonic() - started
+                self.voice_calls.filler_coverage.record('stream', compute <= filler_seconds,
+                                                        max(0.0, compute - filler_seconds))
+
+            connection.turns += 1
+            self._publish({'call_sid': connection.call_sid, 'kind': 'reply', 'text': reply,
+                           'turn': connection.turns})
+            if payload:
+                connection.speaking = True
+                await self._send(connection, {'event': 'media', 'media': {'payload': payload}})
+            await self._send(connection, {'event': 'mark', 'mark': {'name': f"turn-{connection.turns}"}})
+
+    async def _play_filler(self, connection: MediaConnection) -> float:
+        """Send a pre-rendered filler straight away; returns its length in seconds (0 when none is ready)"""
+        if not self._fillers or connection.websocket.closed:
+            return 0.0
+        payload, seconds = random.choice(self._fillers)
+        connection.speaking = True
+        await self._send(connection, {'event': 'media', 'media': {'payload': payload}})
+        return seconds
+
+    def warm_fillers(self) -> int:
+        """Render every filler line to mu-law up front, so opening a turn never waits on TTS"""
+        fillers = []
+        if self.audio_cache is not None:
+            for text in self.voice_calls.fillers:
+                payload = self._outbound_payload(text)
+                if payload:
+                    fillers.append((payload, len(base64.b64decode(payload)) / DEFAULT_SAMPLE_RATE))
+        self._fillers = fillers
+        return len(fillers)
+
+    def _outbound_payload(self, text: str) -> Optional[str]:
+        return self._encoded_clip(self.audio_cache.get(text).key)
+
+    def _encode_clip(self, key: str) -> Optional[str]:
+        # Memoized per clip: replies repeat, so each is converted to mu-law once
+        clip = self.audio_cache.load(key)
+        mulaw = wav_to_mulaw(clip.data) if clip is not None else None
+        return base64.b64encode(mulaw).decode('ascii') if mulaw else None
+
+    def get_stats(self) -> Dict:
+        return {
+            'media_streams': self.hub.get_stats(),
+            'engine_pool': self.engine.get_stats(),
+            'wsgi_pool': self.wsgi.get_stats(),
+            'transcription_pool': self.transcription.get_stats(),
+            'event_subscribers': len(self._event_subscribers),
+            'fillers_ready': len(self._fillers),
+            'filler': self.voice_calls.filler_coverage.get_stats(),
+            **self.stats
+        }
+
+
+def build_server() -> CallServer:
+    """A CallServer wired to the Flask app's components (same sessions, admission and analytics)"""
+    import app as web
+
+    backend_spec = os.environ.get('TRANSCRIPTION_BACKEND', 'scripted')
+    server = CallServer(
+        web.app, web.voice_calls,
+        stats_hub=web.live_stats_hub,
+        audio_cache=web.app.extensions.get('audio_cache'),
+        transcriber_factory=lambda: StreamingTranscriber(load_backend(backend_spec)),
+        engine_workers=web.admission.max_concurrent,
+        wsgi_workers=int(os.environ.get('CALL_SERVER_WSGI_WORKERS', 16)),
+        transcription_workers=int(os.environ.get('CALL_SERVER_STT_WORKERS', 4)),
+        max_queue=int(os.environ.get('CALL_SERVER_MAX_QUEUE', 64)),
+        max_calls=int(os.environ.get('CALL_SERVER_MAX_CALLS', 10000))
+    )
+    web.voice_calls.resolve()
+    encode_mulaw(b'')  # builds the outbound encoding table before the first call
+    server.warm_fillers()
+    web.metrics.gauge('media_streams', 'Open media-stream websockets', callback=lambda: server.stats['websockets'])
+    web.app.extensions['call_server'] = server
+    return server
+
+
+if __name__ == '__main__':
+    port = int(os.environ.get('CALL_SERVER_PORT', os.environ.get('PORT', 8765)))
+    print(f"📞 Call server on :{port} (media streams at /voice/stream, SSE at /voice/events)")
+    asyncio.run(build_server().serve_forever(port=port))
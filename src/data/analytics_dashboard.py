@@ -4,45 +4,75 @@ Real-time dashboard with comprehensive metrics
 """
 import json
 import csv
+import atexit
 import os
+import threading
+import time
 from datetime import datetime, timedelta
 from typing import Dict, List, Any
-import statistics
+
+from data.conversation_table import ConversationTable
+from data.csv_tail import CSVTailReader, load_checkpoint, save_checkpoint
+from data.stats_aggregator import StatsAggregator
+from utils.latency_sketch import get_latency_recorder
+from utils.log_writer import get_log_writer
 
 class AnalyticsDashboard:
     """Advanced analytics for scammer waste bot performance"""
     
-    def __init__(self):
+    def __init__(self, store=None, checkpoint_interval: float = 5.0):
         self.data_dir = os.path.join('data', 'analytics')
+        self.csv_file = os.path.join(self.data_dir, 'conversations.csv')
+        self.checkpoint_file = os.path.join(self.data_dir, 'conversations.checkpoint.json')
+        self.store = store  # optional SQLiteAnalyticsStore; CSV files are used when None
+        self.generation = 0  # bumped on every write so cached stats know they are stale
+        self._generation_lock = threading.Lock()
+        self.checkpoint_interval = checkpoint_interval
+        self._ingest_lock = threading.Lock()
+        self._last_checkpoint = 0.0
+        self._last_event_id = 0  # newest conversation_events row folded in (SQLite backend)
+        self.tail = CSVTailReader(self.csv_file)
         self.ensure_data_directory()
+        self._rebuild_aggregates()
         
     def ensure_data_directory(self):
         """Ensure analytics data directory exists"""
         os.makedirs(self.data_dir, exist_ok=True)
         
-    def get_real_time_stats(self) -> Dict[str, Any]:
-        """Get real-time performance statistics"""
-        conversations = self._load_conversation_data()
+    def get_real_time_stats(self, aggregate_stats: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Get real-time performance statistics with live latency percentiles
+
+        ``aggregate_stats`` may be a cached ``get_aggregate_stats()`` result;
+        the latency summary changes on every request, so it is merged in
+        here rather than cached with the rest.
+        """
+        stats = dict(aggregate_stats if aggregate_stats is not None else self.get_aggregate_stats())
+        stats['latency'] = get_latency_recorder().summary()
+        return stats
+    
+    def get_aggregate_stats(self) -> Dict[str, Any]:
+        """Conversation statistics; these only change when conversations are logged"""
+        self.refresh()
+        overview = self.aggregator.overview()
+        total_conversations = overview['conversations']
         
-        if not conversations:
+        if not total_conversations:
             return self._empty_stats()
         
         # Calculate key metrics
-        total_conversations = len(conversations)
-        total_time_wasted = sum(conv.get('duration_minutes', 0) for conv in conversations)
-        avg_conversation_length = total_time_wasted / total_conversations if total_conversations > 0 else 0
+        total_time_wasted = overview['time_wasted_minutes']
+        avg_conversation_length = total_time_wasted / total_conversations
         
         # Scammer technique analysis
-        techniques = [conv.get('technique_type', 'unknown') for conv in conversations]
-        technique_counts = {technique: techniques.count(technique) for technique in set(techniques)}
+        technique_counts = overview['techniques']
         
         # Success rate calculation
-        successful_conversations = len([conv for conv in conversations if conv.get('success_rating', 0) > 7])
-        success_rate = (successful_conversations / total_conversations * 100) if total_conversations > 0 else 0
+        success_rate = overview['successes'] / total_conversations * 100
         
         # Time-based analysis
-        today_conversations = self._get_conversations_by_date(conversations, datetime.now().date())
-        this_week = self._get_conversations_by_week(conversations)
+        today = datetime.now().date()
+        today_conversations = self._get_conversations_by_date(today)
+        this_week = self._get_conversations_by_week(today)
         
         return {
             'overview': {
@@ -53,19 +83,19 @@ class AnalyticsDashboard:
                 'estimated_cost_to_scammers': round(total_time_wasted * 0.25, 2)  # $0.25 per minute
             },
             'today': {
-                'conversations': len(today_conversations),
-                'time_wasted_minutes': sum(conv.get('duration_minutes', 0) for conv in today_conversations),
-                'top_technique': self._get_top_technique(today_conversations)
+                'conversations': today_conversations['conversations'],
+                'time_wasted_minutes': today_conversations['time_wasted_minutes'],
+                'top_technique': self._get_top_technique(today_conversations['techniques'])
             },
             'this_week': {
-                'conversations': len(this_week),
-                'average_daily': round(len(this_week) / 7, 1),
-                'total_time_hours': round(sum(conv.get('duration_minutes', 0) for conv in this_week) / 60, 2)
+                'conversations': this_week['conversations'],
+                'average_daily': round(this_week['conversations'] / 7, 1),
+                'total_time_hours': round(this_week['time_wasted_minutes'] / 60, 2)
             },
             'techniques': technique_counts,
-            'performance_trends': self._calculate_trends(conversations),
-            'geographic_data': self._analyze_geographic_patterns(conversations),
-            'effectiveness_by_time': self._analyze_time_patterns(conversations)
+            'performance_trends': self._calculate_trends(today),
+            'geographic_data': self._analyze_geographic_patterns(total_conversations),
+            'effectiveness_by_time': self._analyze_time_patterns()
         }
     
     def _empty_stats(self) -> Dict[str, Any]:
@@ -86,94 +116,130 @@ class AnalyticsDashboard:
             'effectiveness_by_time': {}
         }
     
-    def _load_conversation_data(self) -> List[Dict]:
-        """Load conversation data from CSV files"""
-        conversations = []
-        csv_file = os.path.join(self.data_dir, 'conversations.csv')
-        
-        if not os.path.exists(csv_file):
-            return conversations
-            
+    def _load_conversation_data(self) -> ConversationTable:
+        """Conversation rows appended to the CSV log since the last call, as columns"""
+        table = ConversationTable()
         try:
-            with open(csv_file, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    # Convert numeric fields
-                    if 'duration_minutes' in row:
-                        row['duration_minutes'] = float(row.get('duration_minutes', 0))
-                    if 'success_rating' in row:
-                        row['success_rating'] = int(row.get('success_rating', 0))
-                    if 'conversation_turn' in row:
-                        row['conversation_turn'] = int(row.get('conversation_turn', 0))
-                    
-                    conversations.append(row)
+            while True:
+                header, rows = self.tail.read_rows()
+                if not rows:
+                    return table
+                table.extend_csv(header, rows)
         except Exception as e:
             print(f"Error loading conversation data: {e}")
-            
-        return conversations
+            return table
     
-    def _get_conversations_by_date(self, conversations: List[Dict], target_date) -> List[Dict]:
-        """Filter conversations by specific date"""
-        filtered = []
-        for conv in conversations:
+    def _rebuild_aggregates(self):
+        """Replay the on-disk history into the in-memory aggregator (startup only)"""
+        self.aggregator = StatsAggregator()
+        
+        if self.store is not None:
+            # Let the indexed GROUP BY queries do the bucketing, then follow new rows by id
+            since = datetime.now().date() - timedelta(days=self.aggregator.retention_days)
+            self._last_event_id, totals, days, hours = self.store.snapshot(since)
+            self.aggregator.seed(totals, days, hours)
+            return
+        
+        # Resume from the sidecar checkpoint so only rows written since are parsed
+        checkpoint = load_checkpoint(self.checkpoint_file)
+        if checkpoint and self.tail.restore(checkpoint.get('reader', {})):
             try:
-                conv_date = datetime.fromisoformat(conv.get('timestamp', '')).date()
-                if conv_date == target_date:
-                    filtered.append(conv)
-            except (ValueError, TypeError):
-                continue
-        return filtered
+                self.aggregator = StatsAggregator.from_state(checkpoint['aggregates'])
+            except (KeyError, TypeError, ValueError):
+                self.tail = CSVTailReader(self.csv_file)
+        
+        rows = self._load_conversation_data()
+        self.aggregator.add_table(rows)
+        if len(rows):
+            self.save_checkpoint()
+        atexit.register(self.save_checkpoint)
+    
+    def refresh(self):
+        """Fold rows written since the last call (by any worker) into the aggregates"""
+        if self.store is not None:
+            self._refresh_from_store()
+            return
+        
+        with self._ingest_lock:
+            rows = self._load_conversation_data()
+            if not len(rows):
+                return
+            self.aggregator.add_table(rows)
+        
+        with self._generation_lock:
+            self.generation += 1
+        
+        if time.monotonic() - self._last_checkpoint >= self.checkpoint_interval:
+            self.save_checkpoint()
+    
+    def _refresh_from_store(self):
+        """Fold conversation_events rows past the last seen id into the aggregates"""
+        with self._ingest_lock:
+            added = 0
+            while True:
+                rows = self.store.events_after(self._last_event_id)
+                if not rows:
+                    break
+                self.aggregator.add_many(rows)
+                self._last_event_id = rows[-1]['id']
+                added += len(rows)
+        
+        if added:
+            with self._generation_lock:
+                self.generation += 1
     
-    def _get_conversations_by_week(self, conversations: List[Dict]) -> List[Dict]:
-        """Get conversations from the last 7 days"""
-        week_ago = datetime.now() - timedelta(days=7)
-        filtered = []
+    def save_checkpoint(self):
+        """Persist the tail position together with the aggregates built up to it"""
+        if self.store is not None or not os.path.isdir(self.data_dir):
+            return
         
-        for conv in conversations:
-            try:
-                conv_datetime = datetime.fromisoformat(conv.get('timestamp', ''))
-                if conv_datetime >= week_ago:
-                    filtered.append(conv)
-            except (ValueError, TypeError):
-                continue
-                
-        return filtered
+        with self._ingest_lock:
+            checkpoint = {'reader': self.tail.checkpoint(), 'aggregates': self.aggregator.to_state()}
+        self._last_checkpoint = time.monotonic()
+        
+        try:
+            save_checkpoint(self.checkpoint_file, checkpoint)
+        except OSError as e:
+            print(f"Error saving analytics checkpoint: {e}")
     
-    def _get_top_technique(self, conversations: List[Dict]) -> str:
+    def _get_conversations_by_date(self, target_date) -> Dict[str, Any]:
+        """Aggregated conversations for a specific date"""
+        return self.aggregator.day_range(target_date, target_date)
+    
+    def _get_conversations_by_week(self, today) -> Dict[str, Any]:
+        """Aggregated conversations from the last 7 days (today included)"""
+        return self.aggregator.day_range(today - timedelta(days=6), today)
+    
+    def _get_top_technique(self, technique_counts: Dict[str, int]) -> str:
         """Get the most common technique type"""
-        if not conversations:
+        if not technique_counts:
             return 'none'
             
-        techniques = [conv.get('technique_type', 'unknown') for conv in conversations]
-        return max(set(techniques), key=techniques.count) if techniques else 'unknown'
+        return max(technique_counts, key=technique_counts.get)
     
-    def _calculate_trends(self, conversations: List[Dict]) -> List[Dict]:
+    def _calculate_trends(self, today) -> List[Dict]:
         """Calculate performance trends over time"""
         trends = []
         
-        # Group by day for the last 30 days
-        for i in range(30):
-            date = datetime.now().date() - timedelta(days=i)
-            day_conversations = self._get_conversations_by_date(conversations, date)
-            
+        # One entry per day for the last 30 days, oldest first
+        for day in self.aggregator.daily_series(today, 30):
             trends.append({
-                'date': date.isoformat(),
-                'conversations': len(day_conversations),
-                'time_wasted_minutes': sum(conv.get('duration_minutes', 0) for conv in day_conversations),
-                'success_rate': self._calculate_day_success_rate(day_conversations)
+                'date': day['date'].isoformat(),
+                'conversations': day['conversations'],
+                'time_wasted_minutes': day['time_wasted_minutes'],
+                'success_rate': self._calculate_day_success_rate(day)
             })
         
-        return sorted(trends, key=lambda x: x['date'])
+        return trends
     
-    def _calculate_day_success_rate(self, day_conversations: List[Dict]) -> float:
+    def _calculate_day_success_rate(self, day: Dict[str, Any]) -> float:
         """Calculate success rate for a specific day"""
-        if not day_conversations:
+        if not day['conversations']:
             return 0.0
             
-        successful = len([conv for conv in day_conversations if conv.get('success_rating', 0) > 7])
-        return round((successful / len(day_conversations)) * 100, 1)
+        return round((day['successes'] / day['conversations']) * 100, 1)
     
-    def _analyze_geographic_patterns(self, conversations: List[Dict]) -> Dict[str, int]:
+    def _analyze_geographic_patterns(self, total_conversations: int) -> Dict[str, int]:
         """Analyze geographic patterns in scammer calls"""
         # Simulated geographic data - in real implementation, 
         # this would use caller ID or IP geolocation
@@ -183,15 +249,15 @@ class AnalyticsDashboard:
         for country in countries:
             # Simulate distribution based on common scammer origins
             if country == 'India':
-                geographic_data[country] = len(conversations) // 3
+                geographic_data[country] = total_conversations // 3
             elif country == 'Nigeria':
-                geographic_data[country] = len(conversations) // 4
+                geographic_data[country] = total_conversations // 4
             else:
-                geographic_data[country] = len(conversations) // 10
+                geographic_data[country] = total_conversations // 10
                 
         return geographic_data
     
-    def _analyze_time_patterns(self, conversations: List[Dict]) -> Dict[str, float]:
+    def _analyze_time_patterns(self) -> Dict[str, float]:
         """Analyze effectiveness by time of day"""
         time_patterns = {
             'morning': 0,    # 6-12
@@ -207,27 +273,18 @@ class AnalyticsDashboard:
             'night': 0
         }
         
-        for conv in conversations:
-            try:
-                conv_time = datetime.fromisoformat(conv.get('timestamp', ''))
-                hour = conv_time.hour
-                duration = conv.get('duration_minutes', 0)
-                
-                if 6 <= hour < 12:
-                    time_patterns['morning'] += duration
-                    time_counts['morning'] += 1
-                elif 12 <= hour < 18:
-                    time_patterns['afternoon'] += duration
-                    time_counts['afternoon'] += 1
-                elif 18 <= hour < 22:
-                    time_patterns['evening'] += duration
-                    time_counts['evening'] += 1
-                else:
-                    time_patterns['night'] += duration
-                    time_counts['night'] += 1
-                    
-            except (ValueError, TypeError):
-                continue
+        for hour, bucket in enumerate(self.aggregator.hourly_histogram()):
+            if 6 <= hour < 12:
+                period = 'morning'
+            elif 12 <= hour < 18:
+                period = 'afternoon'
+            elif 18 <= hour < 22:
+                period = 'evening'
+            else:
+                period = 'night'
+            
+            time_patterns[period] += bucket['time_wasted_minutes']
+            time_counts[period] += bucket['conversations']
         
         # Calculate average duration for each time period
         for period in time_patterns:
@@ -238,36 +295,43 @@ class AnalyticsDashboard:
     
     def log_conversation(self, conversation_data: Dict):
         """Log a completed conversation for analytics"""
-        csv_file = os.path.join(self.data_dir, 'conversations.csv')
-        
+        self.log_conversations([conversation_data])
+    
+    def log_conversations(self, batch: List[Dict]):
+        """Log several conversations as a single write and aggregator update"""
         # Ensure all required fields are present
         required_fields = [
             'timestamp', 'duration_minutes', 'technique_type', 'success_rating',
             'conversation_turn', 'scammer_frustration_level'
         ]
         
-        for field in required_fields:
-            if field not in conversation_data:
-                conversation_data[field] = 0 if 'level' in field or 'rating' in field else 'unknown'
-        
-        # Check if file exists to determine if we need headers
-        file_exists = os.path.exists(csv_file)
-        
-        try:
-            with open(csv_file, 'a', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=conversation_data.keys())
-                
-                if not file_exists:
-                    writer.writeheader()
-                
-                writer.writerow(conversation_data)
-                
-        except Exception as e:
-            print(f"Error logging conversation: {e}")
+        for conversation_data in batch:
+            for field in required_fields:
+                if field not in conversation_data:
+                    conversation_data[field] = 0 if 'level' in field or 'rating' in field else 'unknown'
+        
+        if self.store is None:
+            # Hand the rows to the background writer; the request never touches the file.
+            # The aggregates pick them up from the file tail, like rows from other workers.
+            writer = get_log_writer()
+            sink = writer.csv_sink(self.csv_file)
+            accepted = writer.submit_many(sink, [dict(conversation_data) for conversation_data in batch])
+            if accepted < len(batch):
+                print(f"Error logging conversation: log writer queue is full ({len(batch) - accepted} dropped)")
+            return
+        
+        # Queued for the group commit; every worker's aggregates pick the rows up by id
+        self.store.add_events(batch)
+    
+    def version(self):
+        """Cache stamp for derived stats: write generation plus today's date"""
+        self.refresh()
+        return (self.generation, datetime.now().date())
     
-    def generate_daily_report(self) -> Dict[str, Any]:
+    def generate_daily_report(self, stats: Dict[str, Any] = None) -> Dict[str, Any]:
         """Generate comprehensive daily performance report"""
-        stats = self.get_real_time_stats()
+        if stats is None:
+            stats = self.get_aggregate_stats()
         today_stats = stats['today']
         
         report = {
@@ -318,6 +382,8 @@ class AnalyticsDashboard:
         if len(trends) < 7:
             return {'predicted_conversations': 0, 'confidence': 'low', 'expected_techniques': []}
         
+        import statistics  # only needed for reports
+        
         # Simple trend analysis
         recent_conversations = [day['conversations'] for day in trends[-7:]]
         avg_conversations = statistics.mean(recent_conversations) if recent_conversations else 0
@@ -0,0 +1,187 @@
+"""
+Columnar Conversation Table
+Compact array-backed parse buffer for newly logged conversations
+"""
+from array import array
+from collections import Counter
+from itertools import compress
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from data.stats_aggregator import SUCCESS_THRESHOLD, _EPOCH, _parse_timestamp, _to_float
+
+_numpy = False  # not looked up yet
+
+
+def numpy_module():
+    """numpy if it is installed, else None; imported on first use, not at startup"""
+    global _numpy
+    if _numpy is False:
+        try:
+            import numpy
+        except ImportError:  # numpy is optional; the array.array fallback gives the same results
+            numpy = None
+        _numpy = numpy
+    return _numpy
+
+_EPOCH_DAY = _EPOCH.date()
+_NAN = float('nan')
+NO_SLOT = -2 ** 31  # hour_slot of a row whose timestamp did not parse
+
+COLUMN_FIELDS = {
+    'epoch': 'timestamp',
+    'duration': 'duration_minutes',
+    'rating': 'success_rating',
+    'turn': 'conversation_turn',
+    'frustration': 'scammer_frustration_level',
+}
+
+
+def _clamp_int(value: Any, upper: int) -> int:
+    number = _to_float(value)
+    if number != number:  # NaN
+        return 0
+    return min(upper, max(0, int(number)))
+
+
+class ConversationTable:
+    """Conversations stored as typed columns instead of one dict per row
+
+    The dashboard parses each batch of rows tailed from the CSV log into a
+    table and folds ``grouped()`` into its StatsAggregator; the table is
+    then dropped, so the aggregator, not this buffer, is what stats read.
+    Each row costs ~28 bytes: epoch seconds and duration as doubles, the
+    success rating as a float, turn and frustration as small unsigned ints,
+    the technique as a one-byte code into ``categories`` and the hour it
+    falls in (hours since 1970) for day and hour bucketing.
+    """
+
+    def __init__(self):
+        self.epoch = array('d')         # naive local seconds since 1970, NaN if unparseable
+        self.duration = array('d')
+        self.rating = array('f')
+        self.turn = array('I')
+        self.frustration = array('B')
+        self.technique = array('B')     # code into self.categories
+        self.hour_slot = array('i')     # int(epoch // 3600), NO_SLOT if unparseable
+        self.categories: List[str] = []
+        self._codes: Dict[str, int] = {}
+        self._grouped_cache: Tuple[int, int, Dict] = (-1, -1, {})
+
+    def __len__(self) -> int:
+        return len(self.epoch)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the column buffers"""
+        return sum(column.itemsize * len(column) for column in
+                   (self.epoch, self.duration, self.rating, self.turn, self.frustration,
+                    self.technique, self.hour_slot))
+
+    def _code(self, technique: str) -> int:
+        code = self._codes.get(technique)
+        if code is None:
+            code = self._codes[technique] = len(self.categories)
+            self.categories.append(technique)
+            if code == 256 and self.technique.typecode == 'B':
+                self.technique = array('H', self.technique)
+        return code
+
+    def append(self, conversation: Dict[str, Any]):
+        """Add one CSV row or log_conversation dict"""
+        self.extend((conversation,))
+
+    def extend(self, rows: Iterable[Dict[str, Any]]):
+        """Add many CSV rows or log_conversation dicts"""
+        for row in rows:
+            self._append_epoch(_parse_timestamp(row.get('timestamp'))[0])
+            self.duration.append(_to_float(row.get('duration_minutes', 0)))
+            self.rating.append(_to_float(row.get('success_rating', 0)))
+            self.turn.append(_clamp_int(row.get('conversation_turn', 0), 0xFFFFFFFF))
+            self.frustration.append(_clamp_int(row.get('scammer_frustration_level', 0), 0xFF))
+            self.technique.append(self._code(row.get('technique_type') or 'unknown'))
+
+    def extend_csv(self, header: Sequence[str], rows: Iterable[Sequence[str]]):
+        """Add raw CSV value lists without building a dict per row"""
+        index = {name: position for position, name in enumerate(header)}
+        positions = [index.get(COLUMN_FIELDS[name]) for name in
+                     ('epoch', 'duration', 'rating', 'turn', 'frustration')]
+        technique_at = index.get('technique_type')
+        width = len(header)
+
+        epoch_at, duration_at, rating_at, turn_at, frustration_at = positions
+        for values in rows:
+            if len(values) < width:
+                values = list(values) + [''] * (width - len(values))
+            self._append_epoch(_parse_timestamp(values[epoch_at])[0] if epoch_at is not None else None)
+            self.duration.append(_to_float(values[duration_at]) if duration_at is not None else 0.0)
+            self.rating.append(_to_float(values[rating_at]) if rating_at is not None else 0.0)
+            self.turn.append(_clamp_int(values[turn_at], 0xFFFFFFFF) if turn_at is not None else 0)
+            self.frustration.append(_clamp_int(values[frustration_at], 0xFF) if frustration_at is not None else 0)
+            technique = values[technique_at] if technique_at is not None else ''
+            self.technique.append(self._code(technique or 'unknown'))
+
+    def _append_epoch(self, epoch: Optional[float]):
+        if epoch is None:
+            self.epoch.append(_NAN)
+            self.hour_slot.append(NO_SLOT)
+        else:
+            self.epoch.append(epoch)
+            self.hour_slot.append(int(epoch // 3600))
+
+    def grouped(self, start: int = 0) -> Dict[Tuple[Optional[date], Optional[int], str], List]:
+        """[count, minutes, successes] per (day, hour, technique)
+
+        Rows whose timestamp did not parse are grouped under day and hour
+        ``None``.  This is the shape ``StatsAggregator.add_table`` folds in.
+        """
+        cached_start, cached_length, groups = self._grouped_cache
+        if (cached_start, cached_length) == (start, len(self)):
+            return groups
+
+        if len(self) <= start:
+            groups = {}
+        elif numpy_module() is not None:
+            groups = self._grouped_numpy(start)
+        else:
+            groups = self._grouped_arrays(start)
+        self._grouped_cache = (start, len(self), groups)
+        return groups
+
+    def _grouped_arrays(self, start: int) -> Dict[Tuple[Optional[date], Optional[int], str], List]:
+        # Counting and filtering run in C (Counter over zip, compress); only the
+        # duration sums need a Python-level loop
+        keys = list(zip(self.hour_slot[start:], self.technique[start:]))
+        counts = Counter(keys)
+        wins = Counter(compress(keys, map(float(SUCCESS_THRESHOLD).__lt__, self.rating[start:])))
+        minutes = dict.fromkeys(counts, 0.0)
+        for key, duration in zip(keys, self.duration[start:]):
+            minutes[key] += duration
+        return {self._decode(slot, code): [count, minutes[(slot, code)], wins[(slot, code)]]
+                for (slot, code), count in counts.items()}
+
+    def _grouped_numpy(self, start: int) -> Dict[Tuple[Optional[date], Optional[int], str], List]:
+        np = numpy_module()
+        slots = np.frombuffer(self.hour_slot, dtype=np.int32)[start:].astype(np.int64)
+        codes = np.frombuffer(self.technique, dtype=self.technique.typecode)[start:].astype(np.int64)
+        duration = np.frombuffer(self.duration, dtype=np.float64)[start:]
+        success = np.frombuffer(self.rating, dtype=np.float32)[start:] > SUCCESS_THRESHOLD
+
+        # One integer key per (hour slot, technique)
+        categories = max(1, len(self.categories))
+        unique, inverse = np.unique(slots * categories + codes, return_inverse=True)
+        counts = np.bincount(inverse)
+        minutes = np.bincount(inverse, weights=duration)
+        successes = np.bincount(inverse, weights=success)
+
+        groups = {}
+        for key, count, total, wins in zip(unique.tolist(), counts.tolist(), minutes.tolist(), successes.tolist()):
+            slot, code = divmod(key, categories)
+            groups[self._decode(slot, code)] = [count, total, int(wins)]
+        return groups
+
+    def _decode(self, slot: int, code: int) -> Tuple[Optional[date], Optional[int], str]:
+        if slot == NO_SLOT:
+            return None, None, self.categories[code]
+        day_number, hour = divmod(slot, 24)
+        return _EPOCH_DAY + timedelta(days=day_number), hour, self.categories[code]
@@ -0,0 +1,125 @@
+"""
+Tail-Following CSV Reader
+Incrementally parses rows appended to a CSV log, resuming from a byte offset
+"""
+import csv
+import io
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class CSVTailReader:
+    """Parse only the rows appended to a CSV file since the last call
+
+    The reader remembers the byte offset it has consumed up to together
+    with the file's inode and size.  A different inode (the file was
+    rotated or replaced) or a size below the offset (it was truncated,
+    e.g. by ``copytruncate``) makes it start over at byte zero of the new
+    file.  The known header is kept across a reset, since an appender that
+    already wrote it will not repeat it after a truncation.  A trailing
+    line without its newline is left for the next call, so rows that are
+    still being written are never half-parsed.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.offset = 0
+        self.inode: Optional[int] = None
+        self.size = 0
+        self.header: Optional[List[str]] = None
+        self._lock = threading.Lock()
+        self.stats = {'reads': 0, 'rows': 0, 'bytes': 0, 'resets': 0}
+
+    def read_rows(self, max_bytes: int = 4 << 20) -> Tuple[Optional[List[str]], List[List[str]]]:
+        """Header plus raw value lists for up to ``max_bytes`` of newly appended data"""
+        with self._lock:
+            try:
+                st = os.stat(self.path)
+            except FileNotFoundError:
+                return self.header, []
+
+            if st.st_ino != self.inode or st.st_size < self.offset:
+                if self.inode is not None:
+                    self.stats['resets'] += 1
+                self.inode = st.st_ino
+                self.offset = 0
+            self.size = st.st_size
+
+            if st.st_size == self.offset:
+                return self.header, []
+
+            with open(self.path, 'rb') as f:
+                f.seek(self.offset)
+                chunk = f.read(min(st.st_size - self.offset, max_bytes))
+                end = chunk.rfind(b'\n') + 1
+                while not end and self.offset + len(chunk) < st.st_size:
+                    # A single row longer than max_bytes
+                    chunk += f.read(max_bytes)
+                    end = chunk.rfind(b'\n') + 1
+
+            if not end:
+                return self.header, []
+            at_start = self.offset == 0
+            self.offset += end
+            self.stats['reads'] += 1
+            self.stats['bytes'] += end
+
+            rows = []
+            lines = csv.reader(io.StringIO(chunk[:end].decode('utf-8'), newline=''))
+            if at_start:
+                first = next(lines, None)
+                if self.header is None:
+                    self.header = first
+                elif first and first != self.header:
+                    rows.append(first)
+            rows.extend(values for values in lines if values)
+            self.stats['rows'] += len(rows)
+            return self.header, rows
+
+    def checkpoint(self) -> Dict[str, Any]:
+        """Position to persist alongside whatever was built from the consumed rows"""
+        with self._lock:
+            return {'path': self.path, 'inode': self.inode, 'size': self.size,
+                    'offset': self.offset, 'header': self.header}
+
+    def restore(self, checkpoint: Dict[str, Any]) -> bool:
+        """Resume from a saved position; False if it no longer matches the file"""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+
+        if (checkpoint.get('path') != self.path or checkpoint.get('inode') != st.st_ino
+                or checkpoint.get('offset', 0) > st.st_size or not checkpoint.get('header')):
+            return False
+
+        # Same inode but rewritten from scratch: the header line gives it away
+        with open(self.path, 'r', newline='', encoding='utf-8') as f:
+            if next(csv.reader(f), None) != checkpoint['header']:
+                return False
+
+        with self._lock:
+            self.inode = st.st_ino
+            self.offset = checkpoint['offset']
+            self.size = checkpoint.get('size', self.offset)
+            self.header = checkpoint['header']
+        return True
+
+
+def load_checkpoint(path: str) -> Optional[Dict[str, Any]]:
+    """Read a sidecar checkpoint file, None if missing or unreadable"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_checkpoint(path: str, checkpoint: Dict[str, Any]):
+    """Atomically replace the sidecar checkpoint file"""
+    temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporary, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f)
+    os.replace(temporary, path)
@@ -0,0 +1,271 @@
+"""
+Shared Worker State for Scammer Waste Bot
+SQLite (WAL) backed counters and conversation sessions shared by every worker process
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from limits.storage import Storage
+
+SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS counters (
+        key TEXT PRIMARY KEY,
+        value INTEGER NOT NULL,
+        expires_at REAL NOT NULL
+    ) WITHOUT ROWID
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS sessions (
+        conversation_id TEXT PRIMARY KEY,
+        version INTEGER NOT NULL,
+        state TEXT NOT NULL,
+        updated_at REAL NOT NULL
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS turn_replies (
+        turn_id TEXT PRIMARY KEY,
+        status TEXT NOT NULL,
+        response TEXT,
+        created_at REAL NOT NULL
+    ) WITHOUT ROWID
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_counters_expiry ON counters (expires_at)',
+    'CREATE INDEX IF NOT EXISTS idx_sessions_updated ON sessions (updated_at)',
+    'CREATE INDEX IF NOT EXISTS idx_turn_replies_created ON turn_replies (created_at)',
+]
+
+# One statement, so the read-modify-write is atomic under SQLite's write lock
+INCREMENT_COUNTER = '''
+    INSERT INTO counters (key, value, expires_at) VALUES (:key, :amount, :expires_at)
+    ON CONFLICT(key) DO UPDATE SET
+        value = CASE WHEN counters.expires_at <= :now THEN excluded.value
+                     ELSE counters.value + excluded.value END,
+        expires_at = CASE WHEN counters.expires_at <= :now THEN excluded.expires_at
+                          ELSE counters.expires_at END
+    RETURNING value
+'''
+
+# Compare-and-set: a snapshot only replaces the version it was built from
+CREATE_SESSION = '''
+    INSERT INTO sessions (conversation_id, version, state, updated_at) VALUES (?, 1, ?, ?)
+    ON CONFLICT(conversation_id) DO NOTHING
+    RETURNING version
+'''
+
+UPDATE_SESSION = '''
+    UPDATE sessions SET version = version + 1, state = ?, updated_at = ?
+    WHERE conversation_id = ? AND version = ?
+    RETURNING version
+'''
+
+
+class SharedStateStore:
+    """Counters and session snapshots in one SQLite file shared across processes
+
+    Voice turns that finish in one worker leave their outcome in
+    ``turn_replies`` for whichever worker Twilio sends the reply webhook
+    to; unclaimed outcomes older than ``reply_ttl_seconds`` are purged.
+    Connections are per thread and in autocommit mode, the database runs
+    in WAL mode, and every update is a single statement (an upsert for
+    counters, a compare-and-set on the version for sessions), so concurrent
+    workers never lose an increment or a turn and readers are never
+    blocked by a writer.  Expired counters are purged every
+    ``purge_every`` increments.
+    """
+
+    def __init__(self, db_path: str, busy_timeout: float = 5.0, purge_every: int = 1000,
+                 reply_ttl_seconds: float = 300.0):
+        self.db_path = db_path
+        self.busy_timeout = busy_timeout
+        self.purge_every = purge_every
+        self.reply_ttl_seconds = reply_ttl_seconds
+        self._local = threading.local()
+        self._increments = 0
+        self._replies = 0
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        for statement in SCHEMA:
+            conn.execute(statement)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    # -- counters ----------------------------------------------------------------
+
+    def incr(self, key: str, expiry: float, amount: int = 1) -> int:
+        """Atomically add ``amount`` to a counter that resets ``expiry`` seconds after it starts"""
+        now = time.time()
+        value = self._connection().execute(INCREMENT_COUNTER, {
+            'key': key, 'amount': amount, 'expires_at': now + expiry, 'now': now
+        }).fetchone()[0]
+
+        self._increments += 1
+        if self.purge_every and self._increments % self.purge_every == 0:
+            self.purge_expired()
+        return value
+
+    def try_lease(self, name: str, seconds: float) -> bool:
+        """True for exactly one caller across all workers per ``seconds`` window"""
+        return self.incr(f'lease:{name}', seconds) == 1
+
+    def release_lease(self, name: str):
+        """Give a lease back before its window ends"""
+        self.clear(f'lease:{name}')
+
+    def get(self, key: str) -> int:
+        row = self._connection().execute(
+            'SELECT value FROM counters WHERE key = ? AND expires_at > ?', (key, time.time())
+        ).fetchone()
+        return row[0] if row else 0
+
+    def get_expiry(self, key: str) -> float:
+        row = self._connection().execute(
+            'SELECT expires_at FROM counters WHERE key = ? AND expires_at > ?', (key, time.time())
+        ).fetchone()
+        return row[0] if row else time.time()
+
+    def clear(self, key: str):
+        self._connection().execute('DELETE FROM counters WHERE key = ?', (key,))
+
+    def reset_counters(self) -> int:
+        return self._connection().execute('DELETE FROM counters').rowcount
+
+    def purge_expired(self) -> int:
+        return self._connection().execute('DELETE FROM counters WHERE expires_at <= ?', (time.time(),)).rowcount
+
+    # -- conversation sessions ---------------------------------------------------
+
+    def load_session(self, conversation_id: str, known_version: int = 0) -> Optional[Tuple[int, Dict[str, Any]]]:
+        """(version, state) if the stored session differs from ``known_version``, else None
+
+        A session deleted since ``known_version`` comes back as ``(0, None)``.
+        The state is only fetched and decoded when the version has moved.
+        """
+        row = self._connection().execute(
+            'SELECT version, CASE WHEN version != ? THEN state END FROM sessions WHERE conversation_id = ?',
+            (known_version, conversation_id)
+        ).fetchone()
+        if row is None:
+            return (0, None) if known_version else None
+        if row[0] == known_version:
+            return None
+        return row[0], json.loads(row[1])
+
+    def save_session(self, conversation_id: str, state: Dict[str, Any], expected_version: int = 0) -> Optional[int]:
+        """Store a snapshot built from ``expected_version``; returns its new version
+
+        Returns None without writing if another worker has saved (or deleted)
+        the session since, so a concurrent turn is never silently overwritten.
+        """
+        if expected_version:
+            row = self._connection().execute(
+                UPDATE_SESSION, (json.dumps(state), time.time(), conversation_id, expected_version)
+            ).fetchone()
+        else:
+            row = self._connection().execute(
+                CREATE_SESSION, (conversation_id, json.dumps(state), time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def delete_session(self, conversation_id: str) -> bool:
+        return self._connection().execute(
+            'DELETE FROM sessions WHERE conversation_id = ?', (conversation_id,)
+        ).rowcount > 0
+
+    def sweep_sessions(self, max_idle_seconds: float) -> int:
+        return self._connection().execute(
+            'DELETE FROM sessions WHERE updated_at < ?', (time.time() - max_idle_seconds,)
+        ).rowcount
+
+    def session_count(self) -> int:
+        return self._connection().execute('SELECT COUNT(*) FROM sessions').fetchone()[0]
+
+    # -- voice turn outcomes -------------------------------------------------------
+
+    def put_turn_reply(self, turn_id: str, status: str, response: Optional[str] = None):
+        """Record how a background voice turn ended (its reply, or why there is none)"""
+        now = time.time()
+        self._connection().execute(
+            'INSERT OR REPLACE INTO turn_replies (turn_id, status, response, created_at) VALUES (?, ?, ?, ?)',
+            (turn_id, status, response, now)
+        )
+        self._replies += 1
+        if self.purge_every and self._replies % self.purge_every == 0:
+            self._connection().execute(
+                'DELETE FROM turn_replies WHERE created_at < ?', (now - self.reply_ttl_seconds,)
+            )
+
+    def take_turn_reply(self, turn_id: str) -> Optional[Tuple[str, Optional[str]]]:
+        """(status, response) for a finished turn, removed as it is read; None if not finished yet"""
+        # Polled while the turn runs, so only a hit takes the write lock
+        conn = self._connection()
+        row = conn.execute('SELECT status, response FROM turn_replies WHERE turn_id = ?', (turn_id,)).fetchone()
+        if row is not None:
+            conn.execute('DELETE FROM turn_replies WHERE turn_id = ?', (turn_id,))
+        return row
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class SQLiteLimiterStorage(Storage):
+    """flask-limiter / ``limits`` storage on a SharedStateStore
+
+    Registered for the ``sqlite`` scheme: ``sqlite:///relative/path.db`` or
+    ``sqlite:////absolute/path.db``.  Supports the fixed-window strategy
+    (the flask-limiter default).
+    """
+
+    STORAGE_SCHEME = ['sqlite']
+
+    def __init__(self, uri: str, wrap_exceptions: bool = False, **options: Any):
+        path = uri.split(':///', 1)[1] if ':///' in uri else ''
+        if not path:
+            raise ValueError(f"sqlite storage needs a database path, got {uri!r}")
+        self.store = SharedStateStore(path, busy_timeout=float(options.get('busy_timeout', 5.0)))
+        super().__init__(uri, wrap_exceptions=wrap_exceptions)
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def incr(self, key: str, expiry: int, amount: int = 1) -> int:
+        return self.store.incr(key, expiry, amount)
+
+    def get(self, key: str) -> int:
+        return self.store.get(key)
+
+    def get_expiry(self, key: str) -> float:
+        return self.store.get_expiry(key)
+
+    def check(self) -> bool:
+        try:
+            self.store.get('__health__')
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self) -> Optional[int]:
+        return self.store.reset_counters()
+
+    def clear(self, key: str) -> None:
+        self.store.clear(key)
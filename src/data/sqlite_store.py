@@ -0,0 +1,289 @@
+"""
+SQLite Analytics Store for Scammer Waste Bot
+Persists conversation events and messages to scammer_waste.db
+"""
+import os
+import sqlite3
+import threading
+from datetime import date, datetime
+from typing import Dict, List, Any, Optional, Tuple
+
+from utils.log_writer import BufferedLogWriter, get_log_writer
+
+SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS conversations (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        scammer_id TEXT UNIQUE,
+        start_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        last_update TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        message_count INTEGER DEFAULT 0,
+        time_wasted INTEGER DEFAULT 0,
+        personality TEXT DEFAULT 'confused_grandpa',
+        frustration_level INTEGER DEFAULT 0,
+        success_score REAL DEFAULT 0.0,
+        status TEXT DEFAULT 'active'
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS messages (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        conversation_id TEXT,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        message_type TEXT,
+        content TEXT,
+        response_time REAL,
+        ai_confidence REAL
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS analytics (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        date TEXT,
+        total_conversations INTEGER,
+        time_wasted INTEGER,
+        success_rate REAL,
+        top_strategies TEXT,
+        geographic_data TEXT
+    )
+    ''',
+    # One row per log_conversation() call - the same events the CSV log holds
+    '''
+    CREATE TABLE IF NOT EXISTS conversation_events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        conversation_id TEXT,
+        timestamp TEXT,
+        duration_minutes REAL DEFAULT 0,
+        technique_type TEXT DEFAULT 'unknown',
+        success_rating REAL DEFAULT 0,
+        conversation_turn INTEGER DEFAULT 0,
+        frustration_level INTEGER DEFAULT 0,
+        response_time_seconds REAL
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_events_timestamp ON conversation_events (timestamp)',
+    'CREATE INDEX IF NOT EXISTS idx_events_technique ON conversation_events (technique_type)',
+    'CREATE INDEX IF NOT EXISTS idx_events_conversation ON conversation_events (conversation_id)',
+    'CREATE INDEX IF NOT EXISTS idx_messages_conversation ON messages (conversation_id)',
+    'CREATE INDEX IF NOT EXISTS idx_messages_timestamp ON messages (timestamp)',
+]
+
+INSERT_EVENT = '''
+    INSERT INTO conversation_events (
+        conversation_id, timestamp, duration_minutes, technique_type,
+        success_rating, conversation_turn, frustration_level, response_time_seconds
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+UPSERT_CONVERSATION = '''
+    INSERT INTO conversations (
+        scammer_id, last_update, message_count, time_wasted, frustration_level, success_score
+    ) VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(scammer_id) DO UPDATE SET
+        last_update = excluded.last_update,
+        message_count = excluded.message_count,
+        time_wasted = excluded.time_wasted,
+        frustration_level = excluded.frustration_level,
+        success_score = excluded.success_score
+'''
+
+INSERT_MESSAGE = '''
+    INSERT INTO messages (conversation_id, timestamp, message_type, content, response_time, ai_confidence)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+
+SUCCESS_THRESHOLD = 7
+
+
+def _number(value: Any, default: float = 0) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+class SQLiteAnalyticsStore:
+    """Analytics storage backed by the production SQLite database
+
+    Every thread gets its own connection (SQLite connections are not shared
+    across threads) and the database runs in WAL mode so readers never block
+    the writer.  Writes are queued on the shared background log writer, which
+    hands them back in group commits that land as ``executemany`` batches in
+    a single transaction.
+    """
+
+    def __init__(self, db_path: str, writer: Optional[BufferedLogWriter] = None):
+        self.db_path = db_path
+        self._writer = writer
+        self._local = threading.local()
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.init_schema()
+
+    @property
+    def writer(self) -> BufferedLogWriter:
+        if self._writer is None:
+            self._writer = get_log_writer()
+        return self._writer
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def init_schema(self):
+        """Create tables and indexes if they do not exist yet"""
+        conn = self._connection()
+        with conn:
+            for statement in SCHEMA:
+                conn.execute(statement)
+
+    # ------------------------------------------------------------------ writes
+
+    def add_events(self, batch: List[Dict[str, Any]]):
+        """Queue several log_conversation() events"""
+        for conversation_data in batch:
+            self.add_event(conversation_data)
+
+    def add_event(self, conversation_data: Dict[str, Any]):
+        """Queue one log_conversation() event for the next group commit"""
+        conversation_id = str(conversation_data.get('conversation_id', 'unknown'))
+        timestamp = conversation_data.get('timestamp') or datetime.now().isoformat()
+        duration = _number(conversation_data.get('duration_minutes'))
+        success = _number(conversation_data.get('success_rating'))
+        turn = int(_number(conversation_data.get('conversation_turn')))
+        frustration = int(_number(conversation_data.get('scammer_frustration_level')))
+
+        self.writer.submit(self, ('event', (
+            conversation_id, timestamp, duration,
+            conversation_data.get('technique_type') or 'unknown',
+            success, turn, frustration,
+            _number(conversation_data.get('response_time_seconds'), None)
+        ), (conversation_id, timestamp, turn, duration, frustration, success)))
+
+    def add_interaction(self, conversation_id: Optional[str], interaction: Dict[str, Any]):
+        """Queue the scammer message and bot reply of one engine turn"""
+        conversation_id = conversation_id or 'unknown'
+        timestamp = interaction['timestamp']
+        self.writer.submit(self, ('messages', (
+            (conversation_id, timestamp, 'scammer', interaction['scammer_message'], None, None),
+            (conversation_id, timestamp, 'bot', interaction['bot_response'], None, None)
+        ), None))
+
+    def write_batch(self, records: List[tuple]):
+        """Commit one group of queued writes in a single transaction (writer thread)"""
+        events = []
+        conversations = {}
+        messages = []
+        for kind, rows, conversation in records:
+            if kind == 'event':
+                events.append(rows)
+                # Only the latest state of each conversation needs to reach the table
+                conversations[conversation[0]] = conversation
+            else:
+                messages.extend(rows)
+
+        conn = self._connection()
+        with conn:
+            if events:
+                conn.executemany(INSERT_EVENT, events)
+            if conversations:
+                conn.executemany(UPSERT_CONVERSATION, list(conversations.values()))
+            if messages:
+                conn.executemany(INSERT_MESSAGE, messages)
+
+    def flush(self, durability: str):
+        """Sink hook run after each group commit; the transaction is already durable"""
+
+    # ----------------------------------------------------------------- queries
+
+    def snapshot(self, since: date) -> Tuple[int, Dict[str, Any], Dict[date, Dict[str, Any]], Dict[int, Dict[str, Any]]]:
+        """(last event id, totals, daily summaries, hourly summaries) read from one consistent snapshot"""
+        conn = self._connection()
+        conn.execute('BEGIN')  # a WAL read transaction: later commits stay invisible until it ends
+        try:
+            last_id = self.last_event_id()
+            return last_id, self.totals(), self.daily_summaries(since), self.hourly_summaries()
+        finally:
+            conn.execute('COMMIT')
+
+    def last_event_id(self) -> int:
+        return self._connection().execute('SELECT COALESCE(MAX(id), 0) FROM conversation_events').fetchone()[0]
+
+    def events_after(self, last_id: int, limit: int = 10000) -> List[Dict[str, Any]]:
+        """Events committed (by any worker) after ``last_id``, oldest first"""
+        cursor = self._connection().execute(
+            'SELECT id, timestamp, duration_minutes, technique_type, success_rating '
+            'FROM conversation_events WHERE id > ? ORDER BY id LIMIT ?',
+            (last_id, limit)
+        )
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def totals(self) -> Dict[str, Any]:
+        """Overall event count, duration, successes and technique counts"""
+        conn = self._connection()
+        count, duration, successes = conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(duration_minutes), 0), COALESCE(SUM(success_rating > ?), 0) '
+            'FROM conversation_events', (SUCCESS_THRESHOLD,)
+        ).fetchone()
+        techniques = dict(conn.execute(
+            'SELECT technique_type, COUNT(*) FROM conversation_events GROUP BY technique_type'
+        ).fetchall())
+        return {
+            'conversations': count,
+            'time_wasted_minutes': duration,
+            'successes': successes,
+            'techniques': techniques
+        }
+
+    def daily_summaries(self, since: date) -> Dict[date, Dict[str, Any]]:
+        """Per-day, per-technique counters for every event on or after ``since``"""
+        rows = self._connection().execute(
+            'SELECT substr(timestamp, 1, 10) AS day, technique_type, COUNT(*), '
+            'SUM(duration_minutes), SUM(success_rating > ?) '
+            'FROM conversation_events WHERE timestamp >= ? '
+            'GROUP BY day, technique_type',
+            (SUCCESS_THRESHOLD, since.isoformat())
+        ).fetchall()
+
+        days: Dict[date, Dict[str, Any]] = {}
+        for day, technique, count, duration, successes in rows:
+            try:
+                key = date.fromisoformat(day)
+            except (TypeError, ValueError):
+                continue
+            summary = days.setdefault(key, {
+                'conversations': 0, 'time_wasted_minutes': 0.0, 'successes': 0, 'techniques': {}
+            })
+            summary['conversations'] += count
+            summary['time_wasted_minutes'] += duration or 0
+            summary['successes'] += successes or 0
+            summary['techniques'][technique] = count
+        return days
+
+    def hourly_summaries(self) -> Dict[int, Dict[str, Any]]:
+        """Event count and total duration per hour of day"""
+        rows = self._connection().execute(
+            'SELECT CAST(substr(timestamp, 12, 2) AS INTEGER) AS hour, COUNT(*), SUM(duration_minutes) '
+            'FROM conversation_events WHERE length(timestamp) >= 13 GROUP BY hour'
+        ).fetchall()
+        return {
+            hour: {'conversations': count, 'time_wasted_minutes': duration or 0}
+            for hour, count, duration in rows
+            if hour is not None and 0 <= hour < 24
+        }
+
+    def close(self):
+        """Close this thread's connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
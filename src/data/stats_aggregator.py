@@ -0,0 +1,287 @@
+"""
+Incremental Statistics Aggregator for Scammer Waste Bot
+Running totals and time buckets updated as conversations are logged
+"""
+import threading
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Dict, Any, Iterable, List, NamedTuple, Optional, Tuple
+
+SUCCESS_THRESHOLD = 7  # success_rating above this counts as a successful conversation
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _to_float(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class ParsedConversation(NamedTuple):
+    """One logged conversation with its timestamp decoded exactly once"""
+    epoch: Optional[float]  # naive local seconds since 1970-01-01, None if unparseable
+    day: Optional[date]
+    hour: int
+    duration: float
+    success: bool
+    technique: str
+
+
+# Logs hold a handful of distinct dates, so the date part of the timestamp is
+# decoded once per date instead of once per row
+_day_cache: Dict[str, Tuple[date, float]] = {}
+
+
+def _parse_timestamp(timestamp: Any) -> Tuple[Optional[float], Optional[date], int]:
+    if not isinstance(timestamp, str):
+        return None, None, 0
+
+    # Fast path for datetime.isoformat() output: YYYY-MM-DD[T ]HH:MM:SS...
+    if len(timestamp) >= 19 and timestamp[10] in 'T ':
+        cached = _day_cache.get(timestamp[:10])
+        try:
+            if cached is None:
+                day = date.fromisoformat(timestamp[:10])
+                if len(_day_cache) > 4096:
+                    _day_cache.clear()
+                cached = _day_cache[timestamp[:10]] = (day, (day - _EPOCH.date()).days * 86400.0)
+            hour = int(timestamp[11:13])
+            seconds = hour * 3600 + int(timestamp[14:16]) * 60 + float(timestamp[17:19])
+            if hour < 24:
+                return cached[1] + seconds, cached[0], hour
+        except ValueError:
+            pass
+
+    try:
+        parsed = datetime.fromisoformat(timestamp)
+    except ValueError:
+        return None, None, 0
+    naive = parsed.replace(tzinfo=None)
+    return (naive - _EPOCH).total_seconds(), parsed.date(), parsed.hour
+
+
+def parse_conversation(conversation: Dict[str, Any]) -> ParsedConversation:
+    """Decode a CSV row or log_conversation dict into typed fields"""
+    epoch, day, hour = _parse_timestamp(conversation.get('timestamp'))
+    return ParsedConversation(
+        epoch, day, hour,
+        _to_float(conversation.get('duration_minutes', 0)),
+        _to_float(conversation.get('success_rating', 0)) > SUCCESS_THRESHOLD,
+        conversation.get('technique_type') or 'unknown'
+    )
+
+
+class _Bucket:
+    """Counters for one slice of conversations (a day or an hour of day)"""
+
+    __slots__ = ('conversations', 'duration_minutes', 'successes', 'techniques')
+
+    def __init__(self):
+        self.conversations = 0
+        self.duration_minutes = 0.0
+        self.successes = 0
+        self.techniques = Counter()
+
+    def add(self, duration: float, success: bool, technique: str):
+        self.conversations += 1
+        self.duration_minutes += duration
+        self.successes += success
+        self.techniques[technique] += 1
+
+    def add_group(self, count: int, duration: float, successes: int, technique: str):
+        self.conversations += count
+        self.duration_minutes += duration
+        self.successes += successes
+        self.techniques[technique] += count
+
+
+class StatsAggregator:
+    """In-memory running aggregates over every logged conversation
+
+    Each logged conversation is folded into overall totals, one per-day
+    bucket and one hour-of-day bucket, so reading stats never touches the
+    raw history.  Day buckets older than ``retention_days`` are pruned since
+    no report looks further back than the 30-day trend window.
+    """
+
+    def __init__(self, retention_days: int = 31):
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+        self.total = _Bucket()
+        self.days: Dict[date, _Bucket] = {}
+        self.hours: List[_Bucket] = [_Bucket() for _ in range(24)]
+        self._newest_day: Optional[date] = None
+
+    def add(self, conversation: Dict[str, Any]):
+        """Fold one logged conversation (CSV row or log_conversation dict) into the totals"""
+        record = parse_conversation(conversation)
+        with self._lock:
+            self._add_parsed(record)
+
+    def add_many(self, rows: Iterable[Dict[str, Any]]):
+        """Fold a batch of conversations in one pass, parsing each row once
+
+        Rows are first grouped by (day, hour, technique) so the buckets are
+        touched once per group rather than once per row.
+        """
+        groups: Dict[Tuple[Optional[date], int, str], List] = {}
+        for row in rows:
+            _, day, hour = _parse_timestamp(row.get('timestamp'))
+            key = (day, hour, row.get('technique_type') or 'unknown')
+            duration = _to_float(row.get('duration_minutes', 0))
+            success = _to_float(row.get('success_rating', 0)) > SUCCESS_THRESHOLD
+            group = groups.get(key)
+            if group is None:
+                groups[key] = [1, duration, int(success)]
+            else:
+                group[0] += 1
+                group[1] += duration
+                group[2] += success
+
+        with self._lock:
+            for (day, hour, technique), (count, duration, successes) in groups.items():
+                self._add_group(day, hour, technique, count, duration, successes)
+
+    def add_table(self, table, start: int = 0):
+        """Fold rows ``start:`` of a ConversationTable using its grouped column aggregates"""
+        groups = table.grouped(start)
+        with self._lock:
+            for (day, hour, technique), (count, duration, successes) in groups.items():
+                self._add_group(day, hour or 0, technique, count, duration, successes)
+
+    def _add_parsed(self, record: ParsedConversation):
+        self._add_group(record.day, record.hour, record.technique,
+                        1, record.duration, int(record.success))
+
+    def _add_group(self, day: Optional[date], hour: int, technique: str,
+                   count: int, duration: float, successes: int):
+        self.total.add_group(count, duration, successes, technique)
+        if day is None:
+            return
+
+        self.hours[hour].add_group(count, duration, successes, technique)
+
+        if self._newest_day is None or day > self._newest_day:
+            self._newest_day = day
+            self._prune_days()
+        elif day < self._newest_day - timedelta(days=self.retention_days):
+            return
+
+        bucket = self.days.get(day)
+        if bucket is None:
+            bucket = self.days[day] = _Bucket()
+        bucket.add_group(count, duration, successes, technique)
+
+    def seed(self, totals: Dict[str, Any], days: Dict[date, Dict[str, Any]],
+             hours: Dict[int, Dict[str, Any]]):
+        """Load pre-aggregated counters (e.g. GROUP BY results from the SQLite store)"""
+        with self._lock:
+            self.total = self._bucket_from(totals)
+            self.days = {day: self._bucket_from(summary) for day, summary in days.items()}
+            self.hours = [self._bucket_from(hours.get(hour, {})) for hour in range(24)]
+            self._newest_day = max(self.days) if self.days else None
+            if self._newest_day is not None:
+                self._prune_days()
+
+    def to_state(self) -> Dict[str, Any]:
+        """JSON-serializable copy of every counter, for checkpointing"""
+        def dump(bucket: _Bucket) -> List[Any]:
+            return [bucket.conversations, bucket.duration_minutes, bucket.successes,
+                    dict(bucket.techniques)]
+
+        with self._lock:
+            return {
+                'total': dump(self.total),
+                'days': {day.isoformat(): dump(bucket) for day, bucket in self.days.items()},
+                'hours': [dump(bucket) for bucket in self.hours]
+            }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any], retention_days: int = 31) -> 'StatsAggregator':
+        """Rebuild an aggregator saved with ``to_state()``"""
+        def load(values: List[Any]) -> _Bucket:
+            bucket = _Bucket()
+            bucket.conversations, bucket.duration_minutes, bucket.successes, techniques = values
+            bucket.techniques.update(techniques)
+            return bucket
+
+        aggregator = cls(retention_days)
+        aggregator.total = load(state['total'])
+        aggregator.days = {date.fromisoformat(day): load(values) for day, values in state['days'].items()}
+        aggregator.hours = [load(values) for values in state['hours']]
+        aggregator._newest_day = max(aggregator.days) if aggregator.days else None
+        if aggregator._newest_day is not None:
+            aggregator._prune_days()
+        return aggregator
+
+    @staticmethod
+    def _bucket_from(summary: Dict[str, Any]) -> _Bucket:
+        bucket = _Bucket()
+        bucket.conversations = summary.get('conversations', 0)
+        bucket.duration_minutes = summary.get('time_wasted_minutes', 0.0)
+        bucket.successes = summary.get('successes', 0)
+        bucket.techniques.update(summary.get('techniques', {}))
+        return bucket
+
+    def _prune_days(self):
+        cutoff = self._newest_day - timedelta(days=self.retention_days)
+        for day in [d for d in self.days if d < cutoff]:
+            del self.days[day]
+
+    @property
+    def total_conversations(self) -> int:
+        return self.total.conversations
+
+    def overview(self) -> Dict[str, Any]:
+        """Overall counts, duration and technique frequencies"""
+        with self._lock:
+            return {
+                'conversations': self.total.conversations,
+                'time_wasted_minutes': self.total.duration_minutes,
+                'successes': self.total.successes,
+                'techniques': dict(self.total.techniques)
+            }
+
+    def day_range(self, first_day: date, last_day: date) -> Dict[str, Any]:
+        """Combined counters for every day in [first_day, last_day]"""
+        combined = _Bucket()
+        with self._lock:
+            day = first_day
+            while day <= last_day:
+                bucket = self.days.get(day)
+                if bucket is not None:
+                    combined.conversations += bucket.conversations
+                    combined.duration_minutes += bucket.duration_minutes
+                    combined.successes += bucket.successes
+                    combined.techniques.update(bucket.techniques)
+                day += timedelta(days=1)
+        return {
+            'conversations': combined.conversations,
+            'time_wasted_minutes': combined.duration_minutes,
+            'successes': combined.successes,
+            'techniques': dict(combined.techniques)
+        }
+
+    def daily_series(self, last_day: date, days: int) -> List[Dict[str, Any]]:
+        """Per-day counters for the ``days`` days ending on ``last_day``, oldest first"""
+        series = []
+        with self._lock:
+            for offset in range(days - 1, -1, -1):
+                day = last_day - timedelta(days=offset)
+                bucket = self.days.get(day) or _Bucket()
+                series.append({
+                    'date': day,
+                    'conversations': bucket.conversations,
+                    'time_wasted_minutes': bucket.duration_minutes,
+                    'successes': bucket.successes
+                })
+        return series
+
+    def hourly_histogram(self) -> List[Dict[str, Any]]:
+        """Conversation count and total duration for each hour of the day"""
+        with self._lock:
+            return [
+                {'conversations': bucket.conversations, 'time_wasted_minutes': bucket.duration_minutes}
+                for bucket in self.hours
+            ]
@@ -0,0 +1,73 @@
+"""
+Versioned Stats Cache
+Serialized stats snapshots keyed by the analytics write generation
+"""
+import hashlib
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class CachedPayload:
+    """One computed payload, its JSON body and strong ETag"""
+
+    __slots__ = ('version', 'payload', 'body', 'etag')
+
+    def __init__(self, version: Hashable, payload: Any, body: bytes):
+        self.version = version
+        self.payload = payload
+        self.body = body
+        self.etag = hashlib.sha1(body).hexdigest()[:20]
+
+
+class StatsCache:
+    """Cache of read-endpoint payloads invalidated by a version stamp
+
+    An entry is reused for as long as the caller passes the same
+    ``version`` (the analytics write generation plus the current date, so
+    "today" buckets roll over at midnight).  Concurrent misses on one key
+    are single-flighted: the first caller computes, the rest wait for it
+    and reuse the result.
+    """
+
+    def __init__(self, serialize: Callable[[Any], str]):
+        self.serialize = serialize
+        self._entries: Dict[str, CachedPayload] = {}
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'not_modified': 0}
+
+    def peek(self, key: str, version: Hashable) -> Optional[CachedPayload]:
+        """Current entry for ``key`` if it is still valid, without computing"""
+        entry = self._entries.get(key)
+        if entry is not None and entry.version == version:
+            return entry
+        return None
+
+    def get(self, key: str, version: Hashable, compute: Callable[[], Any]) -> CachedPayload:
+        entry = self.peek(key, version)
+        if entry is not None:
+            self.stats['hits'] += 1
+            return entry
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # Another request may have filled it while we waited
+            entry = self.peek(key, version)
+            if entry is not None:
+                self.stats['hits'] += 1
+                return entry
+
+            self.stats['misses'] += 1
+            payload = compute()
+            entry = CachedPayload(version, payload, self.serialize(payload).encode('utf-8'))
+            self._entries[key] = entry
+            return entry
+
+    def record_not_modified(self):
+        self.stats['not_modified'] += 1
+
+    def hit_ratio(self) -> float:
+        lookups = self.stats['hits'] + self.stats['misses']
+        return self.stats['hits'] / lookups if lookups else 0.0
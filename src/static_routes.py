@@ -1,39 +1,238 @@
 """
 Static file serving and frontend integration
+Indexed, precompressed assets with strong ETags, immutable caching for hashed bundles and Range support
 """
-from flask import Blueprint, send_from_directory, request, current_app
-import os
+from flask import Blueprint, Response, abort, current_app, request, send_file
+from werkzeug.security import safe_join
+import gzip
+import hashlib
 import mimetypes
+import os
+import re
+import threading
+import time
+from typing import Dict, Optional, Tuple
 
 static_bp = Blueprint('static', __name__)
 
+# Explicit types for what the React build emits; everything else goes through mimetypes
+MIME_TYPES = {
+    '.js': 'application/javascript',
+    '.mjs': 'application/javascript',
+    '.css': 'text/css',
+    '.map': 'application/json',
+    '.json': 'application/json',
+    '.html': 'text/html',
+    '.svg': 'image/svg+xml',
+    '.ico': 'image/x-icon',
+    '.txt': 'text/plain',
+    '.woff2': 'font/woff2',
+}
+
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml', 'image/x-icon')
+# Build hashes: Vite's 8-char base64url (index-CCMlvyCQ.css) or webpack's hex (main.3f9a2c1b.chunk.js).
+# The token must look like a hash, not a word, so site-settings.css is still revalidated.
+HASHED_NAME = re.compile(r'(?:-(?=[0-9]|.[^.]*[0-9A-Z])[A-Za-z0-9_-]{8}|\.(?=[a-f]*[0-9])[0-9a-f]{8,32}(?:\.chunk)?)\.[a-z0-9]+$')
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE = 'no-cache'
+MIN_COMPRESS_BYTES = 256
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def _compress(encoding: str, data: bytes) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(data, quality=11)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+class StaticAsset:
+    """One file under the static root with its cached representations"""
+
+    __slots__ = ('relpath', 'path', 'mimetype', 'size', 'mtime', 'etag', 'cache_control',
+                 'body', 'variants', 'checked_at')
+
+    def __init__(self, relpath: str, path: str, memory_limit: int):
+        self.relpath = relpath
+        self.path = path
+        extension = os.path.splitext(path)[1].lower()
+        self.mimetype = MIME_TYPES.get(extension) or mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        self.cache_control = IMMUTABLE_CACHE if HASHED_NAME.search(relpath) else REVALIDATE_CACHE
+
+        stat = os.stat(path)
+        self.size = stat.st_size
+        self.mtime = stat.st_mtime
+        digest = hashlib.sha1()
+        with open(path, 'rb') as f:
+            data = f.read()
+        digest.update(data)
+        self.etag = digest.hexdigest()[:20]
+        self.body = data if self.size <= memory_limit else None  # larger files stream from disk
+        self.variants: Dict[str, Optional[bytes]] = {}  # encoding -> bytes, or None if not worth it
+        self.checked_at = time.monotonic()
+
+    @property
+    def compressible(self) -> bool:
+        return self.size >= MIN_COMPRESS_BYTES and self.mimetype.startswith(COMPRESSIBLE_TYPES)
+
+    def is_stale(self) -> bool:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return True
+        return stat.st_mtime != self.mtime or stat.st_size != self.size
+
+    def read(self) -> bytes:
+        if self.body is not None:
+            return self.body
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+
+class StaticAssetIndex:
+    """In-memory index of the static root
+
+    Files are hashed once and small ones (``index.html``, the favicon, CSS)
+    are held in memory.  gzip and, when the ``brotli`` package is installed,
+    br variants are computed once per asset and kept only if they save at
+    least 10%.  Entries are re-stat'ed at most every ``check_interval``
+    seconds so a redeploy is picked up without a restart.
+    """
+
+    def __init__(self, root: str, memory_limit: int = 256 * 1024, check_interval: float = 2.0):
+        self.root = os.path.abspath(root)
+        self.memory_limit = memory_limit
+        self.check_interval = check_interval
+        self.encodings = ('br', 'gzip') if brotli is not None else ('gzip',)
+        self._assets: Dict[str, StaticAsset] = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'not_modified': 0, 'partial': 0, 'compressed': 0, 'reloads': 0}
+
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                path = os.path.join(directory, name)
+                relpath = os.path.relpath(path, self.root).replace(os.sep, '/')
+                self._assets[relpath] = StaticAsset(relpath, path, memory_limit)
+
+    def get(self, relpath: str) -> Optional[StaticAsset]:
+        """Look up an asset, indexing files added since startup and reloading changed ones"""
+        asset = self._assets.get(relpath)
+        now = time.monotonic()
+        if asset is not None and now - asset.checked_at < self.check_interval:
+            return asset
+
+        path = safe_join(self.root, relpath)
+        if path is None or not os.path.isfile(path):
+            if asset is not None:
+                with self._lock:
+                    self._assets.pop(relpath, None)
+            return None
+
+        if asset is None or asset.is_stale():
+            asset = StaticAsset(relpath, path, self.memory_limit)
+            with self._lock:
+                self._assets[relpath] = asset
+            self.stats['reloads'] += 1
+        asset.checked_at = now
+        return asset
+
+    def variant(self, asset: StaticAsset, encoding: str) -> Optional[bytes]:
+        """The ``encoding`` representation of an asset, compressed on first use"""
+        if encoding in asset.variants:
+            return asset.variants[encoding]
+        with self._lock:
+            if encoding not in asset.variants:
+                data = asset.read()
+                compressed = _compress(encoding, data)
+                asset.variants[encoding] = compressed if len(compressed) <= len(data) * 0.9 else None
+                self.stats['compressed'] += 1
+        return asset.variants[encoding]
+
+    def warm(self) -> int:
+        """Precompute every compressed variant; returns the number of assets compressed"""
+        count = 0
+        for asset in list(self._assets.values()):
+            if asset.compressible:
+                for encoding in self.encodings:
+                    self.variant(asset, encoding)
+                count += 1
+        return count
+
+    def negotiate(self, asset: StaticAsset, accept_encodings) -> Tuple[Optional[str], Optional[bytes]]:
+        """Best (encoding, body) the client accepts; (None, None) means identity"""
+        if not asset.compressible:
+            return None, None
+        for encoding in self.encodings:
+            if accept_encodings[encoding]:
+                body = self.variant(asset, encoding)
+                if body is not None:
+                    return encoding, body
+        return None, None
+
+    def serve(self, relpath: str) -> Response:
+        """Build the response for ``relpath`` in the current request"""
+        asset = self.get(relpath)
+        if asset is None:
+            abort(404)
+
+        encoding, body = self.negotiate(asset, request.accept_encodings)
+        if encoding is None and asset.body is None:
+            # Large identity body: stream the file (send_file handles Range and conditionals)
+            response = send_file(asset.path, mimetype=asset.mimetype, etag=asset.etag,
+                                 last_modified=asset.mtime, conditional=True)
+        else:
+            body = asset.body if encoding is None else body
+            response = current_app.response_class(body, mimetype=asset.mimetype)
+            # Strong ETags name one representation, so each encoding gets its own
+            response.set_etag(asset.etag if encoding is None else f"{asset.etag}-{encoding}")
+            response.last_modified = asset.mtime
+            if encoding is not None:
+                response.headers['Content-Encoding'] = encoding
+            response.make_conditional(request, accept_ranges=True, complete_length=len(body))
+
+        response.headers['Cache-Control'] = asset.cache_control
+        if asset.compressible:
+            response.vary.add('Accept-Encoding')
+
+        self.stats['hits'] += 1
+        if response.status_code == 304:
+            self.stats['not_modified'] += 1
+        elif response.status_code == 206:
+            self.stats['partial'] += 1
+        return response
+
+    def get_stats(self) -> Dict:
+        return {
+            'assets': len(self._assets),
+            'memory_bytes': sum(len(a.body or b'') + sum(len(v or b'') for v in a.variants.values())
+                                for a in list(self._assets.values())),
+            'encodings': list(self.encodings),
+            **self.stats
+        }
+
+
+def serve_static(relpath: str) -> Response:
+    """Serve a file through the app's StaticAssetIndex"""
+    return current_app.extensions['static_assets'].serve(relpath)
+
+
 @static_bp.route('/')
 def index():
     """Serve the main React application"""
-    return send_from_directory('/workspaces/waste-time/data/static', 'index.html')
+    return serve_static('index.html')
 
 @static_bp.route('/assets/<path:filename>')
 def assets(filename):
-    """Serve React build assets with proper MIME types"""
-    response = send_from_directory('/workspaces/waste-time/data/static/assets', filename)
-    
-    # Set proper MIME types for assets
-    if filename.endswith('.js'):
-        response.headers['Content-Type'] = 'application/javascript'
-    elif filename.endswith('.css'):
-        response.headers['Content-Type'] = 'text/css'
-    elif filename.endswith('.map'):
-        response.headers['Content-Type'] = 'application/json'
-    
-    # Enable caching for assets
-    response.headers['Cache-Control'] = 'public, max-age=31536000'  # 1 year
-    
-    return response
+    """Serve React build assets"""
+    return serve_static(f"assets/{filename}")
 
 @static_bp.route('/favicon.ico')
 def favicon():
     """Serve favicon"""
-    return send_from_directory('/workspaces/waste-time/data/static', 'favicon.ico')
+    return serve_static('favicon.ico')
 
 @static_bp.route('/<path:path>')
 def catch_all(path):
@@ -41,6 +240,6 @@ def catch_all(path):
     # If it's an API route, don't serve static files
     if path.startswith('api/'):
         return {'error': 'API endpoint not found'}, 404
-    
+
     # For all other routes, serve the React app
-    return send_from_directory('/workspaces/waste-time/data/static', 'index.html')
+    return serve_static('index.html')
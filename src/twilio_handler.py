@@ -0,0 +1,521 @@
+"""
+Twilio Voice Webhooks for Scammer Waste Bot
+/voice answers the call and /voice/gather runs one engine turn per recognized utterance
+"""
+import io
+import os
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, Mapping, Optional, Sequence, Tuple
+from urllib.parse import urlencode
+from xml.sax.saxutils import escape, quoteattr
+
+from flask import Blueprint, Response, abort, current_app, request, send_file
+
+from utils.admission import ADMITTED
+from utils.latency_sketch import get_latency_recorder
+
+voice_bp = Blueprint('voice', __name__)
+
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>'
+END_STATUSES = frozenset(['completed', 'busy', 'failed', 'no-answer', 'canceled'])
+
+GREETINGS = [
+    "Hello?",
+    "Hello? Who is this?",
+    "Yes, hello? Who's calling please?",
+    "Hello, dear. Sorry, I had to find the phone.",
+]
+STILL_THERE = [
+    "Hello? Are you still there?",
+    "I'm sorry, I didn't catch that. Could you say it again?",
+    "Hello? I think the line went funny.",
+]
+GOODBYE = "Well, I suppose they hung up. Goodbye then."
+PENDING_GRACE_SECONDS = 30.0  # beyond reply_timeout, before an unclaimed filler turn is dropped
+REPLY_POLL_SECONDS = 0.05
+STORE_REPLY_WAIT_SECONDS = 5.0  # longest a reply waits on another worker's turn (Twilio gives up at 15 s)
+
+# How a background turn ended, as recorded in the shared store
+TURN_DONE = 'done'
+TURN_SHED = 'shed'
+TURN_FAILED = 'failed'
+
+
+class TwiMLTemplates:
+    """TwiML documents assembled from prebuilt strings
+
+    The fixed parts of every document (header, <Gather> with its action
+    and timeouts, the redirect that re-prompts after silence) are built
+    once; a turn is ``head + fragment + tail``.  <Say> fragments are
+    memoized, so library responses are escaped once per process.
+    """
+
+    def __init__(self, gather_action: str, voice: str = 'Polly.Joanna', language: str = 'en-US',
+                 gather_timeout: int = 5, fragment_cache_size: int = 4096):
+        gather = (f'<Gather input="speech" action={quoteattr(gather_action)} method="POST" '
+                  f'language={quoteattr(language)} speechTimeout="auto" timeout="{int(gather_timeout)}">')
+        self.turn_head = f'{XML_HEADER}<Response>{gather}'
+        self.turn_tail = f'</Gather><Redirect method="POST">{escape(gather_action)}</Redirect></Response>'
+        self.hangup_head = f'{XML_HEADER}<Response>'
+        self.hangup_tail = '<Hangup/></Response>'
+        self.empty = f'{XML_HEADER}<Response/>'
+        self._say_open = f'<Say voice={quoteattr(voice)} language={quoteattr(language)}>'
+        self.say = lru_cache(maxsize=fragment_cache_size)(self._say)
+        self.play = lru_cache(maxsize=fragment_cache_size)(self._play)
+
+    def _say(self, text: str) -> str:
+        return f'{self._say_open}{escape(text)}</Say>'
+
+    @staticmethod
+    def _play(url: str) -> str:
+        return f'<Play>{escape(url)}</Play>'
+
+    def turn(self, fragment: str) -> str:
+        """Speak ``fragment`` and listen for the caller's reply"""
+        return f'{self.turn_head}{fragment}{self.turn_tail}'
+
+    def hangup(self, fragment: str = '') -> str:
+        return f'{self.hangup_head}{fragment}{self.hangup_tail}'
+
+    def bridge(self, fragment: str, url: str) -> str:
+        """Speak ``fragment``, then fetch the next document from ``url``"""
+        return f'{self.hangup_head}{fragment}<Redirect method="POST">{escape(url)}</Redirect></Response>'
+
+    def stream(self, fragment: str, url: str) -> str:
+        """Speak ``fragment``, then hand the call's audio to a Media Streams websocket"""
+        return f'{self.hangup_head}{fragment}<Connect><Stream url={quoteattr(url)}/></Connect></Response>'
+
+
+class FillerCoverage:
+    """How often the filler that opens a voice turn lasted until the reply was ready
+
+    A turn is *covered* when the engine and TTS finished before the filler
+    stopped playing, so the caller heard no silence; otherwise the gap is
+    recorded (also into the ``filler_gap`` latency sketch, per transport).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts: Dict[tuple, int] = {}  # (transport, 'covered' | 'gap') -> turns
+        self.gap_seconds = 0.0
+        self.max_gap_seconds = 0.0
+
+    def record(self, transport: str, covered: bool, gap_seconds: float = 0.0):
+        key = (transport, 'covered' if covered else 'gap')
+        with self._lock:
+            self.counts[key] = self.counts.get(key, 0) + 1
+            self.gap_seconds += gap_seconds
+            self.max_gap_seconds = max(self.max_gap_seconds, gap_seconds)
+        get_latency_recorder().record('filler_gap', transport, gap_seconds)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            counts = dict(self.counts)
+        turns = sum(counts.values())
+        covered = sum(count for (_, outcome), count in counts.items() if outcome == 'covered')
+        return {
+            'turns': turns,
+            'covered': covered,
+            'coverage_ratio': round(covered / turns, 4) if turns else 0.0,
+            'mean_gap_ms': round(self.gap_seconds / turns * 1000, 1) if turns else 0.0,
+            'max_gap_ms': round(self.max_gap_seconds * 1000, 1),
+            'by_transport': {f'{transport}:{outcome}': count for (transport, outcome), count in counts.items()}
+        }
+
+
+class PendingTurn:
+    """An engine turn computing in the background while its filler plays"""
+
+    __slots__ = ('future', 'turn_id', 'started')
+
+    def __init__(self, future: Future, turn_id: str):
+        self.future = future
+        self.turn_id = turn_id
+        self.started = time.monotonic()
+
+
+class CallState:
+    """Per-call bookkeeping, keyed by CallSid (engine state lives in the SessionManager)"""
+
+    __slots__ = ('call_sid', 'caller', 'started', 'last_activity', 'turns', 'silences')
+
+    def __init__(self, call_sid: str, caller: str = ''):
+        self.call_sid = call_sid
+        self.caller = caller
+        self.started = time.monotonic()
+        self.last_activity = self.started
+        self.turns = 0
+        self.silences = 0
+
+
+class VoiceCallHandler:
+    """Turns Twilio webhook parameters into TwiML
+
+    Each call's conversation runs on the shared ``sessions`` engine table
+    under its CallSid, behind the chat admission controller when one is
+    given, so an overloaded worker answers with a canned stall rather
+    than letting Twilio's webhook timeout drop the call.  With a
+    ``stream_url`` the call is answered with <Connect><Stream> and its
+    turns arrive over the media-stream websocket instead of <Gather>.
+    Calls idle for ``idle_ttl_seconds`` (no status callback arrived) are
+    swept by the webhooks at most once every ``sweep_interval`` seconds.
+
+    With ``fillers``, a turn is answered in two phases: /voice/gather
+    immediately plays a short filler and redirects to /voice/reply while
+    the engine runs in the background, and /voice/reply returns the
+    response.  The redirect carries only a turn id, never the caller's
+    speech.  The turn is never run twice: the owning worker records how
+    it ended (reply, shed or failed) in the shared store under that id,
+    and a redirect that lands on a different worker reads it from there,
+    waiting at most STORE_REPLY_WAIT_SECONDS.
+    """
+
+    def __init__(self, sessions, responses, admission=None,
+                 on_turn: Optional[Callable[[str, Dict], None]] = None,
+                 audio_resolver: Optional[Callable[[str], Optional[str]]] = None,
+                 gather_action: str = '/voice/gather', voice: str = 'Polly.Joanna',
+                 auth_token: Optional[str] = None, stream_url: Optional[str] = None, max_calls: int = 10000,
+                 idle_ttl_seconds: float = 3600, max_silences: int = 3,
+                 stall_categories: Iterable[str] = ('time_wasting', 'memory_issues'),
+                 fillers: Sequence[str] = (), reply_action: str = '/voice/reply',
+                 filler_workers: int = 8, reply_timeout: float = 10.0, sweep_interval: float = 60.0):
+        self.sessions = sessions
+        self.responses = responses
+        self.admission = admission
+        self.on_turn = on_turn
+        self.audio_resolver = audio_resolver
+        self.auth_token = auth_token
+        self.stream_url = stream_url
+        self.max_calls = max_calls
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.max_silences = max_silences
+        self.stall_categories = tuple(stall_categories)
+        self.fillers = tuple(fillers)
+        self.reply_action = reply_action
+        self.filler_workers = filler_workers
+        self.reply_timeout = reply_timeout
+        self.sweep_interval = sweep_interval
+        self.filler_coverage = FillerCoverage()
+        self.templates = TwiMLTemplates(gather_action, voice=voice)
+        self._validator = None
+        self._calls: 'OrderedDict[str, CallState]' = OrderedDict()
+        self._pending: Dict[str, PendingTurn] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._next_sweep = time.monotonic() + sweep_interval
+        self.stats = {'calls': 0, 'turns': 0, 'silences': 0, 'shed': 0, 'ended': 0,
+                      'filler_skipped': 0, 'replies_elsewhere': 0, 'replies_lost': 0}
+        self.warm([*self.fillers, *self.corpus()])
+
+    @staticmethod
+    def corpus() -> Iterable[str]:
+        """Every fixed line a call can hear"""
+        from utils.audio_utils import response_corpus
+        return [*GREETINGS, *STILL_THERE, GOODBYE, *response_corpus()]
+
+    def warm(self, lines: Iterable[str]) -> int:
+        """Pre-render the fragment for each line; returns how many were rendered"""
+        count = 0
+        for line in lines:
+            self.fragment(line)
+            count += 1
+        return count
+
+    def fragment(self, text: str) -> str:
+        """<Play> of pre-synthesized audio when available, <Say> otherwise"""
+        url = self.audio_resolver(text) if self.audio_resolver is not None else None
+        return self.templates.play(url) if url else self.templates.say(text)
+
+    # -- request authentication ----------------------------------------------------
+
+    def is_authentic(self, url: str, params: Mapping[str, Any], signature: str) -> bool:
+        """Check X-Twilio-Signature; always true when no auth token is configured"""
+        if not self.auth_token:
+            return True
+        if self._validator is None:
+            from twilio.request_validator import RequestValidator  # only needed with signing on
+            self._validator = RequestValidator(self.auth_token)
+        return self._validator.validate(url, params, signature)
+
+    # -- call state ----------------------------------------------------------------
+
+    def _call(self, call_sid: str, caller: str = '') -> CallState:
+        """State for a call's webhook, created on first sight; runs the idle sweep when due"""
+        now = time.monotonic()
+        with self._lock:
+            state = self._calls.get(call_sid)
+            if state is None:
+                state = self._calls[call_sid] = CallState(call_sid, caller)
+                self.stats['calls'] += 1
+                while len(self._calls) > self.max_calls:
+                    self._calls.popitem(last=False)
+            else:
+                self._calls.move_to_end(call_sid)
+            state.last_activity = now
+            sweep = now >= self._next_sweep
+            if sweep:
+                self._next_sweep = now + self.sweep_interval
+        if sweep:
+            self.sweep_expired()
+        return state
+
+    def _touch(self, call_sid: str) -> Optional[CallState]:
+        """Refresh a live call's activity without recreating state for one that has ended"""
+        with self._lock:
+            state = self._calls.get(call_sid)
+            if state is not None:
+                self._calls.move_to_end(call_sid)
+                state.last_activity = time.monotonic()
+            return state
+
+    def end_call(self, call_sid: str) -> Optional[CallState]:
+        """Forget a finished call and its conversation state"""
+        with self._lock:
+            state = self._calls.pop(call_sid, None)
+            pending = self._pending.pop(call_sid, None)
+        if pending is not None:
+            pending.future.cancel()
+        if state is not None:
+            self.stats['ended'] += 1
+        self.sessions.reset(call_sid)
+        return state
+
+    def sweep_expired(self) -> int:
+        """Drop calls idle for longer than ``idle_ttl_seconds``; returns the number removed"""
+        cutoff = time.monotonic() - self.idle_ttl_seconds
+        expired = []
+        with self._lock:
+            while self._calls:
+                call_sid, state = next(iter(self._calls.items()))
+                if state.last_activity >= cutoff:
+                    break
+                del self._calls[call_sid]
+                pending = self._pending.pop(call_sid, None)
+                if pending is not None:
+                    pending.future.cancel()
+                expired.append(call_sid)
+        for call_sid in expired:
+            self.sessions.reset(call_sid)
+        return len(expired)
+
+    # -- webhooks ------------------------------------------------------------------
+
+    def answer(self, params: Mapping[str, str]) -> str:
+        """TwiML for the initial /voice webhook"""
+        call_sid = params.get('CallSid')
+        if not call_sid:
+            return self.templates.hangup()
+        self._call(call_sid, params.get('From', ''))
+        if self.stream_url:
+            return self.templates.stream(self.fragment(random.choice(GREETINGS)), self.stream_url)
+        return self.templates.turn(self.fragment(random.choice(GREETINGS)))
+
+    def gather(self, params: Mapping[str, str]) -> str:
+        """TwiML for /voice/gather: one engine turn on the caller's speech"""
+        call_sid = params.get('CallSid')
+        if not call_sid:
+            return self.templates.hangup()
+        if params.get('CallStatus') in END_STATUSES:
+            self.end_call(call_sid)
+            return self.templates.empty
+
+        state = self._call(call_sid, params.get('From', ''))
+        speech = (params.get('SpeechResult') or '').strip()
+        if not speech:
+            state.silences += 1
+            self.stats['silences'] += 1
+            if state.silences > self.max_silences:
+                self.end_call(call_sid)
+                return self.templates.hangup(self.fragment(GOODBYE))
+            return self.templates.turn(self.fragment(random.choice(STILL_THERE)))
+
+        state.silences = 0
+        if self.fillers:
+            if self._prune_pending() < self.filler_workers * 4:
+                return self._start_turn(call_sid, speech)
+            self.stats['filler_skipped'] += 1
+        return self.templates.turn(self.fragment(self.respond(call_sid, speech)))
+
+    def _prune_pending(self) -> int:
+        """Drop filler turns whose /voice/reply never came; returns how many remain"""
+        cutoff = time.monotonic() - self.reply_timeout - PENDING_GRACE_SECONDS
+        with self._lock:
+            abandoned = [call_sid for call_sid, pending in self._pending.items() if pending.started < cutoff]
+            for call_sid in abandoned:
+                self._pending.pop(call_sid).future.cancel()
+            return len(self._pending)
+
+    def _start_turn(self, call_sid: str, speech: str) -> str:
+        """Phase one: start the turn in the background and play a filler meanwhile"""
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(self.filler_workers, thread_name_prefix='voice-turn')
+        turn_id = uuid.uuid4().hex
+        pending = PendingTurn(self._executor.submit(self._background_turn, call_sid, speech, turn_id), turn_id)
+        with self._lock:
+            self._pending[call_sid] = pending
+        url = f"{self.reply_action}?{urlencode({'Turn': turn_id, 'Worker': os.getpid()})}"
+        return self.templates.bridge(self.fragment(random.choice(self.fillers)), url)
+
+    def _shared_store(self):
+        return getattr(self.sessions, 'shared_store', None)
+
+    def _background_turn(self, call_sid: str, speech: str, turn_id: str) -> str:
+        """A filler-covered turn; its outcome is also recorded for a reply that lands on another worker"""
+        try:
+            status, response = self._respond(call_sid, speech, opener=False)
+        except Exception:
+            self._record_outcome(turn_id, TURN_FAILED)
+            raise
+        self._record_outcome(turn_id, status, response)
+        return response
+
+    def _record_outcome(self, turn_id: str, status: str, response: Optional[str] = None):
+        store = self._shared_store()
+        if store is None:
+            return
+        try:
+            store.put_turn_reply(turn_id, status, response)
+        except Exception as e:
+            print(f"Error recording voice turn outcome: {e}")
+
+    def reply(self, params: Mapping[str, str]) -> str:
+        """TwiML for /voice/reply: phase two, the response to the turn the filler covered"""
+        call_sid = params.get('CallSid')
+        if not call_sid:
+            return self.templates.hangup()
+        turn_id = params.get('Turn', '')
+        with self._lock:
+            pending = self._pending.get(call_sid)
+            if pending is not None and pending.turn_id == turn_id:
+                del self._pending[call_sid]
+            else:
+                pending = None
+
+        waited = time.monotonic()
+        if pending is None:
+            # Turn started in another worker (or was dropped here): never run it a second time
+            response = None
+            if turn_id and params.get('Worker') != str(os.getpid()):
+                self.stats['replies_elsewhere'] += 1
+                response = self._reply_from_store(turn_id)
+            if response is None:
+                self.stats['replies_lost'] += 1
+                response = random.choice(STILL_THERE)
+            self.filler_coverage.record('webhook', False, time.monotonic() - waited)
+        else:
+            covered = pending.future.done()
+            try:
+                response = pending.future.result(timeout=self.reply_timeout)
+            except FutureTimeout:
+                self.stats['shed'] += 1
+                response = random.choice(STILL_THERE)
+            self.filler_coverage.record('webhook', covered, time.monotonic() - waited)
+        return self.templates.turn(self.fragment(response))
+
+    def _reply_from_store(self, turn_id: str) -> Optional[str]:
+        """Another worker's filler turn, read from the shared store as soon as it has ended"""
+        store = self._shared_store()
+        if store is None:
+            return None
+        deadline = time.monotonic() + min(self.reply_timeout, STORE_REPLY_WAIT_SECONDS)
+        while True:
+            outcome = store.take_turn_reply(turn_id)
+            if outcome is not None:
+                status, response = outcome
+                return None if status == TURN_FAILED else response
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(REPLY_POLL_SECONDS)
+
+    def respond(self, call_sid: str, speech: str, opener: bool = True) -> str:
+        """Run one engine turn on the caller's speech and return the line to speak
+
+        Blocks while waiting for an admission slot; a shed turn returns a
+        canned stall line instead.  ``opener=False`` when a filler already
+        opened the turn, so the engine does not add another.
+        """
+        return self._respond(call_sid, speech, opener)[1]
+
+    def _respond(self, call_sid: str, speech: str, opener: bool = True) -> Tuple[str, str]:
+        """(TURN_DONE or TURN_SHED, line to speak) for one turn"""
+        state = self._touch(call_sid)
+        if self.admission is not None:
+            with self.admission.slot() as outcome:
+                if outcome != ADMITTED:
+                    self.stats['shed'] += 1
+                    return TURN_SHED, self.responses.get_random_response(random.choice(self.stall_categories))
+                turn = self._take_turn(call_sid, speech, opener)
+        else:
+            turn = self._take_turn(call_sid, speech, opener)
+
+        if state is not None:
+            state.turns += 1
+        self.stats['turns'] += 1
+        if self.on_turn is not None:
+            self.on_turn(call_sid, turn)
+        return TURN_DONE, turn['response']
+
+    def _take_turn(self, call_sid: str, speech: str, opener: bool = True) -> Dict:
+        with self.sessions.session(call_sid) as engine:
+            return engine.take_turn(speech, opener=opener)
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def get_stats(self) -> Dict:
+        say_cache = self.templates.say.cache_info()
+        return {
+            'active_calls': len(self),
+            'fragment_cache': {'size': say_cache.currsize, 'hits': say_cache.hits, 'misses': say_cache.misses},
+            'pending_turns': len(self._pending),
+            'filler': self.filler_coverage.get_stats(),
+            **self.stats
+        }
+
+
+def _twiml(body: str) -> Response:
+    return current_app.response_class(body, mimetype='text/xml')
+
+
+def _authenticated_handler() -> VoiceCallHandler:
+    handler = current_app.extensions['twilio_voice']
+    params = request.form.to_dict() if request.method == 'POST' else {}
+    if not handler.is_authentic(request.url, params, request.headers.get('X-Twilio-Signature', '')):
+        abort(403)
+    return handler
+
+
+@voice_bp.route('/voice/audio/<key>.wav')
+def voice_audio(key):
+    """Pre-rendered speech for <Play> (content-addressed, so cacheable forever)"""
+    audio_cache = current_app.extensions.get('audio_cache')
+    clip = audio_cache.load(key) if audio_cache is not None else None  # load() accepts only 64 hex digits
+    if clip is None:
+        abort(404)
+    response = send_file(io.BytesIO(clip.data), mimetype=clip.mimetype, etag=key, conditional=True,
+                         max_age=31536000)
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+@voice_bp.route('/voice', methods=['GET', 'POST'])
+def voice():
+    """Incoming call webhook"""
+    return _twiml(_authenticated_handler().answer(request.values))
+
+@voice_bp.route('/voice/gather', methods=['GET', 'POST'])
+def voice_gather():
+    """Speech result webhook (also receives the re-prompt redirect after silence)"""
+    return _twiml(_authenticated_handler().gather(request.values))
+
+@voice_bp.route('/voice/reply', methods=['GET', 'POST'])
+def voice_reply():
+    """Second half of a filler turn (redirected to from /voice/gather)"""
+    return _twiml(_authenticated_handler().reply(request.values))
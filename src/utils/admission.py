@@ -0,0 +1,93 @@
+"""
+Admission Control for Chat Turns
+Caps concurrent engine work behind a short bounded wait queue so overload is shed instead of queued
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+ADMITTED = 'admitted'
+SHED_QUEUE_FULL = 'queue_full'
+SHED_TIMEOUT = 'timeout'
+
+
+class AdmissionController:
+    """Concurrency limit with a bounded, deadline-limited wait queue
+
+    At most ``max_concurrent`` callers hold a slot at once.  Up to
+    ``max_queue`` more may wait, each for at most ``queue_timeout`` seconds;
+    anyone beyond that is rejected immediately.  Rejections are cheap, so
+    the turns that do get in keep their latency when traffic bursts.
+    """
+
+    def __init__(self, max_concurrent: int = 8, max_queue: int = 16, queue_timeout: float = 0.1):
+        if max_concurrent < 1:
+            raise ValueError("max_concurrent must be at least 1")
+        self.max_concurrent = max_concurrent
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self._cond = threading.Condition(threading.Lock())
+        self.in_flight = 0
+        self.waiting = 0
+        self.stats = {ADMITTED: 0, SHED_QUEUE_FULL: 0, SHED_TIMEOUT: 0, 'queued': 0}
+
+    def acquire(self, timeout: Optional[float] = None) -> str:
+        """Take a slot; returns ADMITTED or the reason the caller was shed"""
+        with self._cond:
+            if self.in_flight < self.max_concurrent and not self.waiting:
+                self.in_flight += 1
+                self.stats[ADMITTED] += 1
+                return ADMITTED
+
+            if self.waiting >= self.max_queue:
+                self.stats[SHED_QUEUE_FULL] += 1
+                return SHED_QUEUE_FULL
+
+            deadline = time.monotonic() + (self.queue_timeout if timeout is None else timeout)
+            self.waiting += 1
+            self.stats['queued'] += 1
+            try:
+                while self.in_flight >= self.max_concurrent:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.stats[SHED_TIMEOUT] += 1
+                        return SHED_TIMEOUT
+                    self._cond.wait(remaining)
+            finally:
+                self.waiting -= 1
+
+            self.in_flight += 1
+            self.stats[ADMITTED] += 1
+            return ADMITTED
+
+    def release(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify()
+
+    @contextmanager
+    def slot(self, timeout: Optional[float] = None) -> Iterator[str]:
+        """Hold a slot for the block; yields ADMITTED or the shed reason
+
+        When shed, the block runs without a slot and must not do engine work.
+        """
+        outcome = self.acquire(timeout)
+        try:
+            yield outcome
+        finally:
+            if outcome == ADMITTED:
+                self.release()
+
+    def get_stats(self) -> Dict:
+        shed = self.stats[SHED_QUEUE_FULL] + self.stats[SHED_TIMEOUT]
+        total = self.stats[ADMITTED] + shed
+        return {
+            'in_flight': self.in_flight,
+            'waiting': self.waiting,
+            'max_concurrent': self.max_concurrent,
+            'max_queue': self.max_queue,
+            'queue_timeout_ms': round(self.queue_timeout * 1000, 1),
+            'shed_ratio': round(shed / total, 4) if total else 0.0,
+            **self.stats
+        }
@@ -1,2 +1,337 @@
-def prepare_audio_response(text):
-    return f"AUDIO({text})"
+"""
+Audio Rendering for Voice Calls
+Content-addressed TTS cache (memory LRU over a size-bounded disk store) with pluggable synthesizers
+"""
+import array
+import hashlib
+import importlib
+import io
+import math
+import os
+import re
+import threading
+import time
+import wave
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+DEFAULT_VOICE = os.environ.get('TTS_VOICE', 'default')
+CACHE_KEY = re.compile(r'[0-9a-f]{64}')  # sha256 hexdigest; anything else never reaches the filesystem
+
+
+class StubSynthesizer:
+    """Deterministic local stand-in for a TTS service
+
+    Emits 8 kHz 16-bit mono WAV: a quiet tone whose pitch depends on the
+    text and whose length grows with it, so cache behaviour and audio
+    plumbing can be exercised without network calls.  ``delay`` simulates
+    the latency of a real synthesizer.
+    """
+
+    name = 'stub-1'
+    extension = '.wav'
+    mimetype = 'audio/wav'
+    sample_rate = 8000
+
+    def __init__(self, delay: float = 0.0, seconds_per_char: float = 0.05):
+        self.delay = delay
+        self.seconds_per_char = seconds_per_char
+
+    def synthesize(self, text: str, voice: str, personality: Optional[str]) -> bytes:
+        if self.delay:
+            time.sleep(self.delay)
+        seed = hashlib.sha1(f"{voice}\0{personality}\0{text}".encode('utf-8')).digest()
+        period = 16 + seed[0] % 32  # samples per cycle: a 170-500 Hz tone
+        cycle = array.array('h', (int(2000 * math.sin(2 * math.pi * i / period)) for i in range(period)))
+        samples = int(self.sample_rate * max(0.3, len(text) * self.seconds_per_char))
+        pcm = (cycle * (samples // period + 1))[:samples]
+
+        buffer = io.BytesIO()
+        with wave.open(buffer, 'wb') as out:
+            out.setnchannels(1)
+            out.setsampwidth(2)
+            out.setframerate(self.sample_rate)
+            out.writeframes(pcm.tobytes())
+        return buffer.getvalue()
+
+
+def load_synthesizer(spec: str):
+    """Build a synthesizer from 'stub' or a 'package.module:ClassName' import path"""
+    if spec in ('', 'stub'):
+        return StubSynthesizer()
+    module_name, _, class_name = spec.partition(':')
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+class AudioClip:
+    """One rendered utterance"""
+
+    __slots__ = ('key', 'path', 'data', 'mimetype')
+
+    def __init__(self, key: str, path: str, data: bytes, mimetype: str):
+        self.key = key
+        self.path = path
+        self.data = data
+        self.mimetype = mimetype
+
+
+class AudioCache:
+    """Rendered speech keyed by sha256(synthesizer, voice, personality, text)
+
+    Lookups go memory LRU (``memory_bytes``) -> disk -> synthesizer.  Disk
+    files are written atomically and are shared by every worker; a disk
+    hit refreshes the file's mtime so that, once the store passes
+    ``max_disk_bytes``, the least recently used clips are evicted first
+    (down to 90% of the limit).  Concurrent requests for the same missing
+    clip synthesize it once.
+    """
+
+    def __init__(self, cache_dir: str, synthesizer=None, max_disk_bytes: int = 512 * 1024 * 1024,
+                 memory_bytes: int = 32 * 1024 * 1024, lock_stripes: int = 64):
+        self.cache_dir = cache_dir
+        self.synthesizer = synthesizer if synthesizer is not None else StubSynthesizer()
+        self.max_disk_bytes = max_disk_bytes
+        self.memory_bytes = memory_bytes
+        self._memory: 'OrderedDict[str, AudioClip]' = OrderedDict()
+        self._memory_used = 0
+        self._lock = threading.Lock()
+        self._key_locks = [threading.Lock() for _ in range(lock_stripes)]
+        self._disk_sizes: Dict[str, int] = {}
+        self._disk_used = 0
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'synthesized': 0, 'evicted': 0}
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._scan_disk()
+
+    def key(self, text: str, voice: str = DEFAULT_VOICE, personality: Optional[str] = None) -> str:
+        material = f"{self.synthesizer.name}\0{voice}\0{personality or ''}\0{text}"
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key + self.synthesizer.extension)
+
+    def _scan_disk(self) -> List[os.DirEntry]:
+        """Rebuild the disk index (other workers add files too); returns the entries"""
+        entries = []
+        for shard in os.scandir(self.cache_dir):
+            if shard.is_dir():
+                entries.extend(entry for entry in os.scandir(shard.path)
+                               if entry.name.endswith(self.synthesizer.extension))
+        sizes = {}
+        for entry in entries:
+            try:
+                sizes[entry.name[:-len(self.synthesizer.extension)]] = entry.stat().st_size
+            except FileNotFoundError:
+                pass
+        with self._lock:
+            self._disk_sizes = sizes
+            self._disk_used = sum(sizes.values())
+        return entries
+
+    # -- memory tier -------------------------------------------------------------
+
+    def _remember(self, clip: AudioClip):
+        with self._lock:
+            previous = self._memory.pop(clip.key, None)
+            if previous is not None:
+                self._memory_used -= len(previous.data)
+            self._memory[clip.key] = clip
+            self._memory_used += len(clip.data)
+            while self._memory_used > self.memory_bytes and len(self._memory) > 1:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_used -= len(evicted.data)
+
+    def _recall(self, key: str) -> Optional[AudioClip]:
+        with self._lock:
+            clip = self._memory.get(key)
+            if clip is not None:
+                self._memory.move_to_end(key)
+                self.stats['memory_hits'] += 1
+            return clip
+
+    # -- lookups -----------------------------------------------------------------
+
+    def cached_key(self, text: str, voice: str = DEFAULT_VOICE, personality: Optional[str] = None) -> Optional[str]:
+        """Key of an already-rendered clip, or None; never synthesizes"""
+        key = self.key(text, voice, personality)
+        if key in self._memory or key in self._disk_sizes:
+            return key
+        path = self.path_for(key)
+        if os.path.exists(path):  # rendered by another worker
+            with self._lock:
+                self._disk_sizes[key] = os.path.getsize(path)
+            return key
+        return None
+
+    def load(self, key: str) -> Optional[AudioClip]:
+        """Fetch a rendered clip by key from memory or disk (None for a malformed key)"""
+        if not CACHE_KEY.fullmatch(key):
+            return None
+        clip = self._recall(key)
+        if clip is not None:
+            return clip
+        path = self.path_for(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)  # recency for disk eviction
+        except FileNotFoundError:
+            with self._lock:
+                self._disk_used -= self._disk_sizes.pop(key, 0)
+            return None
+        self.stats['disk_hits'] += 1
+        clip = AudioClip(key, path, data, self.synthesizer.mimetype)
+        self._remember(clip)
+        return clip
+
+    def get(self, text: str, voice: str = DEFAULT_VOICE, personality: Optional[str] = None) -> AudioClip:
+        """Rendered audio for ``text``, synthesizing and storing it on a miss"""
+        key = self.key(text, voice, personality)
+        clip = self.load(key)
+        if clip is not None:
+            return clip
+
+        with self._key_locks[int(key[:8], 16) % len(self._key_locks)]:
+            clip = self.load(key)  # rendered while we waited
+            if clip is not None:
+                return clip
+            data = self.synthesizer.synthesize(text, voice, personality)
+            self.stats['synthesized'] += 1
+            clip = AudioClip(key, self._store(key, data), data, self.synthesizer.mimetype)
+        self._remember(clip)
+        return clip
+
+    def _store(self, key: str, data: bytes) -> str:
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._disk_used += len(data) - self._disk_sizes.get(key, 0)
+            self._disk_sizes[key] = len(data)
+            over_limit = self._disk_used > self.max_disk_bytes
+        if over_limit:
+            self.evict()
+        return path
+
+    def evict(self) -> int:
+        """Delete least recently used clips until the store is under 90% of its limit"""
+        entries = self._scan_disk()
+        target = self.max_disk_bytes * 0.9
+        used = self._disk_used
+        removed = 0
+        aged = []
+        for entry in entries:
+            try:
+                st = entry.stat()
+            except FileNotFoundError:  # already evicted by another worker
+                continue
+            aged.append((st.st_mtime, st.st_size, entry))
+        aged.sort(key=lambda item: item[0])
+        for _, size, entry in aged:
+            if used <= target:
+                break
+            key = entry.name[:-len(self.synthesizer.extension)]
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                continue
+            used -= size
+            removed += 1
+            with self._lock:
+                self._disk_used -= self._disk_sizes.pop(key, 0)
+                clip = self._memory.pop(key, None)
+                if clip is not None:
+                    self._memory_used -= len(clip.data)
+        self.stats['evicted'] += removed
+        return removed
+
+    def warm(self, lines: Iterable[str], voices: Iterable[str] = (DEFAULT_VOICE,),
+             personalities: Iterable[Optional[str]] = (None,)) -> Dict[str, int]:
+        """Render every line for every voice/personality; returns how many were new"""
+        before = self.stats['synthesized']
+        total = 0
+        for voice in voices:
+            for personality in personalities:
+                for line in lines:
+                    if self.cached_key(line, voice, personality) is None:
+                        self.get(line, voice, personality)
+                    total += 1
+        return {'lines': total, 'synthesized': self.stats['synthesized'] - before}
+
+    def get_stats(self) -> Dict:
+        return {
+            'synthesizer': self.synthesizer.name,
+            'memory_clips': len(self._memory),
+            'memory_bytes': self._memory_used,
+            'disk_clips': len(self._disk_sizes),
+            'disk_bytes': self._disk_used,
+            **self.stats
+        }
+
+
+def response_corpus() -> List[str]:
+    """Every fixed line the bot can speak: fillers, engine strategies, the response library and the handlers"""
+    from ai.enhanced_responses import EnhancedResponses
+    from ai.sophisticated_engine import SophisticatedEngine
+    from utils import crypto, hearing, questions, tangents
+
+    lines = [*SophisticatedEngine.variations, *SophisticatedEngine.strategy_responses(),
+             *EnhancedResponses().all_responses(),
+             *tangents.TANGENT_RESPONSES, *hearing.HEARING_RESPONSES,
+             *questions.QUESTION_RESPONSES, *crypto.CRYPTO_RESPONSES]
+    try:
+        from ai import massive_responses
+    except ImportError:
+        massive_responses = None
+    for name in ('HOLD_MUSIC_RESPONSES', 'GIFT_CARD_RESPONSES'):
+        lines.extend(getattr(massive_responses, name, ()))
+    return list(dict.fromkeys(lines))
+
+
+_audio_cache: Optional[AudioCache] = None
+_audio_cache_lock = threading.Lock()
+
+
+def get_audio_cache() -> AudioCache:
+    """Process-wide cache configured from AUDIO_CACHE_DIR / TTS_SYNTHESIZER / TTS_VOICE / AUDIO_CACHE_MAX_MB"""
+    global _audio_cache
+    if _audio_cache is None:
+        with _audio_cache_lock:
+            if _audio_cache is None:
+                _audio_cache = AudioCache(
+                    os.environ.get('AUDIO_CACHE_DIR', os.path.join('data', 'audio_cache')),
+                    load_synthesizer(os.environ.get('TTS_SYNTHESIZER', 'stub')),
+                    max_disk_bytes=int(float(os.environ.get('AUDIO_CACHE_MAX_MB', 512)) * 1024 * 1024)
+                )
+    return _audio_cache
+
+
+def prepare_audio_response(text, voice=DEFAULT_VOICE, personality=None):
+    """Rendered audio for a bot response (synthesized only on a cache miss)"""
+    return get_audio_cache().get(text, voice, personality)
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    parser = argparse.ArgumentParser(description="Pre-render the response corpus into the TTS cache")
+    parser.add_argument('command', choices=['warm', 'stats'])
+    parser.add_argument('--voice', action='append', help="voice to render (repeatable)")
+    parser.add_argument('--personality', action='append', help="personality to render (repeatable)")
+    args = parser.parse_args()
+
+    cache = get_audio_cache()
+    if args.command == 'warm':
+        from twilio_handler import VoiceCallHandler  # response corpus plus the call prompts
+        started = time.perf_counter()
+        result = cache.warm(VoiceCallHandler.corpus(), voices=args.voice or [DEFAULT_VOICE],
+                            personalities=args.personality or [None])
+        print(f"🔊 {result['lines']} clips ready, {result['synthesized']} synthesized "
+              f"in {time.perf_counter() - started:.1f}s")
+    print(cache.get_stats())
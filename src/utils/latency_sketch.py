@@ -0,0 +1,162 @@
+"""
+Latency Quantile Sketches
+Constant-memory, mergeable latency histograms reporting p50/p90/p99/p99.9
+"""
+import math
+import threading
+from array import array
+from typing import Dict, Iterable, Optional, Tuple
+
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+OVERFLOW_LABEL = '_other'
+
+
+class LatencySketch:
+    """Log-bucketed latency histogram with bounded relative error
+
+    Values are counted in geometric buckets whose width grows with the
+    value (HDR histogram / DDSketch style), so any reported quantile is
+    within ``relative_accuracy`` of the true one.  The bucket array is
+    fixed at construction (about 1100 counters for 1 µs - 1 h at 1%), so
+    memory does not grow with traffic, and two sketches with the same
+    settings merge by adding their counters.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, min_value: float = 1e-6, max_value: float = 3600.0):
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self.max_value = max_value
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._offset = math.ceil(math.log(min_value) / self._log_gamma)
+        self.counts = array('Q', bytes(8 * (self._index(max_value) + 1)))
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def _index(self, value: float) -> int:
+        if value <= self.min_value:
+            return 0
+        return math.ceil(math.log(min(value, self.max_value)) / self._log_gamma) - self._offset
+
+    def _value(self, index: int) -> float:
+        # Midpoint (in relative terms) of the bucket (gamma^(i-1), gamma^i]
+        return 2 * self._gamma ** (index + self._offset) / (self._gamma + 1)
+
+    def record(self, seconds: float):
+        if seconds < 0 or seconds != seconds:
+            return
+        self.counts[self._index(seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other: 'LatencySketch'):
+        """Add another sketch's observations (same accuracy and range) into this one"""
+        if (other.relative_accuracy, other.min_value, other.max_value) != \
+                (self.relative_accuracy, self.min_value, self.max_value):
+            raise ValueError("cannot merge latency sketches with different settings")
+        for index, count in enumerate(other.counts):
+            if count:
+                self.counts[index] += count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantiles(self, quantiles: Iterable[float] = QUANTILES) -> Dict[float, float]:
+        """Estimated value at each quantile, in seconds (0.0 when empty)"""
+        wanted = sorted(quantiles)
+        results = dict.fromkeys(wanted, 0.0)
+        if not self.count:
+            return results
+
+        ranks = [(q, q * (self.count - 1)) for q in wanted]
+        seen = 0
+        position = 0
+        for index, count in enumerate(self.counts):
+            if not count:
+                continue
+            seen += count
+            while position < len(ranks) and ranks[position][1] < seen:
+                results[ranks[position][0]] = min(self.max, max(self.min, self._value(index)))
+                position += 1
+            if position == len(ranks):
+                break
+        return results
+
+    def summary(self) -> Dict[str, float]:
+        """Count, mean and percentiles in milliseconds"""
+        summary = {'count': self.count,
+                   'mean_ms': round(self.total / self.count * 1000, 3) if self.count else 0.0}
+        for q, value in self.quantiles().items():
+            summary[f"p{q * 100:g}_ms"] = round(value * 1000, 3)
+        return summary
+
+
+class LatencyRecorder:
+    """Named latency sketches broken down by one label (endpoint, technique, ...)
+
+    The number of label values per metric is capped at ``max_labels``;
+    anything past that is folded into ``_other`` so a flood of distinct
+    labels cannot grow memory.
+    """
+
+    def __init__(self, max_labels: int = 64, relative_accuracy: float = 0.01):
+        self.max_labels = max_labels
+        self.relative_accuracy = relative_accuracy
+        self._lock = threading.Lock()
+        self._sketches: Dict[str, Dict[str, LatencySketch]] = {}
+
+    def record(self, metric: str, label: Optional[str], seconds: float):
+        label = label or 'unknown'
+        with self._lock:
+            series = self._sketches.setdefault(metric, {})
+            sketch = series.get(label)
+            if sketch is None:
+                if len(series) >= self.max_labels:
+                    label = OVERFLOW_LABEL
+                sketch = series.get(label)
+                if sketch is None:
+                    sketch = series[label] = LatencySketch(self.relative_accuracy)
+            sketch.record(seconds)
+
+    def sketches(self) -> Dict[Tuple[str, str], LatencySketch]:
+        """Copies of every (metric, label) sketch, safe to read without the lock"""
+        with self._lock:
+            copies = {}
+            for metric, series in self._sketches.items():
+                for label, sketch in series.items():
+                    copy = LatencySketch(self.relative_accuracy)
+                    copy.merge(sketch)
+                    copies[(metric, label)] = copy
+            return copies
+
+    def summary(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """{metric: {label: summary, ..., 'all': merged summary}}"""
+        report: Dict[str, Dict[str, Dict[str, float]]] = {}
+        merged: Dict[str, LatencySketch] = {}
+        for (metric, label), sketch in sorted(self.sketches().items()):
+            report.setdefault(metric, {})[label] = sketch.summary()
+            merged.setdefault(metric, LatencySketch(self.relative_accuracy)).merge(sketch)
+        for metric, sketch in merged.items():
+            report[metric]['all'] = sketch.summary()
+        return report
+
+
+_recorder: Optional[LatencyRecorder] = None
+_recorder_lock = threading.Lock()
+
+
+def get_latency_recorder() -> LatencyRecorder:
+    """Process-wide latency recorder shared by the engine, the app and analytics"""
+    global _recorder
+    if _recorder is None:
+        with _recorder_lock:
+            if _recorder is None:
+                _recorder = LatencyRecorder()
+    return _recorder
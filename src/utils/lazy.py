@@ -0,0 +1,50 @@
+"""
+Deferred Initialization
+Module-level components that are only constructed when first used
+"""
+import threading
+from typing import Any, Callable
+
+
+class LazyObject:
+    """Stand-in for a component that is built by ``factory`` on first attribute access
+
+    Lets module globals such as ``analytics`` keep their names while the
+    expensive construction (opening databases, replaying logs) moves out of
+    import time and into the first request that actually needs it.
+    """
+
+    __slots__ = ('_factory', '_instance', '_lock', '__name__')
+
+    def __init__(self, factory: Callable[[], Any], name: str = ''):
+        object.__setattr__(self, '_factory', factory)
+        object.__setattr__(self, '_instance', None)
+        object.__setattr__(self, '_lock', threading.Lock())
+        object.__setattr__(self, '__name__', name or getattr(factory, '__name__', 'lazy'))
+
+    @property
+    def resolved(self) -> bool:
+        return self._instance is not None
+
+    def resolve(self) -> Any:
+        instance = self._instance
+        if instance is None:
+            with self._lock:
+                instance = self._instance
+                if instance is None:
+                    instance = self._factory()
+                    object.__setattr__(self, '_instance', instance)
+        return instance
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.resolve(), name)
+
+    def __setattr__(self, name: str, value: Any):
+        setattr(self.resolve(), name, value)
+
+    def __len__(self) -> int:
+        return len(self.resolve())
+
+    def __repr__(self) -> str:
+        state = repr(self._instance) if self.resolved else 'unresolved'
+        return f"<LazyObject {self.__name__}: {state}>"
@@ -0,0 +1,328 @@
+"""
+Buffered Background Log Writer
+Moves analytics file I/O off the request thread with group commits
+"""
+import atexit
+import csv
+import io
+import json
+import os
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from utils.latency_sketch import get_latency_recorder
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, each batch is still one O_APPEND write
+    fcntl = None
+
+DURABILITY_MODES = ('none', 'flush', 'fsync')
+
+
+def _open_append(path: str) -> int:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+
+class _AppendLock:
+    """Exclusive flock on an append fd, so a batch never interleaves with another process's"""
+
+    __slots__ = ('fd',)
+
+    def __init__(self, fd: int):
+        self.fd = fd
+
+    def __enter__(self):
+        if fcntl is not None:
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+
+    def __exit__(self, *exc_info):
+        if fcntl is not None:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+
+
+def _write_all(fd: int, data: bytes):
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+class CSVSink:
+    """Append-only CSV file that writes whole batches at once
+
+    Every gunicorn worker appends to the same file, so each batch is
+    encoded up front and written with a single ``O_APPEND`` write under an
+    exclusive ``flock``; rows from different processes never interleave.
+    The header is taken from the existing file, or from ``fieldnames`` /
+    the first record when the file is new, so rows always line up with it.
+    """
+
+    def __init__(self, path: str, fieldnames: Optional[Sequence[str]] = None):
+        self.path = path
+        self.fieldnames = list(fieldnames) if fieldnames else None
+        self._fd: Optional[int] = None
+        self._header_known = False
+
+    def _read_header(self) -> Optional[List[str]]:
+        with open(self.path, 'r', newline='', encoding='utf-8') as f:
+            return next(csv.reader(f), None)
+
+    def _encode(self, records: List[Dict[str, Any]], header: bool) -> bytes:
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=self.fieldnames, restval='', extrasaction='ignore')
+        if header:
+            writer.writeheader()
+        writer.writerows(records)
+        return buffer.getvalue().encode('utf-8')
+
+    def write_batch(self, records: List[Dict[str, Any]]):
+        if self._fd is None:
+            self._fd = _open_append(self.path)
+        with _AppendLock(self._fd):
+            # Decided under the lock: whichever worker writes first owns the header
+            empty = os.fstat(self._fd).st_size == 0
+            if not empty and not self._header_known:
+                self.fieldnames = self._read_header() or self.fieldnames
+            if not self.fieldnames:
+                self.fieldnames = list(records[0].keys())
+            _write_all(self._fd, self._encode(records, header=empty))
+            self._header_known = True
+
+    def flush(self, durability: str):
+        # Batches go straight to the OS; only fsync has anything left to do
+        if self._fd is not None and durability == 'fsync':
+            os.fsync(self._fd)
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+class JSONLSink:
+    """Append-only file with one JSON document per line, one locked write per batch"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd: Optional[int] = None
+
+    def write_batch(self, records: List[Any]):
+        if self._fd is None:
+            self._fd = _open_append(self.path)
+        data = ''.join(json.dumps(record, default=str) + '\n' for record in records).encode('utf-8')
+        with _AppendLock(self._fd):
+            _write_all(self._fd, data)
+
+    def flush(self, durability: str):
+        if self._fd is not None and durability == 'fsync':
+            os.fsync(self._fd)
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+class BufferedLogWriter:
+    """Single background thread that group-commits records to their sinks
+
+    ``submit()`` only enqueues; the writer thread drains the queue and hands
+    each sink its records as one batch once ``batch_size`` records are
+    waiting or ``flush_interval`` seconds have passed since the first one.
+    ``durability`` picks what happens after every group commit: ``none``
+    (leave it to the OS buffers), ``flush`` (flush to the OS) or ``fsync``.
+
+    The queue is bounded.  When it is full ``submit()`` waits up to
+    ``block_timeout`` seconds and then drops the record; both events are
+    counted in ``get_stats()``.
+    """
+
+    _STOP = object()
+    _FLUSH = object()
+
+    def __init__(self, max_queue: int = 10000, batch_size: int = 256,
+                 flush_interval: float = 0.2, durability: str = 'flush',
+                 block_timeout: float = 0.05):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"durability must be one of {DURABILITY_MODES}")
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.durability = durability
+        self.block_timeout = block_timeout
+
+        self._queue: 'queue.Queue' = queue.Queue(maxsize=max_queue)
+        self._file_sinks: Dict[str, Any] = {}
+        self._sinks_lock = threading.Lock()
+        self._closed = False
+        self.stats = {
+            'enqueued': 0,
+            'written': 0,
+            'dropped': 0,
+            'blocked': 0,
+            'batches': 0,
+            'errors': 0,
+            'queue_high_water': 0,
+            'last_batch_seconds': 0.0
+        }
+
+        self._thread = threading.Thread(target=self._run, name='log-writer', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def csv_sink(self, path: str, fieldnames: Optional[Sequence[str]] = None) -> CSVSink:
+        """Shared sink for a CSV file, so every caller appends through one handle"""
+        path = os.path.abspath(path)
+        with self._sinks_lock:
+            sink = self._file_sinks.get(path)
+            if sink is None:
+                sink = self._file_sinks[path] = CSVSink(path, fieldnames)
+            return sink
+
+    def jsonl_sink(self, path: str) -> JSONLSink:
+        """Shared sink for a JSON-lines file"""
+        path = os.path.abspath(path)
+        with self._sinks_lock:
+            sink = self._file_sinks.get(path)
+            if sink is None:
+                sink = self._file_sinks[path] = JSONLSink(path)
+            return sink
+
+    def submit(self, sink, record: Any) -> bool:
+        """Queue a record for ``sink``; returns False if it had to be dropped"""
+        if self._closed:
+            return False
+
+        item = (sink, record)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.stats['blocked'] += 1
+            try:
+                self._queue.put(item, timeout=self.block_timeout)
+            except queue.Full:
+                self.stats['dropped'] += 1
+                return False
+
+        self.stats['enqueued'] += 1
+        depth = self._queue.qsize()
+        if depth > self.stats['queue_high_water']:
+            self.stats['queue_high_water'] = depth
+        return True
+
+    def submit_many(self, sink, records: List[Any]) -> int:
+        """Queue several records for one sink; returns how many were accepted"""
+        return sum(1 for record in records if self.submit(sink, record))
+
+    def flush(self, timeout: Optional[float] = 5.0) -> bool:
+        """Block until everything queued so far has been committed"""
+        if self._closed or not self._thread.is_alive():
+            return False
+        done = threading.Event()
+        try:
+            self._queue.put((self._FLUSH, done), timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def close(self):
+        """Drain the queue, commit the last batch and close every sink"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put((self._STOP, None))
+        self._thread.join()
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth and backpressure counters"""
+        stats = dict(self.stats)
+        stats['queue_depth'] = self._queue.qsize()
+        stats['max_queue'] = self.max_queue
+        stats['durability'] = self.durability
+        return stats
+
+    def _run(self):
+        batch: Dict[Any, List[Any]] = {}
+        pending = 0
+        waiters: List[threading.Event] = []
+        deadline = None
+        stopping = False
+
+        while not stopping:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                sink, record = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                sink = None
+
+            if sink is self._STOP:
+                stopping = True
+            elif sink is self._FLUSH:
+                waiters.append(record)
+            elif sink is not None:
+                batch.setdefault(sink, []).append(record)
+                pending += 1
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            commit_due = (stopping or waiters or pending >= self.batch_size
+                          or (deadline is not None and time.monotonic() >= deadline))
+            if not commit_due:
+                continue
+
+            if pending:
+                self._commit(batch, pending)
+            batch, pending, deadline = {}, 0, None
+            for waiter in waiters:
+                waiter.set()
+            waiters = []
+
+        for sink in self._file_sinks.values():
+            sink.close()
+
+    def _commit(self, batch: Dict[Any, List[Any]], pending: int):
+        started = time.perf_counter()
+        recorder = get_latency_recorder()
+        for sink, records in batch.items():
+            try:
+                sink_started = time.perf_counter()
+                sink.write_batch(records)
+                sink.flush(self.durability)
+                recorder.record('log_write', type(sink).__name__, time.perf_counter() - sink_started)
+            except Exception as e:
+                self.stats['errors'] += 1
+                print(f"Error writing log batch to {getattr(sink, 'path', sink)}: {e}")
+        self.stats['written'] += pending
+        self.stats['batches'] += 1
+        self.stats['last_batch_seconds'] = time.perf_counter() - started
+
+
+_default_writer: Optional[BufferedLogWriter] = None
+_default_writer_lock = threading.Lock()
+
+
+def get_log_writer() -> BufferedLogWriter:
+    """Process-wide writer shared by the engine and the analytics dashboard
+
+    Tuned through LOG_WRITER_BATCH_SIZE, LOG_WRITER_FLUSH_INTERVAL,
+    LOG_WRITER_DURABILITY (none/flush/fsync) and LOG_WRITER_MAX_QUEUE.
+    """
+    global _default_writer
+    if _default_writer is None:
+        with _default_writer_lock:
+            if _default_writer is None:
+                _default_writer = BufferedLogWriter(
+                    max_queue=int(os.environ.get('LOG_WRITER_MAX_QUEUE', 10000)),
+                    batch_size=int(os.environ.get('LOG_WRITER_BATCH_SIZE', 256)),
+                    flush_interval=float(os.environ.get('LOG_WRITER_FLUSH_INTERVAL', 0.2)),
+                    durability=os.environ.get('LOG_WRITER_DURABILITY', 'flush')
+                )
+    return _default_writer
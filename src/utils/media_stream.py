@@ -0,0 +1,248 @@
+"""
+Twilio Media Streams Ingestion
+Base64 mu-law 8 kHz frames decoded into preallocated per-call rings and handed to the streaming transcriber
+"""
+import array
+import binascii
+import io
+import json
+import sys
+import threading
+import wave
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional
+
+from data.conversation_table import numpy_module
+from utils.whisper_api import DEFAULT_SAMPLE_RATE, FRAME_MS, StreamingTranscriber, TranscriptEvent
+
+
+def _mulaw_to_linear(byte: int) -> int:
+    """ITU-T G.711 mu-law byte -> 16-bit linear sample"""
+    byte = ~byte & 0xFF
+    magnitude = ((((byte & 0x0F) << 3) + 0x84) << ((byte & 0x70) >> 4)) - 0x84
+    return -magnitude if byte & 0x80 else magnitude
+
+
+MULAW_TO_PCM16 = [_mulaw_to_linear(code) for code in range(256)]
+# Low / high bytes of each little-endian sample, as bytes.translate() tables
+_LOW_BYTES = bytes(sample & 0xFF for sample in MULAW_TO_PCM16)
+_HIGH_BYTES = bytes((sample >> 8) & 0xFF for sample in MULAW_TO_PCM16)
+
+
+def _linear_to_mulaw(sample: int) -> int:
+    """ITU-T G.711 16-bit linear sample -> mu-law byte"""
+    sign = 0x80 if sample < 0 else 0
+    magnitude = min(abs(sample), 32635) + 0x84
+    exponent = max(0, magnitude.bit_length() - 8)
+    return ~(sign | (exponent << 4) | ((magnitude >> (exponent + 3)) & 0x0F)) & 0xFF
+
+
+@lru_cache(maxsize=1)
+def _encode_table() -> bytes:
+    # Indexed by the sample read as unsigned 16-bit
+    return bytes(_linear_to_mulaw(code - 65536 if code >= 32768 else code) for code in range(65536))
+
+
+def encode_mulaw(pcm) -> bytes:
+    """16-bit little-endian PCM -> mu-law bytes (for outbound media)"""
+    samples = array.array('H', bytes(pcm))
+    if sys.byteorder == 'big':
+        samples.byteswap()
+    return bytes(map(_encode_table().__getitem__, samples))
+
+
+def wav_to_mulaw(data: bytes) -> Optional[bytes]:
+    """mu-law body of an 8 kHz mono 16-bit WAV clip; None for any other format"""
+    with wave.open(io.BytesIO(data), 'rb') as clip:
+        if clip.getframerate() != DEFAULT_SAMPLE_RATE or clip.getnchannels() != 1 or clip.getsampwidth() != 2:
+            return None
+        return encode_mulaw(clip.readframes(clip.getnframes()))
+
+
+class PCMRing:
+    """Fixed-size ring of 16-bit PCM that hands out aligned windows as memoryviews
+
+    ``capacity`` is a whole number of windows, so a window never wraps and
+    can be passed on without copying.  Decoding writes straight into the
+    ring: with NumPy a lookup-table ``take`` into the int16 array, without
+    it two ``bytes.translate`` passes (one per output byte) interleaved by
+    strided slice assignment.  The ring itself is never reallocated.
+    """
+
+    def __init__(self, window_samples: int, windows: int = 8):
+        self.window_samples = window_samples
+        self.capacity = window_samples * windows
+        np = numpy_module()
+        if np is not None:
+            self._np = np
+            self._lut = np.array(MULAW_TO_PCM16, dtype='<i2')
+            self._samples = np.zeros(self.capacity, dtype='<i2')
+            self._view = memoryview(self._samples).cast('B')
+        else:
+            self._np = None
+            self._buffer = bytearray(self.capacity * 2)
+            self._view = memoryview(self._buffer)
+        self.written = 0  # total samples written
+        self.consumed = 0  # total samples handed out as windows
+        self.overruns = 0
+
+    def write_mulaw(self, data: bytes):
+        """Decode mu-law bytes into the ring"""
+        offset = 0
+        while offset < len(data):
+            position = self.written % self.capacity
+            count = min(len(data) - offset, self.capacity - position)
+            chunk = data[offset:offset + count] if offset or count < len(data) else data
+            if self._np is not None:
+                codes = self._np.frombuffer(chunk, dtype=self._np.uint8)
+                self._np.take(self._lut, codes, out=self._samples[position:position + count])
+            else:
+                start = position * 2
+                end = start + count * 2
+                self._view[start:end:2] = chunk.translate(_LOW_BYTES)
+                self._view[start + 1:end:2] = chunk.translate(_HIGH_BYTES)
+            self.written += count
+            offset += count
+
+        if self.written - self.consumed > self.capacity:
+            # Consumer fell a full ring behind; skip to the oldest intact window
+            behind = self.written - self.capacity
+            skipped = -(-(behind - self.consumed) // self.window_samples) * self.window_samples
+            self.consumed += skipped
+            self.overruns += 1
+
+    def windows(self):
+        """Yield every complete, unconsumed window as a memoryview into the ring"""
+        window_bytes = self.window_samples * 2
+        while self.written - self.consumed >= self.window_samples:
+            start = (self.consumed % self.capacity) * 2
+            self.consumed += self.window_samples
+            yield self._view[start:start + window_bytes]
+
+    def tail(self) -> Optional[memoryview]:
+        """The unconsumed samples short of a full window (never wraps), or None"""
+        remaining = self.written - self.consumed
+        if not remaining:
+            return None
+        start = (self.consumed % self.capacity) * 2
+        self.consumed = self.written
+        return self._view[start:start + remaining * 2]
+
+
+class MediaCall:
+    """One Twilio media stream: its ring buffer and transcriber"""
+
+    __slots__ = ('stream_sid', 'call_sid', 'ring', 'transcriber', 'frames', 'custom')
+
+    def __init__(self, stream_sid: str, call_sid: str, transcriber: StreamingTranscriber,
+                 window_ms: int, ring_windows: int, custom: Optional[Dict[str, Any]] = None):
+        self.stream_sid = stream_sid
+        self.call_sid = call_sid
+        self.transcriber = transcriber
+        self.ring = PCMRing(transcriber.sample_rate * window_ms // 1000, ring_windows)
+        self.frames = 0
+        self.custom = custom or {}
+
+    def push(self, payload: str) -> List[TranscriptEvent]:
+        """Ingest one base64 mu-law media payload; returns transcript events"""
+        self.ring.write_mulaw(binascii.a2b_base64(payload))
+        self.frames += 1
+        events: List[TranscriptEvent] = []
+        for window in self.ring.windows():
+            events.extend(self.transcriber.feed(window))
+        return events
+
+    def close(self) -> List[TranscriptEvent]:
+        """End of stream: feed the partial last window and finalize"""
+        events: List[TranscriptEvent] = []
+        tail = self.ring.tail()
+        if tail is not None:
+            events.extend(self.transcriber.feed(tail))
+        events.extend(self.transcriber.flush())
+        return events
+
+
+class MediaStreamHub:
+    """Routes Twilio Media Streams websocket messages to per-call pipelines
+
+    Handles the ``connected``, ``start``, ``media``, ``mark`` and ``stop``
+    events; inbound audio is decoded into the call's ring and fed to its
+    transcriber in ``window_ms`` windows.  ``on_transcript(call, event)``
+    receives every partial and final hypothesis.
+    """
+
+    def __init__(self, transcriber_factory: Callable[[], StreamingTranscriber] = StreamingTranscriber,
+                 on_transcript: Optional[Callable[[MediaCall, TranscriptEvent], None]] = None,
+                 window_ms: int = 5 * FRAME_MS, ring_windows: int = 16, max_calls: int = 10000):
+        self.transcriber_factory = transcriber_factory
+        self.on_transcript = on_transcript
+        self.window_ms = window_ms
+        self.ring_windows = ring_windows
+        self.max_calls = max_calls
+        self._calls: Dict[str, MediaCall] = {}
+        self._lock = threading.Lock()
+        self.stats = {'started': 0, 'stopped': 0, 'frames': 0, 'rejected': 0, 'ignored': 0}
+
+    def start(self, stream_sid: str, call_sid: str, media_format: Optional[Dict[str, Any]] = None,
+              custom: Optional[Dict[str, Any]] = None) -> Optional[MediaCall]:
+        media_format = media_format or {}
+        if media_format.get('encoding', 'audio/x-mulaw') != 'audio/x-mulaw' or \
+                int(media_format.get('sampleRate', DEFAULT_SAMPLE_RATE)) != DEFAULT_SAMPLE_RATE:
+            self.stats['rejected'] += 1
+            return None
+        with self._lock:
+            if len(self._calls) >= self.max_calls:
+                self.stats['rejected'] += 1
+                return None
+            call = MediaCall(stream_sid, call_sid, self.transcriber_factory(),
+                             self.window_ms, self.ring_windows, custom)
+            self._calls[stream_sid] = call
+        self.stats['started'] += 1
+        return call
+
+    def stop(self, stream_sid: str) -> Optional[MediaCall]:
+        with self._lock:
+            call = self._calls.pop(stream_sid, None)
+        if call is not None:
+            self.stats['stopped'] += 1
+            self._emit(call, call.close())
+        return call
+
+    def get(self, stream_sid: str) -> Optional[MediaCall]:
+        return self._calls.get(stream_sid)
+
+    def _emit(self, call: MediaCall, events: List[TranscriptEvent]):
+        if self.on_transcript is not None:
+            for event in events:
+                self.on_transcript(call, event)
+
+    def handle_message(self, message) -> List[TranscriptEvent]:
+        """Process one websocket message (JSON text or an already-parsed dict)"""
+        if not isinstance(message, dict):
+            message = json.loads(message)
+        event = message.get('event')
+
+        if event == 'media':
+            call = self._calls.get(message.get('streamSid'))
+            media = message.get('media') or {}
+            if call is None or media.get('track', 'inbound') != 'inbound':
+                self.stats['ignored'] += 1
+                return []
+            self.stats['frames'] += 1
+            events = call.push(media['payload'])
+            self._emit(call, events)
+            return events
+
+        if event == 'start':
+            start = message.get('start') or {}
+            self.start(message.get('streamSid') or start.get('streamSid'), start.get('callSid', ''),
+                       start.get('mediaFormat'), start.get('customParameters'))
+        elif event == 'stop':
+            self.stop(message.get('streamSid'))
+        return []
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def get_stats(self) -> Dict:
+        return {'active_streams': len(self), **self.stats}
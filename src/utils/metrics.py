@@ -0,0 +1,267 @@
+"""
+Prometheus Metrics
+Per-route request instrumentation and internal gauges in text exposition format
+"""
+import bisect
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Request latency buckets in seconds (upper bounds; +Inf is implicit)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+ROUTE_ENVIRON_KEY = 'metrics.route'
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[Any, ...], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+class _Metric:
+    def __init__(self, kind: str, name: str, documentation: str, labelnames: Tuple[str, ...]):
+        self.kind = kind
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Monotonic counter per label set"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__('counter', name, documentation, tuple(labelnames))
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, *labelvalues: Any, amount: float = 1.0):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}"
+                                for key, value in values]
+
+
+class Gauge(_Metric):
+    """Gauge that is either set directly or read from a callback at scrape time
+
+    A callback may return a number, or a dict mapping label-value tuples
+    to numbers for labelled gauges.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 callback: Optional[Callable[[], Any]] = None):
+        super().__init__('gauge', name, documentation, tuple(labelnames))
+        self.callback = callback
+        self._values: Dict[Tuple, float] = {}
+
+    def set(self, value: float, *labelvalues: Any):
+        with self._lock:
+            self._values[labelvalues] = value
+
+    def inc(self, *labelvalues: Any, amount: float = 1.0):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def dec(self, *labelvalues: Any, amount: float = 1.0):
+        self.inc(*labelvalues, amount=-amount)
+
+    def render(self) -> List[str]:
+        if self.callback is not None:
+            try:
+                value = self.callback()
+            except Exception as e:
+                print(f"Error collecting metric {self.name}: {e}")
+                return []
+            values = value.items() if isinstance(value, dict) else [((), value)]
+        else:
+            with self._lock:
+                values = list(self._values.items())
+        return self.header() + [f"{self.name}{_labels(self.labelnames, key)} {_number(float(value))}"
+                                for key, value in sorted(values)]
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram per label set"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = LATENCY_BUCKETS):
+        super().__init__('histogram', name, documentation, tuple(labelnames))
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[Tuple, List] = {}  # labels -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value: float, *labelvalues: Any):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labelvalues)
+            if series is None:
+                series = self._values[labelvalues] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted((key, list(series)) for key, series in self._values.items())
+        lines = self.header()
+        for key, series in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series[:-1]):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(series[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class SketchSummary(_Metric):
+    """Prometheus summary rendered from a LatencyRecorder's quantile sketches"""
+
+    def __init__(self, name: str, documentation: str, recorder, metric: str, labelname: str):
+        super().__init__('summary', name, documentation, (labelname,))
+        self.recorder = recorder
+        self.metric = metric
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for (metric, label), sketch in sorted(self.recorder.sketches().items()):
+            if metric != self.metric:
+                continue
+            key = (label,)
+            for q, value in sketch.quantiles().items():
+                quantile = f'quantile="{q:g}"'
+                lines.append(f"{self.name}{_labels(self.labelnames, key, quantile)} {_number(value)}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(sketch.total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {sketch.count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Ordered set of metrics rendered together for /api/metrics"""
+
+    CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+    def __init__(self, namespace: str = ''):
+        self.namespace = namespace
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> Any:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def _name(self, name: str) -> str:
+        return f"{self.namespace}_{name}" if self.namespace else name
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(self._name(name), documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+              callback: Optional[Callable[[], Any]] = None) -> Gauge:
+        return self._register(Gauge(self._name(name), documentation, labelnames, callback))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Iterable[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(self._name(name), documentation, labelnames, buckets))
+
+    def sketch_summary(self, name: str, documentation: str, recorder, metric: str,
+                       labelname: str) -> SketchSummary:
+        return self._register(SketchSummary(self._name(name), documentation, recorder, metric, labelname))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+class RequestMetricsMiddleware:
+    """WSGI middleware counting requests, statuses, in-flight requests and latency per route
+
+    The route label is the matched URL rule, which the app stores in the
+    environ under ``ROUTE_ENVIRON_KEY`` (unmatched paths are grouped as
+    ``unmatched`` so 404 scans cannot create unbounded label sets).
+    Latency runs until the response body is closed, so a streaming
+    response is timed for its whole lifetime.
+    """
+
+    def __init__(self, wsgi_app, registry: MetricsRegistry):
+        self.wsgi_app = wsgi_app
+        self.requests = registry.counter(
+            'http_requests_total', 'HTTP requests by route, method and status', ('route', 'method', 'status'))
+        self.in_flight = registry.gauge(
+            'http_requests_in_flight', 'HTTP requests currently being served')
+        self.latency = registry.histogram(
+            'http_request_duration_seconds', 'HTTP request latency by route', ('route', 'method'))
+
+    def __call__(self, environ, start_response):
+        started = time.perf_counter()
+        status_holder = ['500']
+
+        def recording_start_response(status, headers, exc_info=None):
+            status_holder[0] = status.split(' ', 1)[0]
+            return start_response(status, headers, exc_info)
+
+        self.in_flight.inc()
+        try:
+            body = self.wsgi_app(environ, recording_start_response)
+        except Exception:
+            self._finish(environ, started, '500')
+            raise
+        return _ClosingBody(body, lambda: self._finish(environ, started, status_holder[0]))
+
+    def _finish(self, environ, started: float, status: str):
+        route = environ.get(ROUTE_ENVIRON_KEY, 'unmatched')
+        method = environ.get('REQUEST_METHOD', 'GET')
+        self.in_flight.dec()
+        self.requests.inc(route, method, status)
+        self.latency.observe(time.perf_counter() - started, route, method)
+
+
+class _ClosingBody:
+    """Response iterable that runs a callback exactly once when closed"""
+
+    def __init__(self, body, on_close: Callable[[], None]):
+        self._body = body
+        self._on_close = on_close
+        self._closed = False
+
+    def __iter__(self):
+        return iter(self._body)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            close = getattr(self._body, 'close', None)
+            if close is not None:
+                close()
+        finally:
+            self._on_close()
@@ -1,5 +1,5 @@
-import requests
-from config import SLACK_WEBHOOK_URL
-
 def send_report(message):
+    # Imported on use: requests is slow to import and only needed when a report is sent
+    import requests
+    from config import SLACK_WEBHOOK_URL
     requests.post(SLACK_WEBHOOK_URL, json={"text": message})
@@ -0,0 +1,142 @@
+"""
+Live Stats Broadcaster
+One publisher thread fans real-time stats out to every SSE subscriber
+"""
+import json
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, Optional
+
+
+class StatsSubscription:
+    """A connected live-stats client and its bounded outbound queue"""
+
+    __slots__ = ('queue', 'deltas', 'dropped')
+
+    def __init__(self, queue_size: int, deltas: bool):
+        self.queue: 'queue.Queue' = queue.Queue(maxsize=queue_size)
+        self.deltas = deltas
+        self.dropped = False
+
+
+class StatsBroadcaster:
+    """Compute a stats snapshot once per tick and fan it out to all subscribers
+
+    The publisher thread only runs while someone is subscribed.  A snapshot
+    is serialized once per tick and the same string goes to every client;
+    nothing is sent when the stats did not change.  Clients that let their
+    queue fill up are disconnected instead of slowing everyone else down.
+    Delta subscribers get one full snapshot and then only the top-level
+    fields that changed.
+    """
+
+    _CLOSE = None
+
+    def __init__(self, snapshot_fn: Callable[[], Dict[str, Any]], interval: float = 5.0,
+                 heartbeat_interval: float = 15.0, queue_size: int = 8):
+        self.snapshot_fn = snapshot_fn
+        self.interval = interval
+        self.heartbeat_interval = heartbeat_interval
+        self.queue_size = queue_size
+
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._thread: Optional[threading.Thread] = None
+        self._latest: Optional[Dict[str, Any]] = None
+        self._latest_event: Optional[str] = None
+        self.stats = {'ticks': 0, 'messages_sent': 0, 'slow_consumers_dropped': 0, 'errors': 0}
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self, deltas: bool = False) -> StatsSubscription:
+        subscription = StatsSubscription(self.queue_size, deltas)
+        with self._lock:
+            self._subscribers.add(subscription)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='live-stats', daemon=True)
+                self._thread.start()
+        return subscription
+
+    def unsubscribe(self, subscription: StatsSubscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def stream(self, subscription: StatsSubscription) -> Iterator[str]:
+        """SSE body for one client: current snapshot, then updates and heartbeats"""
+        try:
+            latest = self._latest_event
+            if latest is None:
+                latest = self._format(self._publish_snapshot(), 'snapshot', subscription.deltas)
+            elif subscription.deltas:
+                latest = f"event: snapshot\n{latest}"
+            yield latest
+
+            while not subscription.dropped:
+                try:
+                    message = subscription.queue.get(timeout=self.heartbeat_interval)
+                except queue.Empty:
+                    yield ": heartbeat\n\n"
+                    continue
+                if message is self._CLOSE:
+                    break
+                yield message
+        finally:
+            self.unsubscribe(subscription)
+
+    def _publish_snapshot(self) -> Dict[str, Any]:
+        snapshot = self.snapshot_fn()
+        self._latest = snapshot
+        self._latest_event = f"data: {json.dumps(snapshot)}\n\n"
+        return snapshot
+
+    @staticmethod
+    def _format(payload: Dict[str, Any], event: str, named: bool) -> str:
+        data = f"data: {json.dumps(payload)}\n\n"
+        return f"event: {event}\n{data}" if named else data
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._subscribers:
+                    self._thread = None
+                    return
+
+            started = time.monotonic()
+            try:
+                previous = self._latest
+                snapshot = self._publish_snapshot()
+                self.stats['ticks'] += 1
+                if snapshot != previous:
+                    changed = {key: value for key, value in snapshot.items()
+                               if previous is None or previous.get(key) != value}
+                    self._fan_out(self._latest_event, self._format(changed, 'delta', True))
+            except Exception as e:
+                self.stats['errors'] += 1
+                error = f"data: {json.dumps({'error': str(e)})}\n\n"
+                self._fan_out(error, error)
+
+            time.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def _fan_out(self, full_message: str, delta_message: str):
+        with self._lock:
+            subscribers = list(self._subscribers)
+
+        for subscription in subscribers:
+            message = delta_message if subscription.deltas else full_message
+            try:
+                subscription.queue.put_nowait(message)
+                self.stats['messages_sent'] += 1
+            except queue.Full:
+                self._drop(subscription)
+
+    def _drop(self, subscription: StatsSubscription):
+        """Disconnect a client that stopped reading"""
+        subscription.dropped = True
+        self.unsubscribe(subscription)
+        self.stats['slow_consumers_dropped'] += 1
+        with subscription.queue.mutex:
+            subscription.queue.queue.clear()
+        subscription.queue.put_nowait(self._CLOSE)
@@ -0,0 +1,163 @@
+"""
+Turn Tracing and Request Profiling
+Hot-path spans for chat turns, sampled to JSONL, plus an opt-in cProfile switch
+"""
+import contextvars
+import io
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, TYPE_CHECKING
+
+from utils.log_writer import get_log_writer
+
+if TYPE_CHECKING:
+    import cProfile
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar('current_trace', default=None)
+
+
+class Trace:
+    """Timed spans collected while handling one request"""
+
+    __slots__ = ('name', 'started', 'spans')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = time.perf_counter()
+        self.spans: List[Dict[str, Any]] = []
+
+    def add(self, name: str, started: float, ended: float):
+        self.spans.append({
+            'name': name,
+            'start_ms': round((started - self.started) * 1000, 3),
+            'duration_ms': round((ended - started) * 1000, 3)
+        })
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'trace': self.name,
+            'timestamp': datetime.now().isoformat(),
+            'total_ms': round((time.perf_counter() - self.started) * 1000, 3),
+            'spans': self.spans
+        }
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time a block into the active trace; a no-op when no trace is active"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, started, time.perf_counter())
+
+
+def start_trace(name: str) -> Trace:
+    trace = Trace(name)
+    _current_trace.set(trace)
+    return trace
+
+
+def end_trace() -> Optional[Trace]:
+    trace = _current_trace.get()
+    _current_trace.set(None)
+    return trace
+
+
+class TraceSampler:
+    """Decides which requests get traced and appends sampled traces to a JSONL file"""
+
+    def __init__(self, path: str, sample_rate: float = 0.01):
+        self.path = path
+        self.sample_rate = sample_rate
+        self._random = random.Random()
+
+    def should_sample(self) -> bool:
+        return self.sample_rate > 0 and self._random.random() < self.sample_rate
+
+    def record(self, trace: Trace):
+        writer = get_log_writer()
+        writer.submit(writer.jsonl_sink(self.path), trace.to_dict())
+
+
+class RequestProfiler:
+    """Run cProfile over the next N requests and dump the combined pstats
+
+    Only one request is profiled at a time (cProfile cannot profile two
+    threads at once); requests that arrive while another is being profiled
+    run normally and do not count towards N.
+    """
+
+    def __init__(self, output_dir: str):
+        self.output_dir = output_dir
+        self._lock = threading.Lock()
+        self._active = threading.Lock()
+        self.remaining = 0
+        self.profiled = 0
+        self._stats = None  # pstats.Stats accumulated over the profiled requests
+        self.last_dump: Optional[Dict[str, Any]] = None
+
+    def arm(self, requests: int):
+        """Profile the next ``requests`` requests (0 cancels)"""
+        with self._lock:
+            self.remaining = max(0, requests)
+            self.profiled = 0
+            self._stats = None
+
+    def start(self) -> Optional['cProfile.Profile']:
+        """Begin profiling the current request if the profiler is armed"""
+        if not self.remaining or not self._active.acquire(blocking=False):
+            return None
+        with self._lock:
+            if not self.remaining:
+                self._active.release()
+                return None
+            self.remaining -= 1
+        import cProfile  # only loaded once profiling has been requested
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:  # another profiler is already active in this process
+            self._active.release()
+            return None
+        return profile
+
+    def stop(self, profile: 'cProfile.Profile'):
+        import pstats
+        profile.disable()
+        try:
+            with self._lock:
+                if self._stats is None:
+                    self._stats = pstats.Stats(profile)
+                else:
+                    self._stats.add(profile)
+                self.profiled += 1
+                if not self.remaining:
+                    self._dump()
+        finally:
+            self._active.release()
+
+    def _dump(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, f"profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pstats")
+        self._stats.dump_stats(path)
+
+        report = io.StringIO()
+        self._stats.stream = report
+        self._stats.sort_stats('cumulative').print_stats(25)
+        with open(path[:-len('.pstats')] + '.txt', 'w', encoding='utf-8') as f:
+            f.write(report.getvalue())
+
+        self.last_dump = {'path': path, 'requests': self.profiled, 'timestamp': datetime.now().isoformat()}
+        self._stats = None
+
+    def status(self) -> Dict[str, Any]:
+        return {'remaining': self.remaining, 'profiled': self.profiled, 'last_dump': self.last_dump}
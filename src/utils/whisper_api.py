@@ -1,2 +1,246 @@
-def transcribe(audio_path):
-    return "Mock transcription: Hello, I'm calling about your account."
+"""
+Streaming Speech Transcription
+Incremental PCM frames in, partial and final hypotheses out, with energy-based endpointing
+"""
+import array
+import importlib
+import operator
+import sys
+import wave
+from typing import List, Optional, Sequence
+
+DEFAULT_SAMPLE_RATE = 8000  # telephone audio
+FRAME_MS = 20
+
+
+class TranscriptEvent:
+    """A partial or final hypothesis for one utterance"""
+
+    __slots__ = ('kind', 'text', 'utterance', 'start', 'end')
+
+    def __init__(self, kind: str, text: str, utterance: int, start: float, end: float):
+        self.kind = kind  # 'partial' or 'final'
+        self.text = text
+        self.utterance = utterance
+        self.start = start  # seconds into the stream
+        self.end = end
+
+    @property
+    def is_final(self) -> bool:
+        return self.kind == 'final'
+
+    def __repr__(self) -> str:
+        return f"TranscriptEvent({self.kind}, #{self.utterance}, {self.start:.2f}-{self.end:.2f}s, {self.text!r})"
+
+
+class ScriptedBackend:
+    """Deterministic stand-in for a speech recognizer
+
+    Utterance *n* is transcribed as ``lines[n % len(lines)]``; partials
+    reveal the line word by word in proportion to how much audio has
+    arrived, the way a real recognizer firms up as the speaker goes on.
+    """
+
+    name = 'scripted'
+
+    def __init__(self, lines: Optional[Sequence[str]] = None, words_per_second: float = 2.5):
+        self.lines = list(lines or ["Mock transcription: Hello, I'm calling about your account."])
+        self.words_per_second = words_per_second
+        self.utterances = 0
+
+    def transcribe(self, pcm: bytes, sample_rate: int, final: bool) -> str:
+        line = self.lines[self.utterances % len(self.lines)]
+        if final:
+            self.utterances += 1
+            return line
+        words = line.split()
+        seconds = len(pcm) / (2 * sample_rate)
+        return ' '.join(words[:max(1, min(len(words), int(seconds * self.words_per_second)))])
+
+
+def load_backend(spec: str):
+    """Build a backend from 'scripted' or a 'package.module:ClassName' import path"""
+    if spec in ('', 'scripted'):
+        return ScriptedBackend()
+    module_name, _, class_name = spec.partition(':')
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+def frame_rms(frame) -> float:
+    """Root-mean-square level of 16-bit little-endian mono PCM (any bytes-like, read in place)"""
+    if sys.byteorder == 'big':
+        samples = array.array('h', bytes(frame))
+        samples.byteswap()
+    else:
+        samples = memoryview(frame).cast('B').cast('h')
+    if not len(samples):
+        return 0.0
+    return (sum(map(operator.mul, samples, samples)) / len(samples)) ** 0.5
+
+
+class EnergyEndpointer:
+    """Speech / silence decisions per frame against an adaptive noise floor
+
+    A frame is voiced when its RMS exceeds ``max(min_rms, noise_floor *
+    ratio)``; the floor tracks unvoiced frames.  Speech starts after
+    ``start_ms`` of consecutive voiced frames and ends after ``end_ms`` of
+    consecutive unvoiced ones.
+    """
+
+    def __init__(self, frame_ms: int = FRAME_MS, min_rms: float = 300.0, ratio: float = 3.0,
+                 start_ms: int = 60, end_ms: int = 500, floor_decay: float = 0.95):
+        self.min_rms = min_rms
+        self.ratio = ratio
+        self.start_frames = max(1, start_ms // frame_ms)
+        self.end_frames = max(1, end_ms // frame_ms)
+        self.floor_decay = floor_decay
+        self.noise_floor = min_rms / ratio
+        self.in_speech = False
+        self._voiced_run = 0
+        self._unvoiced_run = 0
+
+    def update(self, rms: float) -> Optional[str]:
+        """Feed one frame's level; returns 'start', 'end' or None"""
+        voiced = rms > max(self.min_rms, self.noise_floor * self.ratio)
+        if not voiced:
+            self.noise_floor = self.floor_decay * self.noise_floor + (1 - self.floor_decay) * rms
+
+        if voiced:
+            self._voiced_run += 1
+            self._unvoiced_run = 0
+        else:
+            self._unvoiced_run += 1
+            self._voiced_run = 0
+
+        if not self.in_speech and self._voiced_run >= self.start_frames:
+            self.in_speech = True
+            return 'start'
+        if self.in_speech and self._unvoiced_run >= self.end_frames:
+            self.in_speech = False
+            return 'end'
+        return None
+
+
+class StreamingTranscriber:
+    """Feeds arbitrary-sized PCM chunks through endpointing into a backend
+
+    While an utterance is in progress the backend is asked for a partial
+    hypothesis every ``partial_interval`` seconds of new audio (only
+    changed text is emitted); when the endpointer hears the speaker stop,
+    or the utterance reaches ``max_utterance`` seconds, a final
+    hypothesis is emitted and the buffer is reset.
+    """
+
+    def __init__(self, backend=None, sample_rate: int = DEFAULT_SAMPLE_RATE,
+                 endpointer: Optional[EnergyEndpointer] = None, partial_interval: float = 0.5,
+                 max_utterance: float = 15.0, preroll_ms: int = 200):
+        self.backend = backend if backend is not None else ScriptedBackend()
+        self.sample_rate = sample_rate
+        self.frame_bytes = sample_rate * FRAME_MS // 1000 * 2
+        self.endpointer = endpointer if endpointer is not None else EnergyEndpointer()
+        self.partial_bytes = int(partial_interval * sample_rate) * 2
+        self.max_utterance_bytes = int(max_utterance * sample_rate) * 2
+        self.preroll_frames = max(0, preroll_ms // FRAME_MS)
+        self._pending = bytearray()  # less than one frame, carried to the next feed()
+        # Circular lead-in buffer: the last ``preroll_frames`` unvoiced frames
+        self._preroll = bytearray(self.preroll_frames * self.frame_bytes)
+        self._preroll_next = 0
+        self._preroll_filled = 0
+        self._utterance = bytearray()
+        self._since_partial = 0
+        self._last_partial = ''
+        self._utterance_start = 0.0
+        self.frames = 0
+        self.utterances = 0
+
+    @property
+    def position(self) -> float:
+        """Seconds of audio consumed so far"""
+        return self.frames * FRAME_MS / 1000
+
+    def feed(self, pcm) -> List[TranscriptEvent]:
+        """Consume 16-bit mono PCM (bytes or a memoryview, not retained); returns any hypotheses produced"""
+        events: List[TranscriptEvent] = []
+        view = memoryview(pcm).cast('B')
+        frame_bytes = self.frame_bytes
+        if self._pending:
+            # Complete the partial frame left over from the previous chunk
+            needed = frame_bytes - len(self._pending)
+            self._pending += view[:needed]
+            view = view[needed:]
+            if len(self._pending) < frame_bytes:
+                return events
+            self._frame(self._pending, events)
+            self._pending.clear()
+
+        offset = 0
+        while len(view) - offset >= frame_bytes:
+            self._frame(view[offset:offset + frame_bytes], events)
+            offset += frame_bytes
+        self._pending += view[offset:]
+        return events
+
+    def _frame(self, frame, events: List[TranscriptEvent]):
+        self.frames += 1
+        transition = self.endpointer.update(frame_rms(frame))
+
+        if not self.endpointer.in_speech and transition != 'end':
+            if self._preroll:
+                start = self._preroll_next * self.frame_bytes
+                self._preroll[start:start + self.frame_bytes] = frame
+                self._preroll_next = (self._preroll_next + 1) % self.preroll_frames
+                self._preroll_filled = min(self._preroll_filled + 1, self.preroll_frames)
+            return
+
+        if transition == 'start':
+            # Keep the frames that triggered detection plus a little lead-in
+            oldest = (self._preroll_next - self._preroll_filled) % max(1, self.preroll_frames)
+            for index in range(self._preroll_filled):
+                start = (oldest + index) % self.preroll_frames * self.frame_bytes
+                self._utterance += memoryview(self._preroll)[start:start + self.frame_bytes]
+            self._preroll_filled = 0
+            self._utterance_start = self.position - len(self._utterance) / (2 * self.sample_rate) - FRAME_MS / 1000
+        self._utterance += frame
+        self._since_partial += len(frame)
+
+        if transition == 'end' or len(self._utterance) >= self.max_utterance_bytes:
+            events.append(self._finalize())
+            if transition != 'end':
+                self.endpointer.in_speech = False
+        elif self._since_partial >= self.partial_bytes:
+            self._since_partial = 0
+            text = self.backend.transcribe(bytes(self._utterance), self.sample_rate, False)
+            if text and text != self._last_partial:
+                self._last_partial = text
+                events.append(TranscriptEvent('partial', text, self.utterances, self._utterance_start, self.position))
+
+    def _finalize(self) -> TranscriptEvent:
+        text = self.backend.transcribe(bytes(self._utterance), self.sample_rate, True)
+        event = TranscriptEvent('final', text, self.utterances, self._utterance_start, self.position)
+        self.utterances += 1
+        self._utterance = bytearray()
+        self._since_partial = 0
+        self._last_partial = ''
+        return event
+
+    def flush(self) -> List[TranscriptEvent]:
+        """End of stream: finalize an utterance still in progress"""
+        if self._utterance:
+            self.endpointer.in_speech = False
+            return [self._finalize()]
+        return []
+
+
+def transcribe(audio_path, backend=None):
+    """Transcribe a 16-bit mono WAV file by streaming it through StreamingTranscriber"""
+    with wave.open(audio_path, 'rb') as source:
+        transcriber = StreamingTranscriber(backend, sample_rate=source.getframerate())
+        finals = []
+        chunk = source.getframerate() // 10
+        while True:
+            pcm = source.readframes(chunk)
+            if not pcm:
+                break
+            finals.extend(event.text for event in transcriber.feed(pcm) if event.is_final)
+    finals.extend(event.text for event in transcriber.flush())
+    return ' '.join(finals)
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Admission control overload benchmark
+Offers more chat turns than the process can run, with and without the AdmissionController
+
+Usage: python tests/benchmark_admission.py [overload factor] [seconds]   (default: 2.0 3)
+"""
+
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from ai.session_manager import SessionManager
+from utils.admission import ADMITTED, AdmissionController
+
+TURN_SECONDS = 0.002  # engine turn padded to model a heavier strategy
+BUDGET_MS = 250.0
+
+
+# A saturated core modelled as one lock held per turn: only one turn progresses at a time, but the
+# arrival loop (sleeping, GIL released) keeps offering calls at the configured rate
+core = threading.Lock()
+
+
+def engine_turn(sessions, conversation_id):
+    with core:
+        started = time.perf_counter()
+        with sessions.session(conversation_id) as engine:
+            engine.take_turn("Your computer has a virus, buy gift cards now")
+        time.sleep(max(0.0, TURN_SECONDS - (time.perf_counter() - started)))
+
+
+def offer_load(controller, rate, seconds):
+    """Open-loop arrivals, one thread per call as the threaded server does"""
+    sessions = SessionManager()
+    latencies, shed, threads = [], [], []
+    rng = random.Random(7)
+
+    def call(index):
+        started = time.perf_counter()
+        if controller is None:
+            engine_turn(sessions, f"conv-{index % 200}")
+        else:
+            with controller.slot() as outcome:
+                if outcome != ADMITTED:
+                    shed.append(outcome)
+                    return
+                engine_turn(sessions, f"conv-{index % 200}")
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    deadline = time.perf_counter() + seconds
+    next_arrival = time.perf_counter()
+    index = 0
+    while next_arrival < deadline:
+        time.sleep(max(0.0, next_arrival - time.perf_counter()))
+        thread = threading.Thread(target=call, args=(index,))
+        thread.start()
+        threads.append(thread)
+        index += 1
+        next_arrival += rng.expovariate(rate)
+    for thread in threads:
+        thread.join()
+    return index, sorted(latencies), shed
+
+
+def percentile(values, q):
+    return values[min(len(values) - 1, int(q * len(values)))] if values else float('nan')
+
+
+def report(label, offered, latencies, shed):
+    within = sum(1 for latency in latencies if latency <= BUDGET_MS)
+    print(f"\n   {label}")
+    print(f"     offered {offered}, served {len(latencies)}, shed {len(shed)}")
+    print(f"     served p50 {percentile(latencies, 0.5):7.1f} ms  p99 {percentile(latencies, 0.99):7.1f} ms  "
+          f"max {latencies[-1] if latencies else float('nan'):7.1f} ms")
+    print(f"     within {BUDGET_MS:.0f} ms budget: {within}/{offered}")
+    return percentile(latencies, 0.99)
+
+
+def main(factor, seconds):
+    print("⏱️  Admission Control Benchmark")
+    print("=" * 50)
+    capacity = 1 / TURN_SECONDS
+    rate = capacity * factor
+    print(f"   capacity ~{capacity:.0f} turns/s, offering {rate:.0f} turns/s for {seconds:.0f}s")
+
+    offered, latencies, shed = offer_load(None, rate, seconds)
+    report("no admission control", offered, latencies, shed)
+
+    controller = AdmissionController(max_concurrent=2, max_queue=8, queue_timeout=0.05)
+    offered, latencies, shed = offer_load(controller, rate, seconds)
+    p99 = report("AdmissionController(2 slots, queue 8, 50 ms)", offered, latencies, shed)
+    print(f"     {controller.get_stats()}")
+    return p99 <= BUDGET_MS
+
+
+if __name__ == "__main__":
+    factor = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 3
+    passed = main(factor, seconds)
+    print("\n✅ Admitted turns stayed within budget" if passed else "\n❌ Admitted turns missed the budget")
+    sys.exit(0 if passed else 1)
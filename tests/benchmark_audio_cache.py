@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+TTS audio cache benchmark
+Plays engine turns through prepare-audio with a slow stub synthesizer, cold versus warmed, and checks eviction
+
+Usage: python tests/benchmark_audio_cache.py [turns] [synthesis ms]   (default: 500 50)
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from ai.session_manager import SessionManager
+from utils.audio_utils import AudioCache, StubSynthesizer, response_corpus
+
+SCAMMER_LINES = [
+    "This is Microsoft support, your computer has a virus",
+    "You need to buy gift cards right now to pay the fee",
+    "This is the IRS, there is a warrant for your arrest",
+    "Please give me your bank account number immediately",
+]
+
+
+def play_turns(cache, turns):
+    """Audio latency per turn for ``turns`` engine responses"""
+    sessions = SessionManager()
+    timings = []
+    for index in range(turns):
+        with sessions.session(f"call-{index // 20}") as engine:
+            response = engine.take_turn(SCAMMER_LINES[index % len(SCAMMER_LINES)])['response']
+        started = time.perf_counter()
+        cache.get(response)
+        timings.append((time.perf_counter() - started) * 1000)
+    return sorted(timings)
+
+
+def report(label, cache, timings):
+    p99 = timings[min(len(timings) - 1, int(0.99 * len(timings)))]
+    stats = cache.get_stats()
+    hits = stats['memory_hits'] + stats['disk_hits']
+    print(f"\n   {label}")
+    print(f"     audio per turn p50 {statistics.median(timings):7.2f} ms  p99 {p99:7.2f} ms  "
+          f"total {sum(timings) / 1000:6.2f} s")
+    print(f"     hits {hits}, synthesized {stats['synthesized']}, "
+          f"hit ratio {hits / max(1, hits + stats['synthesized']):.1%}")
+
+
+def main(turns, synthesis_ms):
+    print("⏱️  TTS Audio Cache Benchmark")
+    print("=" * 50)
+    synthesizer = StubSynthesizer(delay=synthesis_ms / 1000)
+    with tempfile.TemporaryDirectory() as tmp:
+        cold = AudioCache(os.path.join(tmp, 'cold'), synthesizer)
+        report("cold cache", cold, play_turns(cold, turns))
+
+        warm = AudioCache(os.path.join(tmp, 'warm'), synthesizer)
+        started = time.perf_counter()
+        result = warm.warm(response_corpus())
+        print(f"\n   warm-up: {result['synthesized']} clips in {time.perf_counter() - started:.1f}s")
+        warm.stats.update(synthesized=0)
+        report("warmed cache", warm, play_turns(warm, turns))
+
+        restarted = AudioCache(os.path.join(tmp, 'warm'), synthesizer, memory_bytes=0)
+        report("new worker on the same disk store, no memory tier", restarted, play_turns(restarted, turns))
+
+        limit = 1024 * 1024
+        bounded = AudioCache(os.path.join(tmp, 'bounded'), StubSynthesizer(), max_disk_bytes=limit)
+        bounded.warm(response_corpus())
+        stats = bounded.get_stats()
+        print(f"\n   1 MB disk bound: {stats['disk_clips']} clips, {stats['disk_bytes'] / 1024:.0f} KB on disk, "
+              f"{stats['evicted']} evicted")
+        return stats['disk_bytes'] <= limit
+
+
+if __name__ == "__main__":
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    synthesis_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 50
+    passed = main(turns, synthesis_ms)
+    print("\n✅ Disk store stayed within its bound" if passed else "\n❌ Disk store exceeded its bound")
+    sys.exit(0 if passed else 1)
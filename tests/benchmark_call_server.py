@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Asyncio call server benchmark
+Holds many idle media-stream calls open against one server process while active calls take turns, and checks nothing stalls
+
+Usage: python tests/benchmark_call_server.py [idle calls] [active calls]   (default: 1000 20)
+"""
+
+import asyncio
+import base64
+import json
+import os
+import random
+import resource
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, SRC)
+
+from benchmark_transcription import synthesize_call
+from utils.media_stream import encode_mulaw
+
+SCAMMER_LINE = [(0.4, False), (2.0, True), (1.2, False)]  # one utterance then a pause
+SPEECH_ENDS = 2.4
+FRAME_BYTES = 160
+
+
+class StreamClient:
+    """Twilio's side of a media-stream websocket"""
+
+    def __init__(self, reader, writer, stream_sid):
+        self.reader = reader
+        self.writer = writer
+        self.stream_sid = stream_sid
+
+    @classmethod
+    async def connect(cls, port, stream_sid):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        key = base64.b64encode(os.urandom(16)).decode()
+        writer.write((f"GET /voice/stream HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\nUpgrade: websocket\r\n"
+                      f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n").encode())
+        head = await reader.readuntil(b'\r\n\r\n')
+        if not head.startswith(b'HTTP/1.1 101'):
+            raise ConnectionError(head.split(b'\r\n')[0].decode())
+        client = cls(reader, writer, stream_sid)
+        await client.send({'event': 'connected', 'protocol': 'Call', 'version': '1.0.0'})
+        await client.send({'event': 'start', 'streamSid': stream_sid, 'start': {
+            'streamSid': stream_sid, 'callSid': 'CA' + stream_sid[2:],
+            'mediaFormat': {'encoding': 'audio/x-mulaw', 'sampleRate': 8000, 'channels': 1}}})
+        return client
+
+    async def send(self, message):
+        payload = json.dumps(message).encode()
+        mask = os.urandom(4)
+        length = len(payload)
+        head = bytes((0x81, 0x80 | (length if length < 126 else 126)))
+        if length >= 126:
+            head += length.to_bytes(2, 'big')
+        key = (mask * (length // 4 + 1))[:length]
+        masked = (int.from_bytes(payload, 'little') ^ int.from_bytes(key, 'little')).to_bytes(length, 'little')
+        self.writer.write(head + mask + masked)
+        await self.writer.drain()
+
+    async def receive(self):
+        first, second = await self.reader.readexactly(2)
+        length = second & 0x7F
+        if length == 126:
+            length = int.from_bytes(await self.reader.readexactly(2), 'big')
+        elif length == 127:
+            length = int.from_bytes(await self.reader.readexactly(8), 'big')
+        payload = await self.reader.readexactly(length)
+        return json.loads(payload) if first & 0x0F == 0x1 else None
+
+    async def stream_audio(self, mulaw, paced=True):
+        """Send 20 ms frames, in real time unless ``paced`` is off"""
+        started = time.perf_counter()
+        for chunk, offset in enumerate(range(0, len(mulaw), FRAME_BYTES)):
+            if paced:
+                await asyncio.sleep(max(0.0, started + chunk * 0.02 - time.perf_counter()))
+            await self.send({'event': 'media', 'streamSid': self.stream_sid, 'media': {
+                'track': 'inbound', 'chunk': str(chunk + 1), 'timestamp': str(chunk * 20),
+                'payload': base64.b64encode(mulaw[offset:offset + FRAME_BYTES]).decode('ascii')}})
+
+    async def stop(self):
+        await self.send({'event': 'stop', 'streamSid': self.stream_sid})
+        self.writer.close()
+
+
+async def http_get(port, path):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n".encode())
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b'\r\n\r\n')
+    return int(head.split(b' ')[1]), body
+
+
+def rss_kb(pid):
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+    return 0
+
+
+async def active_call(port, index, mulaw):
+    """Stream one utterance in real time; seconds from the caller falling silent to the reply audio"""
+    client = await StreamClient.connect(port, f'MZactive{index:04d}')
+    started = time.perf_counter()
+    sender = asyncio.create_task(client.stream_audio(mulaw))
+    reply_at, got_media = None, False
+    while True:
+        message = await asyncio.wait_for(client.receive(), 10)
+        if message and message.get('event') == 'media':
+            reply_at, got_media = time.perf_counter(), bool(message['media']['payload'])
+        if message and message.get('event') == 'mark':
+            break
+    await sender
+    await client.stop()
+    return (reply_at or time.perf_counter()) - started - SPEECH_ENDS, got_media
+
+
+async def run(port, pid, idle_calls, active_calls):
+    baseline = rss_kb(pid)
+    started = time.perf_counter()
+    idle = []
+    for batch in range(0, idle_calls, 100):
+        idle += await asyncio.gather(*(StreamClient.connect(port, f'MZidle{index:05d}')
+                                       for index in range(batch, min(idle_calls, batch + 100))))
+    print(f"   {len(idle)} idle calls connected in {time.perf_counter() - started:.1f}s")
+    await asyncio.sleep(0.5)
+    _, body = await http_get(port, '/api/call-server')
+    stats = json.loads(body)
+    held = rss_kb(pid)
+    print(f"   server holds {stats['websockets']} websockets, "
+          f"{stats['media_streams']['active_streams']} streams; RSS +{(held - baseline) / 1024:.1f} MB "
+          f"({(held - baseline) / max(1, idle_calls):.1f} KB per idle call)")
+
+    # Webhooks through the WSGI bridge while every idle call is held open
+    webhook = []
+    for index in range(100):
+        sent = time.perf_counter()
+        status, _ = await http_get(port, f'/voice?CallSid=CAhook{index:04d}')
+        webhook.append((time.perf_counter() - sent) * 1000)
+    webhook.sort()
+    print(f"   /voice webhook via WSGI pool: p50 {statistics.median(webhook):.1f} ms, "
+          f"p99 {webhook[int(0.99 * len(webhook))]:.1f} ms (status {status})")
+
+    # Active calls: speech in, engine turn in the pool, mu-law reply out
+    mulaw = encode_mulaw(synthesize_call(SCAMMER_LINE, random.Random(3)))
+    await active_call(port, 9999, mulaw)  # first turn builds the engine strategies and TTS cache
+    results = await asyncio.gather(*(active_call(port, index, mulaw) for index in range(active_calls)))
+    replies = sorted(elapsed for elapsed, _ in results)
+    with_audio = sum(1 for _, got_media in results if got_media)
+    print(f"   {active_calls} active calls: first audio {statistics.median(replies) * 1000:.0f} ms median, "
+          f"{replies[-1] * 1000:.0f} ms worst after the caller stopped (500 ms is endpointing); "
+          f"{with_audio} carried audio")
+
+    for client in idle:
+        await client.stop()
+    await asyncio.sleep(1.0)
+    _, body = await http_get(port, '/api/call-server')
+    after = json.loads(body)
+    print(f"   after hang-up: {after['websockets']} websockets, engine pool {after['engine_pool']}, "
+          f"shed turns {after['turns_shed']}")
+    return (stats['websockets'] >= idle_calls and status == 200 and len(results) == active_calls
+            and with_audio == active_calls and after['websockets'] == 0)
+
+
+def wait_for_port(port, timeout=30.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.5).close()
+            return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def main(idle_calls, active_calls):
+    print("⏱️  Asyncio Call Server Benchmark")
+    print("=" * 50)
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    needed = idle_calls + active_calls + 256
+    if soft < needed:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (min(needed, hard), hard))
+
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, CALL_SERVER_PORT=str(port), TTS_SYNTHESIZER='stub',
+                   AUDIO_CACHE_DIR=os.path.join(tmp, 'audio'), PYTHONWARNINGS='ignore')
+        server = subprocess.Popen([sys.executable, os.path.join(SRC, 'call_server.py')], cwd=tmp, env=env,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        try:
+            if not wait_for_port(port):
+                print(server.stderr.read().decode()[-2000:] if server.poll() is not None else "server did not start")
+                return False
+            return asyncio.run(run(port, server.pid, idle_calls, active_calls))
+        finally:
+            server.terminate()
+            server.wait(10)
+
+
+if __name__ == "__main__":
+    idle_calls = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    active_calls = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    passed = main(idle_calls, active_calls)
+    print("\n✅ Idle calls held, active calls answered, everything released" if passed
+          else "\n❌ Calls were refused, unanswered or leaked")
+    sys.exit(0 if passed else 1)
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Columnar conversation table benchmark
+Compares a list of row dicts (the original in-memory dataset) against ConversationTable,
+the parse buffer the dashboard folds into its aggregator: memory held per batch and
+the time to bucket it by (day, hour, technique)
+
+Usage: python tests/benchmark_columnar.py [rows ...]   (default: 1000000)
+"""
+
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from data import conversation_table
+from data.conversation_table import ConversationTable
+
+TECHNIQUES = ['tech_support', 'financial_fraud', 'authority_impersonation', 'unknown']
+
+
+def make_rows(rows):
+    """Synthetic CSV rows (all strings, as csv.DictReader returns them)"""
+    rng = random.Random(42)
+    now = datetime.now()
+    for i in range(rows):
+        turn = rng.randint(1, 20)
+        yield {
+            'timestamp': (now - timedelta(seconds=rng.randint(0, 60 * 86400))).isoformat(),
+            'conversation_id': f"conv_{i // 10}",
+            'duration_minutes': str(turn * 1.5),
+            'technique_type': rng.choice(TECHNIQUES),
+            'success_rating': str(min(10, turn)),
+            'conversation_turn': str(turn),
+            'scammer_frustration_level': str(rng.randint(0, 6)),
+            'response_time_seconds': str(round(rng.random() / 100, 6))
+        }
+
+
+def load_dicts(rows):
+    """The original dataset: one typed dict per conversation"""
+    conversations = []
+    for row in make_rows(rows):
+        row['duration_minutes'] = float(row.get('duration_minutes', 0))
+        row['success_rating'] = int(row.get('success_rating', 0))
+        row['conversation_turn'] = int(row.get('conversation_turn', 0))
+        conversations.append(row)
+    return conversations
+
+
+def load_table(rows):
+    table = ConversationTable()
+    table.extend(make_rows(rows))
+    return table
+
+
+def dict_stats(conversations):
+    """[count, minutes, successes] per (day, hour, technique) over row dicts"""
+    groups = {}
+    for conv in conversations:
+        parsed = datetime.fromisoformat(conv['timestamp'])
+        key = (parsed.date(), parsed.hour, conv.get('technique_type', 'unknown'))
+        group = groups.setdefault(key, [0, 0.0, 0])
+        group[0] += 1
+        group[1] += conv['duration_minutes']
+        group[2] += conv['success_rating'] > 7
+    return groups
+
+
+def table_stats(table):
+    return table.grouped()
+
+
+def measure(label, load, stats, rows):
+    tracemalloc.start()
+    started = time.perf_counter()
+    dataset = load(rows)
+    load_seconds = time.perf_counter() - started
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    stats(dataset)
+    stats_seconds = time.perf_counter() - started
+    print(f"   {label:<18} memory={memory / 1e6:8.1f} MB  load={load_seconds:6.2f}s  group={stats_seconds * 1000:8.1f} ms")
+    return memory, stats_seconds
+
+
+def run(rows):
+    print(f"\n📊 {rows:,} rows (numpy: {'yes' if conversation_table.numpy_module() is not None else 'no'})")
+    dict_memory, dict_seconds = measure("row dicts", load_dicts, dict_stats, rows)
+    table_memory, table_seconds = measure("columnar table", load_table, table_stats, rows)
+    print(f"   memory reduction:  {dict_memory / table_memory:6.1f}x")
+    print(f"   grouping speedup:  {dict_seconds / table_seconds:6.1f}x")
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000000]
+    print("⏱️  Columnar Table Benchmark")
+    print("=" * 50)
+    for size in sizes:
+        run(size)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Filler utterance benchmark
+Media-stream calls against the call server with fillers on and off, behind a slow TTS; reports time to first audio and filler coverage
+
+Usage: python tests/benchmark_filler.py [concurrent calls] [TTS ms]   (default: 10 300)
+"""
+
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+TESTS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TESTS, '..', 'src'))
+
+from benchmark_call_server import SRC, StreamClient, http_get, wait_for_port
+from benchmark_transcription import synthesize_call
+from utils.audio_utils import StubSynthesizer
+from utils.media_stream import encode_mulaw
+
+# Three utterances, each followed by a pause long enough for the reply
+TIMELINE = [(0.4, False), (1.6, True), (1.6, False), (1.6, True), (1.6, False), (1.6, True), (1.6, False)]
+ENDPOINT_SECONDS = 0.5
+
+
+class SlowSynthesizer(StubSynthesizer):
+    """Stub TTS with the latency of a network synthesizer (loaded by the server as benchmark_filler:SlowSynthesizer)"""
+
+    def __init__(self):
+        super().__init__(delay=float(os.environ.get('FILLER_BENCH_TTS_MS', 300)) / 1000)
+
+
+def speech_ends(timeline):
+    ends, position = [], 0.0
+    for seconds, speaking in timeline:
+        position += seconds
+        if speaking:
+            ends.append(position)
+    return ends
+
+
+async def caller(port, index, mulaw, ends):
+    """One real-time call; seconds from each utterance's end to the first audio of its turn"""
+    client = await StreamClient.connect(port, f'MZfill{index:04d}')
+    started = time.perf_counter()
+    sender = asyncio.create_task(client.stream_audio(mulaw))
+    first_audio, turn_media = [], []
+    while len(first_audio) < len(ends):
+        message = await asyncio.wait_for(client.receive(), 15)
+        if not message:
+            continue
+        if message.get('event') == 'media':
+            turn_media.append(time.perf_counter() - started)
+        elif message.get('event') == 'mark':
+            turn = len(first_audio)
+            first_audio.append((turn_media[0] if turn_media else float('inf')) - ends[turn])
+            turn_media = []
+    await sender
+    await client.stop()
+    return first_audio
+
+
+async def run(port, calls):
+    ends = speech_ends(TIMELINE)
+    mulaw = encode_mulaw(synthesize_call(TIMELINE, random.Random(11)))
+    results = await asyncio.gather(*(caller(port, index, mulaw, ends) for index in range(calls)))
+    await asyncio.sleep(0.5)
+    _, body = await http_get(port, '/api/call-server')
+    return sorted(value for result in results for value in result), json.loads(body)
+
+
+def measure(calls, tts_ms, fillers):
+    with tempfile.TemporaryDirectory() as tmp:
+        port = 20000 + os.getpid() % 10000 + (1 if fillers else 0)
+        env = dict(os.environ, CALL_SERVER_PORT=str(port), TTS_SYNTHESIZER='benchmark_filler:SlowSynthesizer',
+                   FILLER_BENCH_TTS_MS=str(tts_ms), VOICE_FILLERS='1' if fillers else '0',
+                   AUDIO_CACHE_DIR=os.path.join(tmp, 'audio'), PYTHONPATH=TESTS, PYTHONWARNINGS='ignore')
+        server = subprocess.Popen([sys.executable, os.path.join(SRC, 'call_server.py')], cwd=tmp, env=env,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        try:
+            if not wait_for_port(port, timeout=60):
+                print(server.stderr.read().decode()[-2000:] if server.poll() is not None else "server did not start")
+                return None, None
+            return asyncio.run(run(port, calls))
+        finally:
+            server.terminate()
+            server.wait(10)
+
+
+def report(label, first_audio):
+    p90 = first_audio[int(0.9 * len(first_audio))]
+    print(f"   {label}: first audio {statistics.median(first_audio) * 1000:4.0f} ms median, "
+          f"{p90 * 1000:4.0f} ms p90 after the caller stopped "
+          f"({(statistics.median(first_audio) - ENDPOINT_SECONDS) * 1000:.0f} ms beyond endpointing)")
+
+
+def main(calls, tts_ms):
+    print("⏱️  Filler Utterance Benchmark")
+    print("=" * 50)
+    print(f"   {calls} concurrent calls x {len(speech_ends(TIMELINE))} turns, TTS {tts_ms:.0f} ms per uncached line")
+
+    without, _ = measure(calls, tts_ms, fillers=False)
+    with_fillers, stats = measure(calls, tts_ms, fillers=True)
+    if without is None or with_fillers is None:
+        return False
+    report("without fillers", without)
+    report("with fillers   ", with_fillers)
+
+    filler = stats['filler']
+    print(f"\n   filler turns {filler['turns']}, fully covered {filler['covered']} "
+          f"({filler['coverage_ratio']:.0%}); mean gap {filler['mean_gap_ms']} ms, max gap {filler['max_gap_ms']} ms")
+    print(f"   {filler['by_transport']}")
+    saved = statistics.median(without) - statistics.median(with_fillers)
+    return filler['turns'] == len(with_fillers) and saved > 0
+
+
+if __name__ == "__main__":
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    tts_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 300
+    passed = main(calls, tts_ms)
+    print("\n✅ Fillers opened every turn and cut time to first audio" if passed
+          else "\n❌ Fillers missing or no faster to first audio")
+    sys.exit(0 if passed else 1)
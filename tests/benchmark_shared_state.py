@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Shared worker state contention benchmark
+Hammers the SQLite (WAL) counters and session store from several processes and checks no update is lost
+
+Usage: python tests/benchmark_shared_state.py [increments per process]   (default: 2000)
+"""
+
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from data.shared_state import SharedStateStore, SQLiteLimiterStorage
+
+PROCESS_COUNTS = [1, 2, 4, 8]
+
+
+def hammer_counters(path, worker, increments, hot, barrier):
+    """Increment one key shared by every process (hot) or a key of our own"""
+    storage = SQLiteLimiterStorage(f"sqlite:///{path}")
+    key = 'LIMITER/shared' if hot else f"LIMITER/worker-{worker}"
+    barrier.wait()
+    for _ in range(increments):
+        storage.incr(key, 3600)
+
+
+def hammer_sessions(path, worker, turns, barrier):
+    """Save and reload a conversation snapshot, as SessionManager does per turn"""
+    store = SharedStateStore(path)
+    conversation_id = f"conv-{worker}"
+    state = {'turn_count': 0, 'scammer_profile': {'frustration_level': 0}, 'conversation_history': []}
+    version = 0
+    barrier.wait()
+    for turn in range(turns):
+        store.load_session(conversation_id, version)
+        state['turn_count'] = turn + 1
+        state['conversation_history'] = state['conversation_history'][-49:] + [{'bot_response': 'x' * 120}]
+        version = store.save_session(conversation_id, state, version)
+
+
+def run(target, args_for, processes):
+    barrier = multiprocessing.Barrier(processes + 1)
+    workers = [multiprocessing.Process(target=target, args=args_for(worker) + (barrier,)) for worker in range(processes)]
+    for worker in workers:
+        worker.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    return time.perf_counter() - started
+
+
+def main(increments):
+    print("⏱️  Shared State Contention Benchmark")
+    print("=" * 50)
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        for processes in PROCESS_COUNTS:
+            path = os.path.join(tmp, f"shared_{processes}.db")
+            store = SharedStateStore(path)
+
+            hot_seconds = run(hammer_counters, lambda w: (path, w, increments, True), processes)
+            cold_seconds = run(hammer_counters, lambda w: (path, w, increments, False), processes)
+            session_seconds = run(hammer_sessions, lambda w: (path, w, increments // 4), processes)
+
+            expected = processes * increments
+            lost = expected - store.get('LIMITER/shared')
+            lost += sum(increments - store.get(f"LIMITER/worker-{w}") for w in range(processes))
+            ok = ok and lost == 0
+            print(f"\n   {processes} process(es)")
+            print(f"     one shared key     {expected / hot_seconds:9.0f} incr/s")
+            print(f"     key per process    {expected / cold_seconds:9.0f} incr/s")
+            print(f"     session save+load  {processes * (increments // 4) / session_seconds:9.0f} turns/s")
+            print(f"     lost increments    {lost}")
+    return ok
+
+
+if __name__ == "__main__":
+    passed = main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
+    print("\n✅ Every increment accounted for" if passed else "\n❌ Increments were lost")
+    sys.exit(0 if passed else 1)
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Worker cold-start benchmark
+Times a fresh interpreter from `import app` to the first served requests, using -X importtime
+
+Usage: python tests/benchmark_startup.py [runs]   (default: 5)
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+APP_PACKAGES = ('app', 'ai', 'data', 'utils', 'static_routes', 'twilio_handler')
+TARGET_MS = 150.0
+
+WORKER = """
+import json, time, warnings
+warnings.simplefilter('ignore')
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+client = app.app.test_client()
+client.get('/api/health').close()
+first_request = time.perf_counter()
+client.post('/api/chat', json={'message': 'Your computer has a virus', 'conversation_id': 'startup'}).close()
+first_chat = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'first_request_ms': (first_request - imported) * 1000,
+    'first_chat_ms': (first_chat - first_request) * 1000,
+}))
+"""
+
+
+def parse_importtime(stderr):
+    """(self ms of app modules, cumulative ms of libraries they import, slowest app modules)"""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line.split(':', 1)[1].split('|', 2)
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((depth, name.strip(), int(self_us) / 1000, int(cumulative_us) / 1000))
+
+    # importtime prints children before their parent, so walk backwards to find parents
+    own, libraries, slowest, stack = 0.0, 0.0, [], []
+    for depth, module, self_ms, cumulative_ms in reversed(entries):
+        while stack and stack[-1][0] >= depth:
+            stack.pop()
+        parent = stack[-1][1] if stack else None
+        stack.append((depth, module))
+
+        if module.split('.')[0] in APP_PACKAGES:
+            own += self_ms
+            slowest.append((self_ms, module))
+        elif parent is not None and parent.split('.')[0] in APP_PACKAGES:
+            libraries += cumulative_ms
+    return own, libraries, sorted(slowest, reverse=True)[:5]
+
+
+def run_once(workdir):
+    env = dict(os.environ, PYTHONPATH=SRC_DIR, PYTHONDONTWRITEBYTECODE='')
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', WORKER], cwd=workdir, env=env,
+                            capture_output=True, text=True, check=True)
+    wall_ms = (time.perf_counter() - started) * 1000
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    own_ms, libraries_ms, slowest = parse_importtime(result.stderr)
+    timings.update(wall_ms=wall_ms, own_import_ms=own_ms, library_import_ms=libraries_ms, slowest=slowest)
+    return timings
+
+
+def main(runs):
+    print("⏱️  Worker Startup Benchmark")
+    print("=" * 50)
+    with tempfile.TemporaryDirectory() as workdir:
+        run_once(workdir)  # warm the bytecode and OS file caches
+        samples = [run_once(workdir) for _ in range(runs)]
+
+    def median(key):
+        return statistics.median(sample[key] for sample in samples)
+
+    # -X importtime inflates absolute numbers a little; the split is what matters
+    libraries_ms = median('library_import_ms')
+    own_to_first_ms = median('import_ms') - libraries_ms + median('first_request_ms')
+    print(f"   process wall time (spawn to exit)   {median('wall_ms'):8.1f} ms")
+    print(f"   import app                          {median('import_ms'):8.1f} ms")
+    print(f"     of which library imports          {libraries_ms:8.1f} ms  (flask, flask_limiter, stdlib)")
+    print(f"     of which app modules + init       {median('import_ms') - libraries_ms:8.1f} ms")
+    print(f"   first request (/api/health)         {median('first_request_ms'):8.1f} ms")
+    print(f"   first chat turn (lazy init)         {median('first_chat_ms'):8.1f} ms")
+    print("\n   slowest app modules (self time):")
+    for self_ms, module in samples[-1]['slowest']:
+        print(f"     {module:<34} {self_ms:8.2f} ms")
+
+    total_ms = median('import_ms') + median('first_request_ms')
+    print(f"\n   import to first request: {total_ms:.1f} ms total, {own_to_first_ms:.1f} ms app-owned "
+          f"(target {TARGET_MS:.0f} ms)")
+    return own_to_first_ms <= TARGET_MS
+
+
+if __name__ == "__main__":
+    passed = main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
+    print("✅ Within startup target" if passed else "❌ Startup target missed")
+    sys.exit(0 if passed else 1)
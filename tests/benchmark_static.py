@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Static asset serving benchmark
+Compares per-request send_from_directory (the original routes) against the StaticAssetIndex
+
+Usage: python tests/benchmark_static.py [requests]   (default: 500)
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from flask import Flask, send_from_directory
+
+from static_routes import StaticAssetIndex, serve_static
+
+STATIC_DIR = os.path.join(os.path.dirname(__file__), '..', 'data', 'static')
+BROWSER_HEADERS = {'Accept-Encoding': 'gzip, deflate, br'}
+
+
+def build_app():
+    app = Flask(__name__)
+    app.extensions['static_assets'] = StaticAssetIndex(STATIC_DIR)
+
+    @app.route('/disk/<path:filename>')
+    def disk(filename):
+        return send_from_directory(os.path.abspath(STATIC_DIR), filename)
+
+    @app.route('/indexed/<path:filename>')
+    def indexed(filename):
+        return serve_static(filename)
+
+    return app
+
+
+def measure(client, url, requests, headers):
+    sent = 0
+    started = time.perf_counter()
+    for _ in range(requests):
+        response = client.get(url, headers=headers)
+        sent += len(response.get_data())
+        response.close()
+    return (time.perf_counter() - started) / requests * 1e6, sent / requests
+
+
+def main(requests):
+    print("⏱️  Static Asset Benchmark")
+    print("=" * 50)
+    app = build_app()
+    client = app.test_client()
+    bundles = sorted(f"assets/{name}" for name in os.listdir(os.path.join(STATIC_DIR, 'assets')))
+
+    for relpath in ['index.html'] + bundles:
+        disk_us, disk_bytes = measure(client, f"/disk/{relpath}", requests, BROWSER_HEADERS)
+        client.get(f"/indexed/{relpath}", headers=BROWSER_HEADERS).close()  # compress once
+        indexed_us, indexed_bytes = measure(client, f"/indexed/{relpath}", requests, BROWSER_HEADERS)
+        response = client.get(f"/indexed/{relpath}", headers=BROWSER_HEADERS)
+        etag = response.headers['ETag']
+        response.close()
+        revalidate_us, _ = measure(client, f"/indexed/{relpath}", requests, dict(BROWSER_HEADERS, **{'If-None-Match': etag}))
+        print(f"\n   {relpath}")
+        print(f"     send_from_directory  {disk_us:8.1f} us/req  {disk_bytes / 1024:8.1f} KB/req")
+        print(f"     indexed              {indexed_us:8.1f} us/req  {indexed_bytes / 1024:8.1f} KB/req")
+        print(f"     indexed, 304         {revalidate_us:8.1f} us/req")
+
+    print(f"\n   {app.extensions['static_assets'].get_stats()}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
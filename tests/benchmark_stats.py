@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Stats pipeline benchmark for the analytics dashboard
+Compares the original multi-scan implementation against the single-pass aggregator
+
+Usage: python tests/benchmark_stats.py [rows ...]   (default: 100000 1000000)
+"""
+
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from data.analytics_dashboard import AnalyticsDashboard
+
+FIELDS = [
+    'timestamp', 'conversation_id', 'duration_minutes', 'technique_type', 'success_rating',
+    'conversation_turn', 'scammer_frustration_level', 'response_time_seconds'
+]
+TECHNIQUES = ['tech_support', 'financial_fraud', 'authority_impersonation', 'unknown']
+
+
+def write_history(csv_file, rows):
+    """Write ``rows`` synthetic log_conversation rows spread over 60 days"""
+    rng = random.Random(42)
+    now = datetime.now()
+    with open(csv_file, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(FIELDS)
+        for i in range(rows):
+            timestamp = now - timedelta(seconds=rng.randint(0, 60 * 86400))
+            turn = rng.randint(1, 20)
+            writer.writerow([
+                timestamp.isoformat(), f"conv_{i // 10}", turn * 1.5, rng.choice(TECHNIQUES),
+                min(10, turn), turn, rng.randint(0, 6), round(rng.random() / 100, 6)
+            ])
+
+
+def legacy_real_time_stats(csv_file):
+    """The pre-aggregator pipeline: load everything, then ~33 timestamp-parsing scans"""
+    conversations = []
+    with open(csv_file, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            row['duration_minutes'] = float(row.get('duration_minutes', 0))
+            row['success_rating'] = int(row.get('success_rating', 0))
+            row['conversation_turn'] = int(row.get('conversation_turn', 0))
+            conversations.append(row)
+
+    def by_date(target_date):
+        filtered = []
+        for conv in conversations:
+            try:
+                if datetime.fromisoformat(conv.get('timestamp', '')).date() == target_date:
+                    filtered.append(conv)
+            except (ValueError, TypeError):
+                continue
+        return filtered
+
+    techniques = [conv.get('technique_type', 'unknown') for conv in conversations]
+    technique_counts = {t: techniques.count(t) for t in set(techniques)}
+    successful = len([conv for conv in conversations if conv.get('success_rating', 0) > 7])
+    today = by_date(datetime.now().date())
+
+    week_ago = datetime.now() - timedelta(days=7)
+    this_week = [conv for conv in conversations
+                 if datetime.fromisoformat(conv['timestamp']) >= week_ago]
+
+    trends = []
+    for i in range(30):
+        day = by_date(datetime.now().date() - timedelta(days=i))
+        trends.append((len(day), sum(conv['duration_minutes'] for conv in day)))
+
+    hours = [0] * 24
+    for conv in conversations:
+        hours[datetime.fromisoformat(conv['timestamp']).hour] += conv['duration_minutes']
+
+    return technique_counts, successful, len(today), len(this_week), trends, hours
+
+
+def timed(label, func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - started
+    print(f"   {label:<34} {elapsed * 1000:>10.1f} ms")
+    return elapsed, result
+
+
+def run(rows):
+    print(f"\n📊 {rows:,} rows")
+    with tempfile.TemporaryDirectory() as workdir:
+        previous = os.getcwd()
+        os.chdir(workdir)
+        try:
+            dashboard_dir = os.path.join('data', 'analytics')
+            os.makedirs(dashboard_dir)
+            csv_file = os.path.join(dashboard_dir, 'conversations.csv')
+            write_history(csv_file, rows)
+
+            legacy, _ = timed("legacy load + stats", legacy_real_time_stats, csv_file)
+            rebuild, dashboard = timed("single-pass rebuild", AnalyticsDashboard)
+            first, _ = timed("stats after rebuild", dashboard.get_real_time_stats)
+            steady = min(timed("stats (steady state)", dashboard.get_real_time_stats)[0] for _ in range(3))
+
+            with open(csv_file, 'a', newline='', encoding='utf-8') as f:
+                csv.writer(f).writerow([datetime.now().isoformat(), 'conv_new', 3.0, 'unknown', 5, 2, 1, 0.001])
+            timed("stats after one appended row", dashboard.get_real_time_stats)
+            dashboard.save_checkpoint()
+            timed("restart from checkpoint", AnalyticsDashboard)
+        finally:
+            os.chdir(previous)
+
+    print(f"   speedup, cold (load + stats):      {legacy / (rebuild + first):>8.1f}x")
+    print(f"   speedup, per stats request:        {legacy / steady:>8.0f}x")
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100000, 1000000]
+    print("⏱️  Stats Pipeline Benchmark")
+    print("=" * 50)
+    for size in sizes:
+        run(size)
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Streaming transcription benchmark
+Streams a synthetic call (speech bursts over line noise) in 20 ms frames and reports hypothesis timing and CPU cost
+
+Usage: python tests/benchmark_transcription.py [seconds of audio for the CPU test]   (default: 600)
+"""
+
+import array
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from ai.sophisticated_engine import ENGINE_KEYWORDS
+from utils.whisper_api import DEFAULT_SAMPLE_RATE, ScriptedBackend, StreamingTranscriber
+
+SCRIPT = [
+    "This is Microsoft support calling about a virus on your computer",
+    "You need to pay the fee with gift cards right now",
+    "Go to the store immediately and buy the cards",
+]
+# (seconds, speaking?) segments of the synthetic call
+TIMELINE = [(0.6, False), (2.4, True), (1.0, False), (2.0, True), (0.8, False), (1.8, True), (1.2, False)]
+FRAME_BYTES = DEFAULT_SAMPLE_RATE * 20 // 1000 * 2
+
+
+def synthesize_call(timeline, rng):
+    """16-bit PCM: low noise for silence, a wobbling tone for speech"""
+    pcm = array.array('h')
+    for seconds, speaking in timeline:
+        for i in range(int(seconds * DEFAULT_SAMPLE_RATE)):
+            noise = rng.randint(-60, 60)
+            if speaking:
+                envelope = 0.6 + 0.4 * math.sin(2 * math.pi * 3 * i / DEFAULT_SAMPLE_RATE)
+                noise += int(4000 * envelope * math.sin(2 * math.pi * 220 * i / DEFAULT_SAMPLE_RATE))
+            pcm.append(noise)
+    return pcm.tobytes()
+
+
+def speech_ends(timeline):
+    ends, position = [], 0.0
+    for seconds, speaking in timeline:
+        position += seconds
+        if speaking:
+            ends.append(position)
+    return ends
+
+
+def main(cpu_seconds):
+    print("⏱️  Streaming Transcription Benchmark")
+    print("=" * 50)
+    audio = synthesize_call(TIMELINE, random.Random(5))
+    transcriber = StreamingTranscriber(ScriptedBackend(SCRIPT))
+
+    finals, first_partial = [], {}
+    for offset in range(0, len(audio), FRAME_BYTES):
+        for event in transcriber.feed(audio[offset:offset + FRAME_BYTES]):
+            if event.is_final:
+                finals.append(event)
+            else:
+                first_partial.setdefault(event.utterance, event)
+                # What the engine can already do mid-sentence
+                ENGINE_KEYWORDS.score(event.text)
+            print(f"   {event}")
+    finals.extend(transcriber.flush())
+
+    ends = speech_ends(TIMELINE)
+    print()
+    for event, spoken_end in zip(finals, ends):
+        partial = first_partial.get(event.utterance)
+        print(f"   utterance {event.utterance}: first partial {partial.end - event.start if partial else float('nan'):.2f}s "
+              f"after onset; final {event.end - spoken_end:.2f}s after the caller stopped")
+    ok = len(finals) == len(ends) and [event.text for event in finals] == SCRIPT[:len(ends)]
+
+    audio = synthesize_call([(cpu_seconds / 2, True), (cpu_seconds / 2, False)], random.Random(6))
+    transcriber = StreamingTranscriber(ScriptedBackend(SCRIPT))
+    started = time.process_time()
+    for offset in range(0, len(audio), FRAME_BYTES):
+        transcriber.feed(audio[offset:offset + FRAME_BYTES])
+    cpu = time.process_time() - started
+    print(f"\n   endpointing + framing: {cpu / cpu_seconds * 1000:.2f} ms CPU per second of audio "
+          f"(~{cpu_seconds / cpu:.0f} concurrent callers per core, backend excluded)")
+    return ok
+
+
+if __name__ == "__main__":
+    passed = main(float(sys.argv[1]) if len(sys.argv) > 1 else 600)
+    print("\n✅ Every utterance finalized" if passed else "\n❌ Utterances were missed or merged")
+    sys.exit(0 if passed else 1)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Twilio voice webhook simulator and benchmark
+Drives /voice and /voice/gather the way Twilio does and checks webhook turnaround stays under 10 ms p99
+
+Usage: python tests/benchmark_twilio.py [calls] [turns per call]   (default: 200 10)
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+import warnings
+import xml.etree.ElementTree as ElementTree
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+P99_BUDGET_MS = 10.0
+SCAMMER_LINES = [
+    "This is Microsoft support, your computer has a virus",
+    "You need to buy gift cards right now to pay the fee",
+    "This is the IRS, there is a warrant for your arrest",
+    "Please give me your bank account number immediately",
+    "Go to your computer and open the browser",
+    "",  # silence: Gather times out and Twilio follows the redirect
+]
+
+
+class TwilioCallSimulator:
+    """Posts form-encoded webhooks shaped like Twilio's to a Flask test client"""
+
+    def __init__(self, client, account_sid='AC' + '0' * 32, to='+15005550006'):
+        self.client = client
+        self.account_sid = account_sid
+        self.to = to
+        self.timings_ms = []
+
+    def _post(self, path, **params):
+        started = time.perf_counter()
+        response = self.client.post(path, data=params)
+        body = response.get_data(as_text=True)
+        response.close()
+        self.timings_ms.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, (path, response.status_code, body)
+        assert response.mimetype == 'text/xml', response.mimetype
+        return ElementTree.fromstring(body)
+
+    def call(self, turns, rng):
+        """One call: ring, a number of speech turns, hang up; returns the TwiML verbs heard"""
+        call_sid = 'CA' + uuid.uuid4().hex
+        base = {'CallSid': call_sid, 'AccountSid': self.account_sid, 'From': f"+1555{rng.randint(1000000, 9999999)}",
+                'To': self.to, 'Direction': 'inbound', 'ApiVersion': '2010-04-01'}
+
+        twiml = self._post('/voice', CallStatus='ringing', **base)
+        verbs = [child.tag for child in twiml]
+        assert twiml.find('Gather') is not None, ElementTree.tostring(twiml)
+
+        for _ in range(turns):
+            speech = rng.choice(SCAMMER_LINES)
+            params = dict(base, CallStatus='in-progress')
+            if speech:
+                params.update(SpeechResult=speech, Confidence='0.92')
+            twiml = self._post('/voice/gather', **params)
+            verbs.extend(child.tag for child in twiml)
+            redirect = twiml.find('Redirect')
+            if twiml.find('Gather') is None and redirect is not None:
+                # Filler turn: Twilio plays the filler, then follows the redirect for the reply
+                # (played instantly here, so the filler coverage this reports is a lower bound)
+                twiml = self._post(redirect.text, **params)
+                verbs.extend(child.tag for child in twiml)
+            if twiml.find('Hangup') is not None:
+                return verbs
+
+        self._post('/voice/gather', CallStatus='completed', **base)
+        return verbs
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def main(calls, turns):
+    print("⏱️  Twilio Webhook Benchmark")
+    print("=" * 50)
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)  # turn logs go to ./data/analytics
+        warnings.simplefilter('ignore')
+        import app as application
+        application.limiter.enabled = False
+
+        simulator = TwilioCallSimulator(application.app.test_client())
+        rng = random.Random(3)
+        simulator.call(2, rng)  # build the handler and warm the fragment cache
+        simulator.timings_ms.clear()
+
+        started = time.perf_counter()
+        for _ in range(calls):
+            simulator.call(turns, rng)
+        elapsed = time.perf_counter() - started
+        application.get_log_writer().flush()
+
+        timings = simulator.timings_ms
+        p99 = percentile(timings, 0.99)
+        print(f"   {calls} calls, {len(timings)} webhooks in {elapsed:.2f}s")
+        print(f"   p50 {percentile(timings, 0.5):6.2f} ms  p90 {percentile(timings, 0.9):6.2f} ms  "
+              f"p99 {p99:6.2f} ms  max {max(timings):6.2f} ms  (budget {P99_BUDGET_MS:.0f} ms p99)")
+        print(f"   {application.voice_calls.get_stats()}")
+    return p99 <= P99_BUDGET_MS
+
+
+if __name__ == "__main__":
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    turns = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    passed = main(calls, turns)
+    print("✅ Webhook turnaround within budget" if passed else "❌ Webhook turnaround over budget")
+    sys.exit(0 if passed else 1)
@@ -0,0 +1,7 @@
+"""
+Pytest configuration: make the application modules under src/ importable
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
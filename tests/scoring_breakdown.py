@@ -5,7 +5,12 @@ Detailed breakdown of what factors contribute to each threshold score
 Shows the supporting elements that indirectly build up scores
 """
 
-from sophisticated_engine import ScammerAnalyzer
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from ai.sophisticated_engine import ScammerAnalyzer
 
 def show_scoring_breakdown():
     """Show what keywords and patterns contribute to each score"""
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Memory soak test for the conversation hot path
+Drives many turns through sessions, the engine and analytics and checks that
+traced memory stops growing once the bounded buffers are full
+
+Usage: python tests/soak_memory.py [turns] [conversations]   (default: 1000000 5000)
+"""
+
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from ai.session_manager import SessionManager
+from data.analytics_dashboard import AnalyticsDashboard
+from utils.log_writer import get_log_writer
+
+MESSAGES = [
+    "Hello, this is Microsoft. Your computer has a virus.",
+    "You owe the IRS $5000. Pay immediately or you'll be arrested.",
+    "Go to Target and buy gift cards right now!",
+    "Why are you not listening? This is urgent!",
+    "I need your bank account number to process the refund.",
+]
+
+ALLOWED_GROWTH_MB = 5.0
+
+
+def run_soak(turns, conversations):
+    rng = random.Random(7)
+    sessions = SessionManager(max_sessions=1000, idle_ttl_seconds=60)
+    analytics = AnalyticsDashboard()
+    writer = get_log_writer()
+
+    tracemalloc.start()
+    warmup = max(1, turns // 10)
+    baseline = None
+    started = time.time()
+
+    print(f"🔁 {turns:,} turns over {conversations:,} conversations")
+    for turn_number in range(1, turns + 1):
+        conversation_id = f"soak_{rng.randrange(conversations)}"
+        with sessions.session(conversation_id) as engine:
+            turn = engine.take_turn(rng.choice(MESSAGES))
+        analytics.log_conversation({
+            'timestamp': turn['analysis']['timestamp'],
+            'conversation_id': conversation_id,
+            'duration_minutes': turn['summary'].get('time_wasted_minutes', 0),
+            'technique_type': turn['scammer_profile'].get('technique_type', 'unknown'),
+            'success_rating': min(10, max(1, turn['total_turns'])),
+            'conversation_turn': turn['total_turns'],
+            'scammer_frustration_level': turn['scammer_profile'].get('frustration_level', 0),
+            'response_time_seconds': turn['response_time']
+        })
+
+        if turn_number % warmup == 0:
+            writer.flush()
+            current, peak = tracemalloc.get_traced_memory()
+            if baseline is None:
+                baseline = current
+            rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+            print(f"   {turn_number:>10,} turns  traced={current / 1e6:7.2f} MB  "
+                  f"peak={peak / 1e6:7.2f} MB  max_rss={rss_mb:7.1f} MB  "
+                  f"sessions={len(sessions):,}  {time.time() - started:6.1f}s")
+
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    growth_mb = (current - baseline) / 1e6
+    print(f"\n📈 Growth after warm-up: {growth_mb:+.2f} MB (allowed {ALLOWED_GROWTH_MB} MB)")
+    print(f"📝 Log writer: {writer.get_stats()}")
+    return growth_mb <= ALLOWED_GROWTH_MB
+
+
+if __name__ == "__main__":
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    conversations = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        passed = run_soak(turns, conversations)
+        get_log_writer().close()
+
+    print("✅ Memory stayed flat" if passed else "❌ Memory kept growing")
+    sys.exit(0 if passed else 1)
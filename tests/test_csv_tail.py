@@ -0,0 +1,96 @@
+"""
+Tests for the tail-following CSV reader
+"""
+import os
+
+from data.csv_tail import CSVTailReader, load_checkpoint, save_checkpoint
+
+HEADER = 'timestamp,duration_minutes\n'
+
+
+def append(path, text):
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(text)
+
+
+def test_reads_only_new_rows(tmp_path):
+    path = str(tmp_path / 'log.csv')
+    append(path, HEADER + '2024-01-01T10:00:00,1.5\n')
+    reader = CSVTailReader(path)
+
+    assert reader.read_rows() == (['timestamp', 'duration_minutes'], [['2024-01-01T10:00:00', '1.5']])
+    assert reader.read_rows() == (['timestamp', 'duration_minutes'], [])
+
+    append(path, '2024-01-01T11:00:00,2\n')
+    assert reader.read_rows()[1] == [['2024-01-01T11:00:00', '2']]
+
+
+def test_partial_line_is_left_for_next_read(tmp_path):
+    path = str(tmp_path / 'log.csv')
+    append(path, HEADER + '2024-01-01T10:00:00,1.5\n2024-01-01T11:')
+    reader = CSVTailReader(path)
+
+    assert reader.read_rows()[1] == [['2024-01-01T10:00:00', '1.5']]
+
+    append(path, '00:00,2\n')
+    assert reader.read_rows()[1] == [['2024-01-01T11:00:00', '2']]
+
+
+def test_truncation_starts_over_and_keeps_header(tmp_path):
+    path = str(tmp_path / 'log.csv')
+    append(path, HEADER + '2024-01-01T10:00:00,1.5\n2024-01-01T11:00:00,2\n')
+    reader = CSVTailReader(path)
+    reader.read_rows()
+
+    # copytruncate: same inode, emptied, and the appender does not repeat the header
+    with open(path, 'w', encoding='utf-8'):
+        pass
+    append(path, '2024-01-02T09:00:00,3\n')
+
+    header, rows = reader.read_rows()
+    assert header == ['timestamp', 'duration_minutes']
+    assert rows == [['2024-01-02T09:00:00', '3']]
+    assert reader.stats['resets'] == 1
+
+
+def test_rotation_reads_new_file_from_start(tmp_path):
+    path = str(tmp_path / 'log.csv')
+    append(path, HEADER + '2024-01-01T10:00:00,1.5\n')
+    reader = CSVTailReader(path)
+    reader.read_rows()
+
+    rotated = str(tmp_path / 'log.csv.new')
+    append(rotated, HEADER + '2024-01-02T09:00:00,3\n')
+    os.replace(rotated, path)
+
+    assert reader.read_rows()[1] == [['2024-01-02T09:00:00', '3']]
+    assert reader.stats['resets'] == 1
+
+
+def test_checkpoint_resumes_from_offset(tmp_path):
+    path = str(tmp_path / 'log.csv')
+    checkpoint_file = str(tmp_path / 'log.checkpoint.json')
+    append(path, HEADER + '2024-01-01T10:00:00,1.5\n')
+    reader = CSVTailReader(path)
+    reader.read_rows()
+    save_checkpoint(checkpoint_file, reader.checkpoint())
+
+    append(path, '2024-01-01T11:00:00,2\n')
+    resumed = CSVTailReader(path)
+    assert resumed.restore(load_checkpoint(checkpoint_file))
+    assert resumed.read_rows() == (['timestamp', 'duration_minutes'], [['2024-01-01T11:00:00', '2']])
+
+
+def test_checkpoint_rejected_when_file_was_rewritten(tmp_path):
+    path = str(tmp_path / 'log.csv')
+    append(path, HEADER + '2024-01-01T10:00:00,1.5\n')
+    reader = CSVTailReader(path)
+    reader.read_rows()
+    checkpoint = reader.checkpoint()
+
+    # Rewritten in place with a different layout: same inode, new header
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('timestamp,technique_type,duration_minutes\n2024-01-02T09:00:00,tech_support,3\n')
+
+    assert not CSVTailReader(path).restore(checkpoint)
+    assert load_checkpoint(str(tmp_path / 'missing.json')) is None
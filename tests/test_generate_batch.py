@@ -0,0 +1,39 @@
+"""
+Tests for batched turns behind admission control
+"""
+import pytest
+
+from ai.session_manager import SessionManager
+from ai.sophisticated_engine import SophisticatedEngine
+from utils.admission import ADMITTED, SHED_QUEUE_FULL, AdmissionController
+
+
+@pytest.fixture(autouse=True)
+def run_in_tmp(tmp_path, monkeypatch):
+    # The engine writes its analytics log under the working directory
+    monkeypatch.chdir(tmp_path)
+
+
+ITEMS = [('conv-a', 'Your computer has a virus'), ('conv-b', 'Pay the fee now'), ('conv-a', 'Hello?')]
+
+
+def test_batch_turns_hold_a_slot_each():
+    admission = AdmissionController(max_concurrent=1, max_queue=0)
+    turns = SophisticatedEngine.generate_batch(ITEMS, SessionManager(), admission=admission)
+
+    assert [turn['conversation_id'] for turn in turns] == ['conv-a', 'conv-b', 'conv-a']
+    assert [turn['total_turns'] for turn in turns] == [1, 1, 2]
+    assert admission.stats[ADMITTED] == 3
+    assert admission.in_flight == 0
+
+
+def test_batch_turns_are_shed_when_saturated():
+    admission = AdmissionController(max_concurrent=1, max_queue=0)
+    sessions = SessionManager()
+    assert admission.acquire() == ADMITTED  # another request holds the only slot
+
+    turns = SophisticatedEngine.generate_batch(ITEMS, sessions, admission=admission)
+
+    assert turns == [{'shed': SHED_QUEUE_FULL, 'conversation_id': cid} for cid, _ in ITEMS]
+    assert admission.stats[SHED_QUEUE_FULL] == 3
+    assert len(sessions) == 0  # shed items never touch a conversation
@@ -0,0 +1,42 @@
+"""
+Tests for the compiled keyword index
+"""
+from ai.keyword_index import KeywordIndex
+
+CATEGORIES = {
+    'urgency': {'now': 1.0, 'immediately': 2.0},
+    'financial': {'card': 1.0, 'credit card': 3.0, 'fee': 1.5},
+}
+
+
+def test_matches_whole_words_only():
+    index = KeywordIndex(CATEGORIES)
+
+    assert index.matches('Pay now')['urgency'] == ['now']
+    assert index.matches('I know you are there')['urgency'] == []
+    assert index.matches('NOW!')['urgency'] == ['now']
+
+
+def test_longest_keyword_wins():
+    index = KeywordIndex(CATEGORIES)
+
+    assert index.matches('read me your credit card number')['financial'] == ['credit card']
+    assert index.score('read me your credit card number')['financial'] == 3.0
+    assert index.score('read me your card number')['financial'] == 1.0
+
+
+def test_plurals_and_spacing():
+    index = KeywordIndex(CATEGORIES)
+
+    assert index.matches('two credit  cards and the fees')['financial'] == ['credit card', 'fee']
+
+
+def test_each_keyword_counts_once():
+    index = KeywordIndex(CATEGORIES)
+
+    assert index.score('now, now, right now')['urgency'] == 1.0
+    assert index.score_many(['now', 'nothing', 'now']) == [
+        {'urgency': 1.0, 'financial': 0},
+        {'urgency': 0, 'financial': 0},
+        {'urgency': 1.0, 'financial': 0},
+    ]
@@ -0,0 +1,69 @@
+"""
+Tests for conversation sessions shared between workers
+"""
+import threading
+
+import pytest
+
+from ai.session_manager import SessionConflictError, SessionManager
+from data.shared_state import SharedStateStore
+
+
+@pytest.fixture(autouse=True)
+def run_in_tmp(tmp_path, monkeypatch):
+    # The engine writes its analytics log under the working directory
+    monkeypatch.chdir(tmp_path)
+
+
+def test_save_session_is_compare_and_set(tmp_path):
+    store = SharedStateStore(str(tmp_path / 'shared.db'))
+
+    assert store.save_session('conv', {'turn_count': 1}) == 1
+    assert store.save_session('conv', {'turn_count': 1}) is None
+    assert store.save_session('conv', {'turn_count': 2}, expected_version=1) == 2
+    assert store.save_session('conv', {'turn_count': 2}, expected_version=1) is None
+    assert store.load_session('conv') == (2, {'turn_count': 2})
+
+
+def test_concurrent_workers_keep_every_turn(tmp_path):
+    path = str(tmp_path / 'shared.db')
+    # Two managers on one store stand in for two gunicorn workers
+    workers = [SessionManager(shared_store=SharedStateStore(path)) for _ in range(2)]
+    turns_each = 10
+    barrier = threading.Barrier(len(workers))
+
+    def run(manager):
+        barrier.wait()
+        for turn in range(turns_each):
+            with manager.session('conv') as engine:
+                engine.take_turn(f"Sir, your computer has a virus, turn {turn}")
+
+    threads = [threading.Thread(target=run, args=(manager,)) for manager in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    version, state = SharedStateStore(path).load_session('conv')
+    assert version == len(workers) * turns_each
+    assert state['turn_count'] == len(workers) * turns_each
+    assert sum(manager.conflicts for manager in workers) == 0
+
+
+def test_stale_save_raises(tmp_path):
+    path = str(tmp_path / 'shared.db')
+    manager = SessionManager(shared_store=SharedStateStore(path))
+    other = SharedStateStore(path)
+
+    with pytest.raises(SessionConflictError):
+        with manager.session('conv') as engine:
+            engine.take_turn("This is the IRS calling")
+            other.save_session('conv', {'turn_count': 5})
+    assert other.load_session('conv') == (1, {'turn_count': 5})
+    assert manager.conflicts == 1
+
+    # The next turn starts from the stored state instead of the forked one
+    with manager.session('conv') as engine:
+        assert engine.turn_count == 5
+        engine.take_turn("Pay the fine now")
+    assert other.load_session('conv')[1]['turn_count'] == 6
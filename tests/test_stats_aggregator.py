@@ -0,0 +1,230 @@
+"""
+Tests that the incremental stats match a full scan of the conversation log
+"""
+import atexit
+import csv
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from data.analytics_dashboard import AnalyticsDashboard
+from data.stats_aggregator import StatsAggregator
+from utils.latency_sketch import get_latency_recorder
+
+FIELDS = [
+    'timestamp', 'conversation_id', 'duration_minutes', 'technique_type', 'success_rating',
+    'conversation_turn', 'scammer_frustration_level'
+]
+TECHNIQUES = ['tech_support', 'financial_fraud', 'authority_impersonation']
+DURATIONS = [0.5, 1.25, 2.0, 3.75, 5.5]  # exact in binary, so sums do not depend on order
+
+
+def make_rows(count, today, offset=0):
+    rows = []
+    for i in range(offset, offset + count):
+        day = today - timedelta(days=(i * 7) % 45)
+        timestamp = datetime.combine(day, datetime.min.time()) + timedelta(hours=(i * 5) % 24, minutes=i % 60)
+        rows.append({
+            'timestamp': timestamp.isoformat(),
+            'conversation_id': f'conv_{i}',
+            'duration_minutes': DURATIONS[i % len(DURATIONS)],
+            # tech_support gets an extra share so today's top technique is never a tie
+            'technique_type': 'tech_support' if i % 4 == 3 else TECHNIQUES[i % len(TECHNIQUES)],
+            'success_rating': (i * 3) % 11,
+            'conversation_turn': i % 9,
+            'scammer_frustration_level': i % 10,
+        })
+    rows.append({
+        'timestamp': 'not a timestamp', 'conversation_id': 'conv_bad', 'duration_minutes': 1.0,
+        'technique_type': 'tech_support', 'success_rating': 9, 'conversation_turn': 1,
+        'scammer_frustration_level': 1,
+    })
+    return rows
+
+
+def write_csv(path, rows, header=True):
+    with open(path, 'a', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        if header:
+            writer.writeheader()
+        writer.writerows(rows)
+
+
+def read_csv(path):
+    """The original loader: every row, with the numeric fields converted"""
+    with open(path, 'r', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    for row in rows:
+        row['duration_minutes'] = float(row['duration_minutes'])
+        row['success_rating'] = int(row['success_rating'])
+        row['conversation_turn'] = int(row['conversation_turn'])
+    return rows
+
+
+def full_scan_stats(conversations, today):
+    """Reference results, computed the way the dashboard did before it kept aggregates"""
+    def parse(conv):
+        try:
+            return datetime.fromisoformat(conv['timestamp'])
+        except ValueError:
+            return None
+
+    def on_days(first_day, last_day):
+        return [conv for conv in conversations
+                if parse(conv) is not None and first_day <= parse(conv).date() <= last_day]
+
+    def minutes(convs):
+        return sum(conv['duration_minutes'] for conv in convs)
+
+    total = len(conversations)
+    techniques = [conv['technique_type'] for conv in conversations]
+    successes = len([conv for conv in conversations if conv['success_rating'] > 7])
+    today_convs = on_days(today, today)
+    today_techniques = [conv['technique_type'] for conv in today_convs]
+    week = on_days(today - timedelta(days=6), today)
+
+    trends = []
+    for i in range(30):
+        day = today - timedelta(days=i)
+        day_convs = on_days(day, day)
+        day_successes = len([conv for conv in day_convs if conv['success_rating'] > 7])
+        trends.append({
+            'date': day.isoformat(),
+            'conversations': len(day_convs),
+            'time_wasted_minutes': minutes(day_convs),
+            'success_rate': round(day_successes / len(day_convs) * 100, 1) if day_convs else 0.0
+        })
+
+    periods = {'morning': [], 'afternoon': [], 'evening': [], 'night': []}
+    for conv in conversations:
+        parsed = parse(conv)
+        if parsed is None:
+            continue
+        hour = parsed.hour
+        period = ('morning' if 6 <= hour < 12 else 'afternoon' if 12 <= hour < 18
+                  else 'evening' if 18 <= hour < 22 else 'night')
+        periods[period].append(conv['duration_minutes'])
+
+    return {
+        'overview': {
+            'total_conversations': total,
+            'total_time_wasted_hours': round(minutes(conversations) / 60, 2),
+            'average_conversation_minutes': round(minutes(conversations) / total, 2),
+            'success_rate_percentage': round(successes / total * 100, 1),
+            'estimated_cost_to_scammers': round(minutes(conversations) * 0.25, 2)
+        },
+        'today': {
+            'conversations': len(today_convs),
+            'time_wasted_minutes': minutes(today_convs),
+            'top_technique': max(set(today_techniques), key=today_techniques.count)
+        },
+        'this_week': {
+            'conversations': len(week),
+            'average_daily': round(len(week) / 7, 1),
+            'total_time_hours': round(minutes(week) / 60, 2)
+        },
+        'techniques': {technique: techniques.count(technique) for technique in set(techniques)},
+        'performance_trends': sorted(trends, key=lambda x: x['date']),
+        'geographic_data': {
+            'India': total // 3, 'Nigeria': total // 4, 'Philippines': total // 10,
+            'Jamaica': total // 10, 'Romania': total // 10, 'Pakistan': total // 10
+        },
+        'effectiveness_by_time': {
+            period: round(sum(durations) / len(durations), 2) if durations else 0
+            for period, durations in periods.items()
+        }
+    }
+
+
+@pytest.fixture
+def dashboard_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(os.path.join('data', 'analytics'))
+    return tmp_path
+
+
+def open_dashboard():
+    dashboard = AnalyticsDashboard()
+    atexit.unregister(dashboard.save_checkpoint)
+    return dashboard
+
+
+def test_aggregator_matches_full_scan(tmp_path):
+    today = datetime.now().date()
+    path = str(tmp_path / 'conversations.csv')
+    write_csv(path, make_rows(500, today))
+    conversations = read_csv(path)
+
+    aggregator = StatsAggregator()
+    aggregator.add_many(conversations)
+    expected = full_scan_stats(conversations, today)
+
+    overview = aggregator.overview()
+    assert overview['conversations'] == expected['overview']['total_conversations']
+    assert overview['techniques'] == expected['techniques']
+    assert round(overview['time_wasted_minutes'] / 60, 2) == expected['overview']['total_time_wasted_hours']
+
+    week = aggregator.day_range(today - timedelta(days=6), today)
+    assert week['conversations'] == expected['this_week']['conversations']
+
+    series = aggregator.daily_series(today, 30)
+    assert [day['date'].isoformat() for day in series] == [t['date'] for t in expected['performance_trends']]
+    assert [day['conversations'] for day in series] == [t['conversations'] for t in expected['performance_trends']]
+
+
+def test_aggregator_state_round_trip(tmp_path):
+    today = datetime.now().date()
+    aggregator = StatsAggregator()
+    aggregator.add_many(make_rows(200, today))
+
+    restored = StatsAggregator.from_state(aggregator.to_state())
+    assert restored.to_state() == aggregator.to_state()
+    assert restored.overview() == aggregator.overview()
+
+
+def test_dashboard_matches_full_scan(dashboard_dir):
+    today = datetime.now().date()
+    path = os.path.join('data', 'analytics', 'conversations.csv')
+    write_csv(path, make_rows(500, today))
+
+    stats = open_dashboard().get_real_time_stats()
+    stats.pop('latency')
+    assert stats == full_scan_stats(read_csv(path), today)
+
+
+def test_dashboard_follows_appended_rows_and_checkpoint(dashboard_dir):
+    today = datetime.now().date()
+    path = os.path.join('data', 'analytics', 'conversations.csv')
+    write_csv(path, make_rows(300, today))
+    dashboard = open_dashboard()
+    dashboard.get_aggregate_stats()
+
+    # Rows written by another worker are folded in on the next read
+    write_csv(path, make_rows(120, today, offset=300), header=False)
+    assert dashboard.get_aggregate_stats() == full_scan_stats(read_csv(path), today)
+
+    # A restarted worker resumes from the checkpoint and reaches the same totals
+    dashboard.save_checkpoint()
+    write_csv(path, make_rows(40, today, offset=420), header=False)
+    restarted = open_dashboard()
+    assert restarted.tail.stats['bytes'] < os.path.getsize(path)
+    assert restarted.get_aggregate_stats() == full_scan_stats(read_csv(path), today)
+
+
+def test_empty_log(dashboard_dir):
+    stats = open_dashboard().get_real_time_stats()
+    assert stats['overview']['total_conversations'] == 0
+    assert stats['today']['top_technique'] == 'none'
+    assert 'latency' in stats
+
+
+def test_latency_is_merged_at_read_time(dashboard_dir):
+    dashboard = open_dashboard()
+    cached = dashboard.get_aggregate_stats()
+    get_latency_recorder().record('engine_turn', 'tech_support', 0.125)
+
+    stats = dashboard.get_real_time_stats(cached)
+    assert 'latency' not in cached
+    summary = stats['latency']['engine_turn']['tech_support']
+    assert {'p50_ms', 'p90_ms', 'p99_ms', 'p99.9_ms'} <= set(summary)
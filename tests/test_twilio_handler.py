@@ -0,0 +1,96 @@
+"""
+Tests for two-phase voice turns whose reply lands on another worker
+"""
+import time
+from urllib.parse import parse_qs, urlsplit
+from xml.etree import ElementTree
+
+import pytest
+
+from ai.enhanced_responses import EnhancedResponses
+from ai.session_manager import SessionManager
+from data.shared_state import SharedStateStore
+from twilio_handler import STILL_THERE, VoiceCallHandler
+from utils.admission import ADMITTED, AdmissionController
+
+SPEECH = 'This is Microsoft, your computer has a virus'
+
+
+@pytest.fixture(autouse=True)
+def run_in_tmp(tmp_path, monkeypatch):
+    # The engine writes its analytics log under the working directory
+    monkeypatch.chdir(tmp_path)
+
+
+def make_worker(path, **options):
+    sessions = SessionManager(shared_store=SharedStateStore(path))
+    return VoiceCallHandler(sessions, EnhancedResponses(), fillers=('Hmm, let me see.',), **options)
+
+
+def start_turn(owner, call_sid='CA1'):
+    """Run /voice/gather on ``owner``; returns the reply URL's query and the background future"""
+    twiml = ElementTree.fromstring(owner.gather({'CallSid': call_sid, 'SpeechResult': SPEECH}))
+    query = parse_qs(urlsplit(twiml.find('Redirect').text).query)
+    return {name: values[0] for name, values in query.items()}, owner._pending[call_sid].future
+
+
+def said(twiml):
+    return ElementTree.fromstring(twiml).find('Gather/Say').text
+
+
+def test_reply_on_other_worker_reads_owner_outcome(tmp_path):
+    path = str(tmp_path / 'shared.db')
+    owner, other = make_worker(path), make_worker(path)
+
+    query, future = start_turn(owner)
+    assert set(query) == {'Turn', 'Worker'}  # the caller's speech stays server-side
+
+    response = said(other.reply(dict(query, Worker='another-worker', CallSid='CA1')))
+    assert response == future.result()
+    assert other.stats['replies_elsewhere'] == 1
+    assert other.stats['replies_lost'] == 0
+
+
+def test_shed_turn_ends_the_wait_at_once(tmp_path):
+    path = str(tmp_path / 'shared.db')
+    admission = AdmissionController(max_concurrent=1, max_queue=0)
+    owner, other = make_worker(path, admission=admission), make_worker(path)
+    assert admission.acquire() == ADMITTED  # the owner is saturated, so the turn is shed
+
+    query, future = start_turn(owner)
+    stall = future.result()
+    started = time.monotonic()
+    response = said(other.reply(dict(query, Worker='another-worker', CallSid='CA1')))
+
+    assert response == stall
+    assert time.monotonic() - started < 1.0
+    assert owner.stats['shed'] == 1
+
+
+def test_failed_turn_ends_the_wait_at_once(tmp_path):
+    path = str(tmp_path / 'shared.db')
+    owner, other = make_worker(path), make_worker(path)
+
+    def broken_turn(call_sid, speech, opener=True):
+        raise RuntimeError('engine failure')
+    owner._take_turn = broken_turn
+
+    query, future = start_turn(owner)
+    with pytest.raises(RuntimeError):
+        future.result()
+    started = time.monotonic()
+    response = said(other.reply(dict(query, Worker='another-worker', CallSid='CA1')))
+
+    assert response in STILL_THERE
+    assert time.monotonic() - started < 1.0
+    assert other.stats['replies_lost'] == 1
+
+
+def test_reply_on_owner_uses_the_local_turn(tmp_path):
+    owner = make_worker(str(tmp_path / 'shared.db'))
+
+    query, future = start_turn(owner)
+    response = said(owner.reply(dict(query, CallSid='CA1')))
+
+    assert response == future.result()
+    assert owner.stats['replies_elsewhere'] == 0